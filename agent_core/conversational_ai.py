@@ -5,22 +5,19 @@ This module provides natural language conversational capabilities using Llama 3.
 to make interactions with the Discord bot more human-like and helpful for job seekers.
 """
 
-import os
 import json
 import logging
-import requests
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
+from resume_doc_processing import llm_client
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-HUGGINGFACE_API_KEY = os.getenv('HUGGINGFACE_API_KEY')
-if not HUGGINGFACE_API_KEY:
+# Without LLM credentials the assistant answers with fallback responses
+if not llm_client.credentials_available():
     logger.warning("HUGGINGFACE_API_KEY not found in environment variables - conversational AI will use fallback responses")
-    HUGGINGFACE_API_KEY = None
 
 class JobSeekerAssistant:
     """Conversational AI assistant for job seekers."""
@@ -69,7 +66,7 @@ class JobSeekerAssistant:
     def generate_response(self, user_id: str, user_message: str, user_context: Dict = None) -> str:
         """Generate a conversational response to user input."""
         # If no API key, use fallback responses
-        if not HUGGINGFACE_API_KEY:
+        if not llm_client.credentials_available():
             logger.info(f"Using fallback response for user {user_id} (no API key)")
             return self._get_fallback_response(user_message)
 
@@ -107,48 +104,20 @@ class JobSeekerAssistant:
             Respond naturally and helpfully. Focus on being supportive and guiding them toward using bot features when appropriate.
             """
 
-            # Call Hugging Face API
-            response = requests.post(
-                'https://api-inference.huggingface.co/models/meta-llama/Llama-3.1-8B-Instruct',
-                headers={
-                    'Authorization': f'Bearer {HUGGINGFACE_API_KEY}',
-                    'Content-Type': 'application/json'
-                },
-                json={
-                    'inputs': prompt,
-                    'parameters': {
-                        'max_new_tokens': 300,
-                        'temperature': 0.7,
-                        'do_sample': True,
-                        'top_p': 0.9
-                    }
-                },
-                timeout=30
-            )
-
-            if response.status_code == 200:
-                result = response.json()
-                if isinstance(result, list) and result:
-                    ai_response = result[0].get('generated_text', '').strip()
-
-                    # Clean up response (remove any prompt leakage)
-                    if 'CURRENT USER MESSAGE:' in ai_response:
-                        ai_response = ai_response.split('CURRENT USER MESSAGE:')[0].strip()
-
-                    # Update conversation history
-                    history.append((user_message, ai_response))
-                    self.conversation_history[user_id] = history[-10:]  # Keep last 10 exchanges
-
-                    logger.info(f"Generated conversational response for user {user_id}")
-                    return ai_response
-
-                else:
-                    logger.error("Unexpected API response format")
-                    return self._get_fallback_response(user_message)
-
-            else:
-                logger.error(f"Hugging Face API error: {response.status_code} - {response.text}")
-                return self._get_fallback_response(user_message)
+            # Call the shared LLM client; chat replies quote the user's messages, so they stay out of the cache
+            ai_response = llm_client.complete(prompt, max_new_tokens=300, temperature=0.7, do_sample=True,
+                                              top_p=0.9, timeout=30, use_cache=False)
+
+            # Clean up response (remove any prompt leakage)
+            if 'CURRENT USER MESSAGE:' in ai_response:
+                ai_response = ai_response.split('CURRENT USER MESSAGE:')[0].strip()
+
+            # Update conversation history
+            history.append((user_message, ai_response))
+            self.conversation_history[user_id] = history[-10:]  # Keep last 10 exchanges
+
+            logger.info(f"Generated conversational response for user {user_id}")
+            return ai_response
 
         except Exception as e:
             logger.error(f"Error generating conversational response: {e}")
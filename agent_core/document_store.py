@@ -0,0 +1,217 @@
+"""
+Document Metadata Store
+
+SQLite store for uploaded document metadata (certificates, degrees,
+diplomas, IDs), replacing the documents.json file that every call re-read
+and rewrote in full. Rows are keyed by (user_id, doc_id) and indexed by
+user and document type; uploads are single-row atomic upserts, so
+concurrent uploads no longer overwrite each other.
+
+Each document's distinct content terms are stored in an inverted index at
+upload time, so candidate documents for a job are ranked by term overlap in
+SQL instead of re-reading every document on each selection.
+"""
+
+import os
+import re
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from email_comm_hub.token_store import ConnectionPool, SQLITE_MAX_VARIABLES
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.getenv('DOCUMENTS_DB_POOL_SIZE', '4'))
+DEFAULT_USER = ''
+
+TERM_RE = re.compile(r'[a-z][a-z0-9+#]{2,}')
+STOP_TERMS = {
+    'the', 'and', 'for', 'with', 'from', 'that', 'this', 'has', 'have', 'was', 'are', 'been', 'will', 'who',
+    'its', 'our', 'your', 'you', 'all', 'any', 'can', 'not', 'but', 'into', 'such', 'per', 'pdf'
+}
+
+UPSERT_DOCUMENT = '''
+    INSERT INTO documents (user_id, doc_id, filename, path, type, content_preview, uploaded_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(user_id, doc_id) DO UPDATE SET filename = excluded.filename, path = excluded.path,
+        type = excluded.type, content_preview = excluded.content_preview, uploaded_at = excluded.uploaded_at,
+        relevance_score = NULL, relevance_reason = NULL
+'''
+DELETE_TERMS = 'DELETE FROM document_terms WHERE user_id = ? AND doc_id = ?'
+INSERT_TERM = 'INSERT OR IGNORE INTO document_terms (user_id, doc_id, term) VALUES (?, ?, ?)'
+UPDATE_RELEVANCE = '''
+    UPDATE documents SET relevance_score = ?, relevance_reason = ? WHERE user_id = ? AND doc_id = ?
+'''
+SELECT_COLUMNS = 'doc_id, filename, path, type, content_preview, uploaded_at, relevance_score, relevance_reason'
+
+
+def text_terms(text: str) -> set:
+    """Distinct lowercased content terms of a text."""
+    return {term for term in TERM_RE.findall(text.lower()) if term not in STOP_TERMS}
+
+def _row_to_metadata(row) -> Dict:
+    metadata = {
+        "id": row[0],
+        "filename": row[1],
+        "path": row[2],
+        "type": row[3],
+        "content_preview": row[4],
+        "uploaded_at": row[5]
+    }
+    if row[6] is not None:
+        metadata["relevance_score"] = row[6]
+        metadata["relevance_reason"] = row[7]
+    return metadata
+
+
+class DocumentStore:
+    """Document metadata and term index per user."""
+
+    def __init__(self, db_path: str, pool_size: int = POOL_SIZE):
+        self.db_path = db_path
+        self.pool = ConnectionPool(db_path, pool_size)
+        self._init_schema()
+
+    def _init_schema(self):
+        with self.pool.connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS documents (
+                    user_id TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    filename TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    content_preview TEXT NOT NULL DEFAULT '',
+                    uploaded_at TEXT,
+                    relevance_score INTEGER,
+                    relevance_reason TEXT,
+                    PRIMARY KEY (user_id, doc_id)
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS documents_user_type ON documents (user_id, type)')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS document_terms (
+                    user_id TEXT NOT NULL,
+                    term TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    PRIMARY KEY (user_id, term, doc_id)
+                ) WITHOUT ROWID
+            ''')
+
+    def upsert(self, doc_id: str, filename: str, path: str, doc_type: str, content: str,
+               uploaded_at: Optional[str] = None, user_id: str = DEFAULT_USER,
+               preview_chars: int = 500) -> Dict:
+        """Insert or replace a document and its terms in one transaction."""
+        uploaded_at = uploaded_at or datetime.now().isoformat()
+        terms = text_terms(f"{doc_type} {os.path.splitext(filename)[0]} {content}")
+        with self.pool.connection() as conn:
+            conn.execute(UPSERT_DOCUMENT, (user_id, doc_id, filename, path, doc_type,
+                                           content[:preview_chars], uploaded_at))
+            conn.execute(DELETE_TERMS, (user_id, doc_id))
+            conn.executemany(INSERT_TERM, ((user_id, doc_id, term) for term in terms))
+        return {
+            "id": doc_id,
+            "filename": filename,
+            "path": path,
+            "type": doc_type,
+            "content_preview": content[:preview_chars],
+            "uploaded_at": uploaded_at
+        }
+
+    def get(self, doc_id: str, user_id: str = DEFAULT_USER) -> Optional[Dict]:
+        with self.pool.connection() as conn:
+            row = conn.execute(f'SELECT {SELECT_COLUMNS} FROM documents WHERE user_id = ? AND doc_id = ?',
+                               (user_id, doc_id)).fetchone()
+        return _row_to_metadata(row) if row else None
+
+    def list(self, user_id: str = DEFAULT_USER, doc_type: Optional[str] = None) -> List[Dict]:
+        """A user's documents in upload order, optionally of one type."""
+        query = f'SELECT {SELECT_COLUMNS} FROM documents WHERE user_id = ?'
+        params = [user_id]
+        if doc_type:
+            query += ' AND type = ?'
+            params.append(doc_type)
+        with self.pool.connection() as conn:
+            rows = conn.execute(query + ' ORDER BY uploaded_at, doc_id', params).fetchall()
+        return [_row_to_metadata(row) for row in rows]
+
+    def count(self, user_id: str = DEFAULT_USER) -> int:
+        with self.pool.connection() as conn:
+            return conn.execute('SELECT COUNT(*) FROM documents WHERE user_id = ?', (user_id,)).fetchone()[0]
+
+    def candidates(self, terms: Iterable[str], limit: int, user_id: str = DEFAULT_USER) -> List[Dict]:
+        """Up to `limit` documents ranked by how many of the terms they contain.
+
+        Documents without any matching term fill the remaining slots, most
+        recent first, so e.g. ID documents are still offered.
+        """
+        terms = list(terms)[:SQLITE_MAX_VARIABLES]
+        with self.pool.connection() as conn:
+            ranked = []
+            if terms:
+                ranked = [row[0] for row in conn.execute(
+                    f'''SELECT doc_id FROM document_terms
+                        WHERE user_id = ? AND term IN ({",".join("?" * len(terms))})
+                        GROUP BY doc_id ORDER BY COUNT(*) DESC, doc_id LIMIT ?''',
+                    (user_id, *terms, limit)
+                )]
+            if len(ranked) < limit:
+                seen = set(ranked)
+                for (doc_id,) in conn.execute(
+                        'SELECT doc_id FROM documents WHERE user_id = ? ORDER BY uploaded_at DESC, doc_id LIMIT ?',
+                        (user_id, limit + len(ranked))):
+                    if len(ranked) >= limit:
+                        break
+                    if doc_id not in seen:
+                        ranked.append(doc_id)
+            if not ranked:
+                return []
+            rows = {row[0]: row for row in conn.execute(
+                f'SELECT {SELECT_COLUMNS} FROM documents WHERE user_id = ? AND doc_id IN ({",".join("?" * len(ranked))})',
+                (user_id, *ranked)
+            )}
+        return [_row_to_metadata(rows[doc_id]) for doc_id in ranked if doc_id in rows]
+
+    def update_relevance(self, scores: Dict[str, tuple], user_id: str = DEFAULT_USER):
+        """Store (relevance_score, reason) per doc_id in one transaction."""
+        with self.pool.connection() as conn:
+            conn.executemany(UPDATE_RELEVANCE, ((score, reason, user_id, doc_id)
+                                                for doc_id, (score, reason) in scores.items()))
+
+    def import_json(self, json_path: str, user_id: str = DEFAULT_USER) -> int:
+        """Load documents from a legacy documents.json; returns the number imported."""
+        with open(json_path, 'r') as f:
+            documents = json.load(f)
+        for doc_id, metadata in documents.items():
+            self.upsert(doc_id, metadata.get('filename', ''), metadata.get('path', ''), metadata.get('type', ''),
+                        metadata.get('content_preview', ''), metadata.get('uploaded_at'), user_id)
+            if 'relevance_score' in metadata:
+                self.update_relevance({doc_id: (metadata['relevance_score'], metadata.get('relevance_reason', ''))},
+                                      user_id)
+        return len(documents)
+
+
+_stores: Dict[str, DocumentStore] = {}
+_stores_lock = threading.Lock()
+
+def get_document_store(db_path: str, legacy_json: Optional[str] = None,
+                       legacy_user: str = DEFAULT_USER) -> DocumentStore:
+    """Return the shared store for a database file (created on first use).
+
+    A new, empty store imports legacy_json, if that file exists, as
+    legacy_user's documents.
+    """
+    with _stores_lock:
+        store = _stores.get(db_path)
+        if store is None:
+            store = _stores[db_path] = DocumentStore(db_path)
+            if legacy_json and os.path.exists(legacy_json) and not store.count():
+                imported = store.import_json(legacy_json, legacy_user)
+                logger.info(f"Imported {imported} documents from {legacy_json} into {db_path} "
+                            f"for user {legacy_user!r}")
+        return store
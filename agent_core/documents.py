@@ -5,30 +5,53 @@ import requests
 from typing import Dict, List, Optional
 from werkzeug.utils import secure_filename
 import pdfplumber
+from resume_doc_processing import llm_client
+from agent_core.document_store import DEFAULT_USER, get_document_store, text_terms
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-HUGGINGFACE_API_KEY = os.getenv('HUGGINGFACE_API_KEY')
-if not HUGGINGFACE_API_KEY:
-    logger.error("HUGGINGFACE_API_KEY not found in environment variables")
-    raise ValueError("HUGGINGFACE_API_KEY is required")
+# The configured LLM backend must have credentials
+llm_client.require_credentials()
 
 # Configuration
 UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'pdf'}
+DOCUMENTS_DB = os.getenv('DOCUMENTS_DB', 'documents.db')
+# Legacy metadata file, imported into DOCUMENTS_DB on first use
 DOCUMENTS_JSON = 'documents.json'
+# User the legacy documents are imported for; by default they stay shared
+# (see document_owner)
+DOCUMENTS_LEGACY_USER = os.getenv('DOCUMENTS_LEGACY_USER', DEFAULT_USER)
+# Documents offered to the LLM per selection, best term overlap first
+DOCUMENT_SELECTION_CANDIDATES = int(os.getenv('DOCUMENT_SELECTION_CANDIDATES', '20'))
+
+def document_store():
+    """Shared metadata store for the current DOCUMENTS_DB."""
+    return get_document_store(DOCUMENTS_DB, DOCUMENTS_JSON, DOCUMENTS_LEGACY_USER)
+
+def document_owner(user_id: str = DEFAULT_USER) -> str:
+    """User whose documents `user_id` sees.
+
+    Documents uploaded before uploads were per user are stored under
+    DEFAULT_USER; a user with no documents of their own keeps seeing those.
+    """
+    if user_id != DEFAULT_USER and not document_store().count(user_id):
+        return DEFAULT_USER
+    return user_id
 
 def allowed_file(filename: str) -> bool:
     """Check if file extension is allowed."""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def ensure_upload_folder():
+def user_upload_folder(user_id: str = DEFAULT_USER) -> str:
+    """Upload folder for a user, so equal filenames from different users don't collide."""
+    return os.path.join(UPLOAD_FOLDER, secure_filename(user_id)) if user_id else UPLOAD_FOLDER
+
+def ensure_upload_folder(user_id: str = DEFAULT_USER):
     """Ensure upload folder exists."""
-    if not os.path.exists(UPLOAD_FOLDER):
-        os.makedirs(UPLOAD_FOLDER)
+    os.makedirs(user_upload_folder(user_id), exist_ok=True)
 
 def extract_pdf_text(file_path: str) -> str:
     """Extract text from PDF document."""
@@ -42,28 +65,15 @@ def extract_pdf_text(file_path: str) -> str:
         logger.error(f"Error extracting text from {file_path}: {e}")
         return ""
 
-def save_document_metadata(doc_id: str, filename: str, doc_type: str, content: str) -> Dict:
-    """Save document metadata to JSON file."""
+def save_document_metadata(doc_id: str, filename: str, doc_type: str, content: str,
+                           user_id: str = DEFAULT_USER) -> Dict:
+    """Upsert document metadata and its content terms into the document store."""
     try:
-        metadata = {
-            "id": doc_id,
-            "filename": filename,
-            "path": os.path.join(UPLOAD_FOLDER, filename),
-            "type": doc_type,
-            "content_preview": content[:500],  # First 500 chars
-            "uploaded_at": str(os.path.getctime(os.path.join(UPLOAD_FOLDER, filename)))
-        }
-
-        # Load existing documents
-        documents = load_documents_metadata()
-
-        # Add new document
-        documents[doc_id] = metadata
-
-        # Save back to file
-        with open(DOCUMENTS_JSON, 'w') as f:
-            json.dump(documents, f, indent=2)
-
+        path = os.path.join(user_upload_folder(user_id), filename)
+        metadata = document_store().upsert(
+            doc_id, filename, path, doc_type, content,
+            uploaded_at=str(os.path.getctime(path)), user_id=user_id
+        )
         logger.info(f"Document metadata saved for {filename}")
         return metadata
 
@@ -71,27 +81,24 @@ def save_document_metadata(doc_id: str, filename: str, doc_type: str, content: s
         logger.error(f"Error saving document metadata: {e}")
         raise
 
-def load_documents_metadata() -> Dict:
-    """Load documents metadata from JSON file."""
+def load_documents_metadata(user_id: str = DEFAULT_USER) -> Dict:
+    """All of a user's document metadata, keyed by document id."""
     try:
-        if os.path.exists(DOCUMENTS_JSON):
-            with open(DOCUMENTS_JSON, 'r') as f:
-                return json.load(f)
-        return {}
+        return {metadata['id']: metadata for metadata in document_store().list(document_owner(user_id))}
     except Exception as e:
         logger.error(f"Error loading documents metadata: {e}")
         return {}
 
-def upload_document(file, doc_type: str) -> Dict:
+def upload_document(file, doc_type: str, user_id: str = DEFAULT_USER) -> Dict:
     """Handle document upload."""
     try:
-        ensure_upload_folder()
+        ensure_upload_folder(user_id)
 
         if not file or not allowed_file(file.filename):
             raise ValueError("Invalid file or file type not allowed")
 
         filename = secure_filename(file.filename)
-        file_path = os.path.join(UPLOAD_FOLDER, filename)
+        file_path = os.path.join(user_upload_folder(user_id), filename)
         file.save(file_path)
 
         # Extract text content
@@ -101,7 +108,7 @@ def upload_document(file, doc_type: str) -> Dict:
         doc_id = f"{doc_type}_{os.path.splitext(filename)[0]}"
 
         # Save metadata
-        metadata = save_document_metadata(doc_id, filename, doc_type, content)
+        metadata = save_document_metadata(doc_id, filename, doc_type, content, user_id)
 
         logger.info(f"Document uploaded successfully: {filename}")
         return {
@@ -117,19 +124,33 @@ def upload_document(file, doc_type: str) -> Dict:
             "error": str(e)
         }
 
-def select_relevant_documents(job_details: Dict) -> List[Dict]:
-    """Select job-relevant documents using Llama 3.1."""
+def job_terms(job_details: Dict) -> set:
+    """Content terms of a job's title, skills and description."""
+    return text_terms(' '.join([
+        job_details.get('job_title', ''),
+        ' '.join(job_details.get('skills', [])),
+        job_details.get('description', '') or ''
+    ]))
+
+def select_relevant_documents(job_details: Dict, user_id: str = DEFAULT_USER,
+                              max_candidates: int = DOCUMENT_SELECTION_CANDIDATES) -> List[Dict]:
+    """Select job-relevant documents using Llama 3.1.
+
+    Only the documents sharing the most terms with the job are sent to the
+    LLM, so the prompt stays bounded however many documents a user has.
+    """
     try:
-        documents = load_documents_metadata()
-        if not documents:
+        user_id = document_owner(user_id)
+        candidates = document_store().candidates(job_terms(job_details), max_candidates, user_id)
+        if not candidates:
             logger.info("No documents available for selection")
             return []
 
         # Prepare document list for AI analysis
         doc_list = []
-        for doc_id, metadata in documents.items():
+        for metadata in candidates:
             doc_list.append({
-                "id": doc_id,
+                "id": metadata["id"],
                 "type": metadata.get("type", ""),
                 "content": metadata.get("content_preview", "")
             })
@@ -167,64 +188,35 @@ def select_relevant_documents(job_details: Dict) -> List[Dict]:
         Return only the JSON response.
         """
 
-        # Hugging Face Inference API call
-        response = requests.post(
-            'https://api-inference.huggingface.co/models/meta-llama/Llama-3.1-8B-Instruct',
-            headers={
-                'Authorization': f'Bearer {HUGGINGFACE_API_KEY}',
-                'Content-Type': 'application/json'
-            },
-            json={
-                'inputs': prompt,
-                'parameters': {
-                    'max_new_tokens': 512,
-                    'temperature': 0.1,
-                    'do_sample': True
-                }
-            },
-            timeout=60
-        )
-
-        if response.status_code == 200:
-            result = response.json()
-            if isinstance(result, list) and result:
-                api_response = result[0].get('generated_text', '').strip()
+        # Shared LLM client; repeated selections for the same job are served from its cache
+        api_response = llm_client.complete(prompt, max_new_tokens=512, temperature=0.1, do_sample=True, timeout=60,
+                                           validate=llm_client.has_json_object)
+
+        # Extract JSON from response
+        try:
+            start = api_response.find('{')
+            end = api_response.rfind('}') + 1
+            if start != -1 and end != -1:
+                json_str = api_response[start:end]
+                selection_result = json.loads(json_str)
             else:
-                raise Exception("Unexpected API response format")
-
-            # Extract JSON from response
-            try:
-                start = api_response.find('{')
-                end = api_response.rfind('}') + 1
-                if start != -1 and end != -1:
-                    json_str = api_response[start:end]
-                    selection_result = json.loads(json_str)
-                else:
-                    raise ValueError("No JSON found in response")
-
-                selected_docs = selection_result.get('selected_documents', [])
-
-                # Update metadata with relevance
-                for selected in selected_docs:
-                    doc_id = selected['doc_id']
-                    if doc_id in documents:
-                        documents[doc_id]['relevance_score'] = selected.get('relevance_score', 0)
-                        documents[doc_id]['relevance_reason'] = selected.get('reason', '')
-
-                # Save updated metadata
-                with open(DOCUMENTS_JSON, 'w') as f:
-                    json.dump(documents, f, indent=2)
-
-                logger.info(f"Selected {len(selected_docs)} relevant documents")
-                return selected_docs
-
-            except json.JSONDecodeError as e:
-                logger.error(f"Error parsing selection response: {e}")
-                return []
-
-        else:
-            logger.error(f"Hugging Face API error: {response.status_code} - {response.text}")
-            raise Exception(f"Failed to select documents: {response.status_code}")
+                raise ValueError("No JSON found in response")
+
+            selected_docs = selection_result.get('selected_documents', [])
+
+            # Update metadata with relevance
+            candidate_ids = {metadata["id"] for metadata in candidates}
+            document_store().update_relevance({
+                selected['doc_id']: (selected.get('relevance_score', 0), selected.get('reason', ''))
+                for selected in selected_docs if selected.get('doc_id') in candidate_ids
+            }, user_id)
+
+            logger.info(f"Selected {len(selected_docs)} relevant documents")
+            return selected_docs
+
+        except json.JSONDecodeError as e:
+            logger.error(f"Error parsing selection response: {e}")
+            return []
 
     except requests.RequestException as e:
         logger.error(f"Request error during document selection: {e}")
@@ -233,22 +225,19 @@ def select_relevant_documents(job_details: Dict) -> List[Dict]:
         logger.error(f"Error selecting relevant documents: {e}")
         return []
 
-def get_document_path(doc_id: str) -> Optional[str]:
+def get_document_path(doc_id: str, user_id: str = DEFAULT_USER) -> Optional[str]:
     """Get the file path for a document by ID."""
     try:
-        documents = load_documents_metadata()
-        if doc_id in documents:
-            return documents[doc_id].get('path')
-        return None
+        metadata = document_store().get(doc_id, document_owner(user_id))
+        return metadata.get('path') if metadata else None
     except Exception as e:
         logger.error(f"Error getting document path for {doc_id}: {e}")
         return None
 
-def list_documents() -> List[Dict]:
-    """List all uploaded documents with metadata."""
+def list_documents(user_id: str = DEFAULT_USER, doc_type: Optional[str] = None) -> List[Dict]:
+    """List uploaded documents with metadata, optionally of one type."""
     try:
-        documents = load_documents_metadata()
-        return list(documents.values())
+        return document_store().list(document_owner(user_id), doc_type)
     except Exception as e:
         logger.error(f"Error listing documents: {e}")
         return []
\ No newline at end of file
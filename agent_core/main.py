@@ -1,6 +1,5 @@
 import os
 import logging
-import json
 import operator
 from datetime import datetime
 from dotenv import load_dotenv
@@ -51,6 +50,7 @@ from resume_doc_processing import audit_tool
 from resume_doc_processing import resume_parser
 from agent_core import documents
 from job_discovery_matching import job_search
+from job_discovery_matching import rate_limiter
 from learning_recommendations import course_suggestions
 from email_comm_hub import discord_bot
 from external_services_deployment import colab_integration
@@ -104,6 +104,7 @@ class AgentState(TypedDict):
     skill_gaps: Annotated[List[str], operator.add]
     game_recommendations: Annotated[Dict[str, List[Dict]], lambda x, y: y]
     token_activities: Annotated[List[Dict], operator.add]
+    search_params: Annotated[Dict, lambda x, y: y]
 
 # Node for Gmail scanning with OAuth integration (Issue #2)
 def scan_gmail(state: AgentState) -> AgentState:
@@ -117,7 +118,7 @@ def scan_gmail(state: AgentState) -> AgentState:
             loop = asyncio.get_event_loop()
             return await loop.run_in_executor(
                 None,
-                lambda: gmail_tool.scan_emails(creds, timeout=25, max_results=20)  # Reduced timeout and results
+                lambda: gmail_tool.scan_emails(creds, timeout=25, max_results=20, user_id=state['user_id'])  # Reduced timeout and results
             )
 
         # Run with 30 second timeout
@@ -184,8 +185,7 @@ def parse_resume(state: AgentState) -> AgentState:
     try:
         # This would typically parse an uploaded resume file
         # For now, load the master resume as placeholder
-        with open('../resume_doc_processing/master_resume.json', 'r') as f:
-            raw_resume = json.load(f)
+        raw_resume = resume_tool.load_master_resume()
 
         # Apply POPIA anonymization
         if popia_compliance:
@@ -220,7 +220,7 @@ def select_documents(state: AgentState) -> AgentState:
         # Select documents relevant to the first parsed job
         if state['parsed_jobs']:
             job_details = state['parsed_jobs'][0]  # Use first job for selection
-            state['selected_documents'] = documents.select_relevant_documents(job_details)
+            state['selected_documents'] = documents.select_relevant_documents(job_details, state['user_id'])
             logger.info(f"Selected {len(state['selected_documents'])} relevant documents")
         else:
             state['selected_documents'] = []
@@ -236,22 +236,34 @@ def send_emails(state: AgentState) -> AgentState:
     state['sent_emails'] = []  # Placeholder
     return state
 
+def get_search_params(state: AgentState) -> Dict:
+    """Resolve job search parameters from the state or the last message.
+
+    Workflow searches run unattended, so unless the state says otherwise they
+    use the background quota priority.
+    """
+    if state.get('search_params'):
+        return {'priority': rate_limiter.BACKGROUND_PRIORITY, **state['search_params']}
+
+    search_params = {'keywords': 'software engineer', 'location': 'remote',
+                     'priority': rate_limiter.BACKGROUND_PRIORITY}  # Default
+
+    # Extract from messages if available
+    if state.get('messages'):
+        last_message = state['messages'][-1]
+        if hasattr(last_message, 'content'):
+            content = last_message.content
+            # Simple parsing for keywords and location
+            if 'keywords:' in content:
+                search_params['keywords'] = content.split('keywords:')[1].split()[0]
+            if 'location:' in content:
+                search_params['location'] = content.split('location:')[1].split()[0]
+    return search_params
+
 # Node for job search from APIs (using Colab for processing)
 def search_api_jobs(state: AgentState) -> AgentState:
     try:
-        # Use search parameters from messages or default
-        search_params = {'keywords': 'software engineer', 'location': 'remote'}  # Default
-
-        # Extract from messages if available
-        if state['messages']:
-            last_message = state['messages'][-1]
-            if hasattr(last_message, 'content'):
-                content = last_message.content
-                # Simple parsing for keywords and location
-                if 'keywords:' in content:
-                    search_params['keywords'] = content.split('keywords:')[1].split()[0]
-                if 'location:' in content:
-                    search_params['location'] = content.split('location:')[1].split()[0]
+        search_params = get_search_params(state)
 
         # Check if Colab is available, otherwise fallback to local processing
         if colab_integration.check_colab_status():
@@ -267,6 +279,16 @@ def search_api_jobs(state: AgentState) -> AgentState:
         state['api_jobs'] = []
     return state
 
+def local_fit_analysis(state: AgentState, all_jobs: List[dict]) -> AgentState:
+    """Score jobs locally and derive skill gaps from the low-fit ones."""
+    high_fit, low_fit = resume_tool.filter_high_fit_jobs(all_jobs)
+    state['parsed_jobs'] = high_fit + low_fit
+    state['skill_gaps'] = course_suggestions.analyze_skill_gaps(
+        state['parsed_resume'],
+        [req for job in low_fit for req in job.get('requirements', [])]
+    )
+    return state
+
 # Node for job fit analysis (using Colab for NLP processing)
 def analyze_job_fit(state: AgentState) -> AgentState:
     try:
@@ -287,20 +309,10 @@ def analyze_job_fit(state: AgentState) -> AgentState:
             else:
                 # Fallback to local processing
                 logger.warning("Colab fit analysis failed, using local processing")
-                high_fit, low_fit = resume_tool.filter_high_fit_jobs(all_jobs)
-                state['parsed_jobs'] = high_fit + low_fit
-                state['skill_gaps'] = course_suggestions.analyze_skill_gaps(
-                    state['parsed_resume'],
-                    [req for job in low_fit for req in job.get('requirements', [])]
-                )
+                local_fit_analysis(state, all_jobs)
         else:
             logger.info("Colab not available, using local fit analysis")
-            high_fit, low_fit = resume_tool.filter_high_fit_jobs(all_jobs)
-            state['parsed_jobs'] = high_fit + low_fit
-            state['skill_gaps'] = course_suggestions.analyze_skill_gaps(
-                state['parsed_resume'],
-                [req for job in low_fit for req in job.get('requirements', [])]
-            )
+            local_fit_analysis(state, all_jobs)
 
         logger.info(f"Analyzed fit for {len(all_jobs)} jobs, found {len(state['skill_gaps'])} skill gaps")
     except Exception as e:
@@ -488,6 +500,131 @@ def award_activity_tokens(state: AgentState) -> AgentState:
         state['token_activities'] = []
     return state
 
+# Async node implementations
+# These await network I/O directly and push blocking work (Gmail client,
+# Colab status checks, scoring) to worker threads, so many workflows can be in
+# flight on one event loop without starving the other endpoints.
+
+async def scan_gmail_async(state: AgentState) -> AgentState:
+    try:
+        creds = await asyncio.to_thread(gmail_tool.get_credentials, state['user_id'])
+        state['job_emails'] = await asyncio.wait_for(
+            asyncio.to_thread(gmail_tool.scan_emails, creds, timeout=25, max_results=20, user_id=state['user_id']),
+            timeout=30.0
+        )
+        logger.info(f"Scanned emails for user {state['user_id']}: {len(state['job_emails'])} found")
+    except asyncio.TimeoutError:
+        logger.error(f"Gmail scan timed out for user {state['user_id']}")
+        state['job_emails'] = []
+    except Exception as e:
+        logger.error(f"Error scanning Gmail for user {state['user_id']}: {e}")
+        state['job_emails'] = []
+    return state
+
+async def search_api_jobs_async(state: AgentState) -> AgentState:
+    try:
+        search_params = get_search_params(state)
+
+        if await asyncio.to_thread(colab_integration.check_colab_status):
+            logger.info("Using Colab for job search")
+            state['api_jobs'] = await colab_integration.submit_job_search_task(search_params) or []
+        else:
+            logger.info("Colab not available, using local job search")
+            state['api_jobs'] = await job_search.search_jobs_async(search_params)
+
+        logger.info(f"Searched {len(state['api_jobs'])} jobs from APIs")
+    except Exception as e:
+        logger.error(f"Error searching API jobs: {e}")
+        state['api_jobs'] = []
+    return state
+
+async def search_local_api_jobs_async(state: AgentState) -> AgentState:
+    """Job search someone is waiting on: the local job APIs only, never a Colab round trip."""
+    try:
+        state['api_jobs'] = await job_search.search_jobs_async(get_search_params(state))
+        logger.info(f"Searched {len(state['api_jobs'])} jobs from APIs")
+    except Exception as e:
+        logger.error(f"Error searching API jobs: {e}")
+        state['api_jobs'] = []
+    return state
+
+async def analyze_job_fit_async(state: AgentState) -> AgentState:
+    try:
+        all_jobs = state['parsed_jobs'] + state['api_jobs']
+
+        analysis_result = None
+        if await asyncio.to_thread(colab_integration.check_colab_status):
+            logger.info("Using Colab for fit analysis")
+            analysis_result = await colab_integration.submit_fit_analysis_task(
+                all_jobs, state['parsed_resume']
+            )
+            if not analysis_result:
+                logger.warning("Colab fit analysis failed, using local processing")
+        else:
+            logger.info("Colab not available, using local fit analysis")
+
+        if analysis_result:
+            high_fit_jobs = analysis_result.get('high_fit_jobs', [])
+            low_fit_jobs = analysis_result.get('low_fit_jobs', [])
+            state['skill_gaps'] = analysis_result.get('skill_gaps', [])
+            state['parsed_jobs'] = high_fit_jobs + low_fit_jobs
+        else:
+            await asyncio.to_thread(local_fit_analysis, state, all_jobs)
+
+        logger.info(f"Analyzed fit for {len(all_jobs)} jobs, found {len(state['skill_gaps'])} skill gaps")
+    except Exception as e:
+        logger.error(f"Error analyzing job fit: {e}")
+        state['skill_gaps'] = []
+    return state
+
+async def generate_resumes_async(state: AgentState) -> AgentState:
+    try:
+        high_fit_jobs = [job for job in state['parsed_jobs'] if job.get('fit_score', 0) >= 90]
+
+        if not high_fit_jobs:
+            logger.info("No high-fit jobs found, skipping resume generation")
+            state['generated_resumes'] = []
+            return state
+
+        if await asyncio.to_thread(colab_integration.check_colab_status):
+            logger.info("Using Colab for resume generation")
+            state['generated_resumes'] = await colab_integration.submit_resume_generation_task(
+                high_fit_jobs, state['parsed_resume']
+            ) or []
+        else:
+            logger.info("Colab not available, using local resume generation")
+            state['generated_resumes'] = await asyncio.to_thread(
+                resume_tool.generate_resumes_for_jobs, high_fit_jobs
+            )
+
+        logger.info(f"Generated {len(state['generated_resumes'])} resumes")
+    except Exception as e:
+        logger.error(f"Error generating resumes: {e}")
+        state['generated_resumes'] = []
+    return state
+
+async def suggest_courses_async(state: AgentState) -> AgentState:
+    try:
+        if not state['skill_gaps']:
+            logger.info("No skill gaps found, skipping course suggestions")
+            state['course_suggestions'] = {}
+            return state
+
+        if await asyncio.to_thread(colab_integration.check_colab_status):
+            logger.info("Using Colab for course suggestions")
+            state['course_suggestions'] = await colab_integration.submit_course_suggestions_task(
+                state['skill_gaps']
+            ) or {}
+        else:
+            logger.info("Colab not available, using local course suggestions")
+            state['course_suggestions'] = await course_suggestions.get_course_suggestions(state['skill_gaps'])
+
+        logger.info(f"Generated course suggestions for {len(state['skill_gaps'])} skill gaps")
+    except Exception as e:
+        logger.error(f"Error generating course suggestions: {e}")
+        state['course_suggestions'] = {}
+    return state
+
 # Build the LangGraph workflow
 workflow = StateGraph(AgentState)
 
@@ -526,6 +663,135 @@ workflow.add_edge("discord_notifications", END)
 # Compile the graph
 app = workflow.compile()
 
+# Dependency-aware parallel workflow
+# Each node only returns the AgentState keys it owns, so independent branches
+# can run in the same superstep and have their updates merged by the reducers.
+# Wall-clock latency is then bounded by the critical path
+# (scan_gmail -> parse_jobs -> analyze_job_fit -> generate_resumes -> ...)
+# rather than by the sum of all nodes.
+NODE_OUTPUTS = {
+    "scan_gmail": ["job_emails"],
+    "search_api_jobs": ["api_jobs"],
+    "parse_jobs": ["parsed_jobs"],
+    "parse_resume": ["parsed_resume"],
+    "analyze_job_fit": ["parsed_jobs", "skill_gaps"],
+    "generate_resumes": ["generated_resumes"],
+    "audit_resumes": ["audited_resumes"],
+    "select_documents": ["selected_documents"],
+    "suggest_courses": ["course_suggestions"],
+    "generate_game_recommendations": ["game_recommendations"],
+    "award_activity_tokens": ["token_activities"],
+    "send_emails": ["sent_emails"],
+    "discord_notifications": ["discord_notifications"],
+}
+
+# (sources, target) pairs; a list of sources means "wait for all of them"
+PARALLEL_EDGES = [
+    (START, "scan_gmail"),
+    (START, "search_api_jobs"),
+    (START, "parse_resume"),
+    ("scan_gmail", "parse_jobs"),
+    (["parse_jobs", "search_api_jobs", "parse_resume"], "analyze_job_fit"),
+    ("parse_resume", "generate_game_recommendations"),
+    ("analyze_job_fit", "generate_resumes"),
+    ("analyze_job_fit", "select_documents"),
+    ("analyze_job_fit", "suggest_courses"),
+    ("generate_resumes", "audit_resumes"),
+    (["audit_resumes", "suggest_courses", "generate_game_recommendations"], "award_activity_tokens"),
+    (["audit_resumes", "select_documents"], "send_emails"),
+    (["award_activity_tokens", "send_emails"], "discord_notifications"),
+    ("discord_notifications", END),
+]
+
+def _replace(current, update):
+    return update
+
+# State for the parallel graph. parsed_jobs is rewritten by analyze_job_fit
+# (re-ordered with fit scores), so it replaces instead of accumulating.
+class ParallelAgentState(TypedDict):
+    messages: Annotated[List[BaseMessage], add_messages]
+    user_id: Annotated[str, _replace]
+    job_emails: Annotated[List[dict], operator.add]
+    api_jobs: Annotated[List[dict], operator.add]
+    parsed_jobs: Annotated[List[dict], _replace]
+    parsed_resume: Annotated[Dict, _replace]
+    generated_resumes: Annotated[List[dict], operator.add]
+    audited_resumes: Annotated[List[dict], operator.add]
+    selected_documents: Annotated[List[dict], operator.add]
+    sent_emails: Annotated[List[str], operator.add]
+    discord_notifications: Annotated[List[str], operator.add]
+    course_suggestions: Annotated[Dict[str, List[Dict]], _replace]
+    skill_gaps: Annotated[List[str], operator.add]
+    game_recommendations: Annotated[Dict[str, List[Dict]], _replace]
+    token_activities: Annotated[List[Dict], operator.add]
+    search_params: Annotated[Dict, _replace]
+
+def _partial_node(node, outputs):
+    """Wrap a full-state node so it only emits the keys it owns."""
+    # Work on a copy so concurrent branches never see each other's writes
+    if asyncio.iscoroutinefunction(node):
+        async def run(state):
+            result = await node(dict(state))
+            return {key: result[key] for key in outputs if key in result}
+    else:
+        def run(state):
+            result = node(dict(state))
+            return {key: result[key] for key in outputs if key in result}
+    run.__name__ = node.__name__
+    return run
+
+def build_parallel_workflow(nodes=None, include=None):
+    """Build the dependency-aware workflow graph.
+
+    Args:
+        nodes: Optional mapping of node name to callable, overriding the
+            default node implementations.
+        include: Optional subset of node names to build the graph from.
+            Edges from excluded nodes are dropped; a node left without
+            predecessors starts from START.
+    """
+    nodes = {**{name: globals()[name] for name in NODE_OUTPUTS}, **(nodes or {})}
+    included = set(NODE_OUTPUTS if include is None else include)
+    graph = StateGraph(ParallelAgentState)
+    for name, outputs in NODE_OUTPUTS.items():
+        if name in included:
+            graph.add_node(name, _partial_node(nodes[name], outputs))
+    for source, target in PARALLEL_EDGES:
+        if target != END and target not in included:
+            continue
+        sources = [name for name in (source if isinstance(source, list) else [source])
+                   if name == START or name in included]
+        if not sources:
+            sources = [START]
+        graph.add_edge(sources if len(sources) > 1 else sources[0], target)
+    return graph
+
+parallel_workflow = build_parallel_workflow()
+parallel_app = parallel_workflow.compile()
+
+# Async-first workflow, run with `await async_app.ainvoke(state)`.
+# Nodes without an async implementation are run in LangGraph's thread pool.
+ASYNC_NODES = {
+    "scan_gmail": scan_gmail_async,
+    "search_api_jobs": search_api_jobs_async,
+    "analyze_job_fit": analyze_job_fit_async,
+    "generate_resumes": generate_resumes_async,
+    "suggest_courses": suggest_courses_async,
+}
+async_workflow = build_parallel_workflow(ASYNC_NODES)
+async_app = async_workflow.compile()
+
+# Job search run started through the core orchestrator API: no Gmail scan,
+# document selection or outgoing email, which need the user's mailbox and
+# must not be triggered by an API call. The caller is waiting, so the search
+# goes straight to the local job APIs instead of queueing on Colab.
+API_WORKFLOW_NODES = [
+    "search_api_jobs", "parse_resume", "analyze_job_fit", "generate_resumes", "audit_resumes",
+    "suggest_courses", "generate_game_recommendations", "award_activity_tokens", "discord_notifications",
+]
+async_api_app = build_parallel_workflow({**ASYNC_NODES, "search_api_jobs": search_local_api_jobs_async},
+                                        include=API_WORKFLOW_NODES).compile()
+
 if __name__ == "__main__":
     # Test the agent workflow
     initial_state = AgentState(
@@ -545,5 +811,6 @@ if __name__ == "__main__":
         game_recommendations={},
         token_activities=[]
     )
-    result = app.invoke(initial_state)
+    runner = parallel_app if os.getenv('WORKFLOW_MODE', 'sequential') == 'parallel' else app
+    result = runner.invoke(initial_state)
     print("Workflow completed:", result)
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""
+Resume Parser Throughput Benchmark
+
+Generates a reproducible corpus of synthetic resumes and measures
+resume_parser.parse_resume_text throughput (resumes/s and MB/s). A second
+run grows a single resume's experience section to check that parse time
+scales linearly with text length.
+
+Usage:
+    python -m compliance_monitoring_testing.benchmark_resume_parser --resumes 2000
+"""
+
+import argparse
+import logging
+import random
+import time
+from typing import Dict, List
+
+from resume_doc_processing import resume_parser
+
+# Parser logs one line per resume; keep benchmark output readable
+logging.getLogger(resume_parser.__name__).setLevel(logging.WARNING)
+
+FIRST_NAMES = ["Thandi", "Ronald", "Aisha", "Pieter", "Lerato", "Sipho", "Maria", "Johan"]
+LAST_NAMES = ["Williams", "Nkosi", "van der Merwe", "Dlamini", "Smith", "Botha", "Naidoo"]
+CITIES = ["Cape Town, WC", "Durban, KZ", "Austin, TX", "New York, NY"]
+SKILLS = ["Python", "SQL", "Docker", "Kubernetes", "React", "Data Analysis", "Machine Learning",
+          "Project Management", "Communication", "AWS", "Excel", "Power BI"]
+TITLES = ["Software Engineer", "Data Analyst", "Process Engineer", "Project Coordinator", "Intern"]
+COMPANIES = ["Acme Corp", "Table Mountain Labs", "ABC Manufacturing", "Karoo Analytics"]
+SUMMARY_HEADINGS = ["Summary", "Professional Summary", "PROFILE", "Objective"]
+SKILLS_HEADINGS = ["Skills", "Technical Skills", "CORE COMPETENCIES"]
+EXPERIENCE_HEADINGS = ["Experience", "Work Experience", "EMPLOYMENT HISTORY"]
+
+
+def synthetic_resume(rng: random.Random, experience_entries: int = 3) -> str:
+    """One plausible plain-text resume with randomized headings and content."""
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    lines = [
+        name,
+        f"{name.split()[0].lower()}@example.com",
+        f"({rng.randint(200, 999)}) {rng.randint(200, 999)}-{rng.randint(1000, 9999)}",
+        rng.choice(CITIES),
+        "",
+        rng.choice(SUMMARY_HEADINGS),
+        f"{rng.choice(TITLES)} with experience in {rng.choice(SKILLS).lower()} and {rng.choice(SKILLS).lower()}.",
+        "",
+    ]
+    skills = rng.sample(SKILLS, rng.randint(3, 8))
+    if rng.random() < 0.5:
+        lines += [f"{rng.choice(SKILLS_HEADINGS)}: {', '.join(skills)}", ""]
+    else:
+        lines += [rng.choice(SKILLS_HEADINGS)] + [f"- {skill}" for skill in skills] + [""]
+    lines.append(rng.choice(EXPERIENCE_HEADINGS))
+    for _ in range(experience_entries):
+        start = rng.randint(2010, 2022)
+        lines += [
+            rng.choice(TITLES),
+            f"{rng.choice(COMPANIES)}, {rng.choice(CITIES)}",
+            f"{start} - {start + rng.randint(1, 3)}",
+            " ".join(rng.choice(SKILLS) for _ in range(12)),
+            "",
+        ]
+    lines += [
+        "Education",
+        "Bachelor of Science in Engineering",
+        "State University",
+        "",
+        "Certifications",
+        "- Python Programming Certificate",
+        "- AWS Cloud Practitioner",
+    ]
+    return "\n".join(lines)
+
+def synthetic_corpus(count: int, seed: int = 42) -> List[str]:
+    rng = random.Random(seed)
+    return [synthetic_resume(rng, rng.randint(1, 6)) for _ in range(count)]
+
+def measure_throughput(corpus: List[str]) -> Dict:
+    """Parse every resume in the corpus once and report throughput."""
+    total_bytes = sum(len(text.encode('utf-8')) for text in corpus)
+    started = time.perf_counter()
+    for text in corpus:
+        resume_parser.parse_resume_text(text)
+    elapsed = time.perf_counter() - started
+    return {
+        "resumes": len(corpus),
+        "seconds": elapsed,
+        "resumes_per_second": len(corpus) / elapsed,
+        "mb_per_second": total_bytes / elapsed / 1e6,
+    }
+
+def measure_scaling(sizes: List[int], repeats: int = 20, seed: int = 7) -> List[Dict]:
+    """Parse time per KB for resumes with growing experience sections."""
+    results = []
+    for entries in sizes:
+        text = synthetic_resume(random.Random(seed), entries)
+        started = time.perf_counter()
+        for _ in range(repeats):
+            resume_parser.parse_resume_text(text)
+        elapsed = (time.perf_counter() - started) / repeats
+        kilobytes = len(text.encode('utf-8')) / 1024
+        results.append({"entries": entries, "kb": kilobytes, "ms": elapsed * 1000,
+                        "us_per_kb": elapsed * 1e6 / kilobytes})
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark resume_parser.parse_resume_text")
+    parser.add_argument("--resumes", type=int, default=1000, help="Synthetic corpus size")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.resumes, args.seed)
+    result = measure_throughput(corpus)
+    print(f"Parsed {result['resumes']} resumes in {result['seconds']:.2f}s: "
+          f"{result['resumes_per_second']:.0f} resumes/s, {result['mb_per_second']:.2f} MB/s")
+
+    print("\nScaling (experience entries -> size, time per resume, time per KB):")
+    for row in measure_scaling([1, 10, 100, 1000]):
+        print(f"  {row['entries']:>5} entries  {row['kb']:>8.1f} KB  {row['ms']:>8.2f} ms  {row['us_per_kb']:>7.1f} us/KB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import unittest
+import json
+import os
+import tempfile
+from unittest.mock import patch
+from agent_core import documents
+from agent_core import document_store
+from resume_doc_processing import llm_client
+
+SELECTION_REPLY = '{"selected_documents": [{"doc_id": "cert1", "relevance_score": 9, "reason": "Python certificate matches job requirements"}]}'
+
+def use_stub_llm(test, responder):
+    """Route LLM calls to an uncached stub backend for the rest of the test."""
+    llm_client.set_llm_client(llm_client.LLMClient(llm_client.StubBackend(responder), cache=None))
+    test.addCleanup(llm_client.set_llm_client, None)
+
+def use_temp_store(test):
+    """Point the documents module at a new store in a temporary directory."""
+    temp_dir = tempfile.TemporaryDirectory()
+    test.addCleanup(temp_dir.cleanup)
+    store = document_store.DocumentStore(os.path.join(temp_dir.name, 'documents.db'))
+    patcher = patch.object(documents, 'document_store', return_value=store)
+    patcher.start()
+    test.addCleanup(patcher.stop)
+    return store
+
+class TestDocumentSelection(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test fixtures for document selection."""
+        self.sample_job_details = {
+            "job_title": "Python Developer",
+            "skills": ["Python", "Django", "SQL"],
+            "description": "Looking for a Python developer with web development experience."
+        }
+
+        self.store = use_temp_store(self)
+        self.store.upsert('cert1', 'python_cert.pdf', 'uploads/python_cert.pdf', 'certificate',
+                          'Python Programming Certificate from Coursera', '1')
+        self.store.upsert('cert2', 'java_cert.pdf', 'uploads/java_cert.pdf', 'certificate',
+                          'Java Certificate from Oracle', '2')
+
+    def test_select_relevant_documents(self):
+        """Test document selection for job relevance."""
+        use_stub_llm(self, lambda prompt, params: SELECTION_REPLY)
+
+        result = documents.select_relevant_documents(self.sample_job_details)
+
+        self.assertTrue(len(result) > 0)
+        self.assertEqual(result[0]["doc_id"], "cert1")
+        self.assertEqual(self.store.get("cert1")["relevance_score"], 9)
+
+    def test_list_documents(self):
+        """Test listing documents."""
+        docs = documents.list_documents()
+
+        self.assertEqual(len(docs), 2)
+        self.assertEqual(docs[0]["type"], "certificate")
+
+    def test_documents_are_scoped_to_user(self):
+        """Test listing and selection only see the given user's documents."""
+        self.store.upsert('cert1', 'python_cert.pdf', '', 'certificate', 'Python Certificate', '3', user_id='u2')
+        prompts = []
+        use_stub_llm(self, lambda prompt, params: prompts.append(prompt) or SELECTION_REPLY)
+
+        self.assertEqual([doc['id'] for doc in documents.list_documents('u2')], ['cert1'])
+        documents.select_relevant_documents(self.sample_job_details, 'u2')
+
+        self.assertEqual(self.store.get('cert1', 'u2')['relevance_score'], 9)
+        self.assertNotIn('relevance_score', self.store.get('cert1'))
+        self.assertNotIn('cert2', prompts[0])
+
+    def test_users_without_documents_see_shared_ones(self):
+        """Test documents stored before per-user uploads stay visible until a user uploads their own."""
+        use_stub_llm(self, lambda prompt, params: SELECTION_REPLY)
+        self.assertEqual([doc['id'] for doc in documents.list_documents('u1')], ['cert1', 'cert2'])
+        self.assertEqual(documents.select_relevant_documents(self.sample_job_details, 'u1')[0]['doc_id'], 'cert1')
+        self.assertEqual(documents.get_document_path('cert1', 'u1'), 'uploads/python_cert.pdf')
+
+        self.store.upsert('id1', 'id.pdf', '', 'id', 'National ID', '3', user_id='u1')
+        self.assertEqual([doc['id'] for doc in documents.list_documents('u1')], ['id1'])
+
+    def test_upload_saves_under_user_folder(self):
+        """Test uploads from different users with the same filename both persist."""
+        upload_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(upload_dir.cleanup)
+
+        class Upload:
+            filename = 'cert.pdf'
+
+            def save(self, path):
+                with open(path, 'wb') as f:
+                    f.write(b'%PDF')
+
+        with patch.object(documents, 'UPLOAD_FOLDER', upload_dir.name), \
+                patch.object(documents, 'extract_pdf_text', return_value='First Aid'):
+            self.assertTrue(documents.upload_document(Upload(), 'certificate', 'u1')['success'])
+            self.assertTrue(documents.upload_document(Upload(), 'certificate', 'u2')['success'])
+
+        paths = {documents.get_document_path('certificate_cert', user) for user in ('u1', 'u2')}
+        self.assertEqual(paths, {os.path.join(upload_dir.name, user, 'cert.pdf') for user in ('u1', 'u2')})
+
+    def test_allowed_file(self):
+        """Test file extension validation."""
+        self.assertTrue(documents.allowed_file("test.pdf"))
+        self.assertFalse(documents.allowed_file("test.txt"))
+        self.assertFalse(documents.allowed_file("test.jpg"))
+
+class TestDocumentStore(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.store = document_store.DocumentStore(os.path.join(self.temp_dir.name, 'documents.db'))
+
+    def test_upsert_list_and_type_filter(self):
+        """Test documents are upserted per user and filtered by type."""
+        self.store.upsert('cert1', 'python.pdf', 'uploads/python.pdf', 'certificate', 'Python Programming', '1')
+        self.store.upsert('deg1', 'beng.pdf', 'uploads/beng.pdf', 'degree', 'BEng Process Engineering', '2')
+        self.store.upsert('cert1', 'python.pdf', 'uploads/python.pdf', 'certificate', 'Python Programming v2', '3')
+        self.store.upsert('cert1', 'other.pdf', 'uploads/other.pdf', 'certificate', 'Other user', '1', user_id='u2')
+
+        docs = self.store.list()
+        self.assertEqual([doc['id'] for doc in docs], ['deg1', 'cert1'])
+        self.assertEqual(docs[1]['content_preview'], 'Python Programming v2')
+        self.assertEqual([doc['id'] for doc in self.store.list(doc_type='degree')], ['deg1'])
+        self.assertEqual(self.store.get('cert1', 'u2')['filename'], 'other.pdf')
+
+    def test_candidates_ranked_by_term_overlap(self):
+        """Test candidate documents are ranked by shared terms and capped."""
+        for i in range(50):
+            self.store.upsert(f'misc{i}', f'misc{i}.pdf', '', 'certificate', f'Forklift operation course {i}', str(i))
+        self.store.upsert('py', 'py.pdf', '', 'certificate', 'Python and SQL data analysis', '100')
+        self.store.upsert('sql', 'sql.pdf', '', 'certificate', 'Advanced SQL', '101')
+
+        candidates = self.store.candidates(documents.job_terms(
+            {'job_title': 'Data Analyst', 'skills': ['Python', 'SQL']}), limit=5)
+        self.assertEqual([doc['id'] for doc in candidates][:2], ['py', 'sql'])
+        self.assertEqual(len(candidates), 5)
+
+    def test_concurrent_uploads_are_not_lost(self):
+        """Test concurrent upserts from many threads all persist."""
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda i: self.store.upsert(f'doc{i}', f'doc{i}.pdf', '', 'certificate', 'text'),
+                          range(40)))
+        self.assertEqual(self.store.count(), 40)
+
+    def test_selection_sends_candidates_and_stores_relevance(self):
+        """Test selection prompts with top candidates only and records relevance."""
+        self.store.upsert('cert1', 'python_cert.pdf', '', 'certificate', 'Python Programming Certificate', '1')
+        self.store.upsert('cert2', 'java_cert.pdf', '', 'certificate', 'Java Certificate from Oracle', '2')
+        prompts = []
+        use_stub_llm(self, lambda prompt, params: prompts.append(prompt) or SELECTION_REPLY)
+
+        with patch.object(documents, 'document_store', return_value=self.store):
+            result = documents.select_relevant_documents({'job_title': 'Python Developer', 'skills': ['Python']},
+                                                         max_candidates=1)
+
+        self.assertEqual(result[0]['doc_id'], 'cert1')
+        self.assertIn('cert1', prompts[0])
+        self.assertNotIn('cert2', prompts[0])
+        self.assertEqual(self.store.get('cert1')['relevance_score'], 9)
+
+    def test_imports_legacy_json(self):
+        """Test a new store imports the old documents.json once."""
+        legacy = os.path.join(self.temp_dir.name, 'documents.json')
+        with open(legacy, 'w') as f:
+            json.dump({'cert1': {'id': 'cert1', 'filename': 'a.pdf', 'path': 'uploads/a.pdf', 'type': 'certificate',
+                                 'content_preview': 'First Aid', 'uploaded_at': '1', 'relevance_score': 7,
+                                 'relevance_reason': 'ok'}}, f)
+        store = document_store.get_document_store(os.path.join(self.temp_dir.name, 'legacy.db'), legacy)
+        self.assertEqual(store.get('cert1')['relevance_score'], 7)
+        self.assertEqual([doc['id'] for doc in store.candidates({'aid'}, 5)], ['cert1'])
+
+    def test_imports_legacy_json_for_user(self):
+        """Test legacy documents can be imported for a given user."""
+        legacy = os.path.join(self.temp_dir.name, 'documents.json')
+        with open(legacy, 'w') as f:
+            json.dump({'cert1': {'filename': 'a.pdf', 'type': 'certificate', 'content_preview': 'First Aid'}}, f)
+        store = document_store.get_document_store(os.path.join(self.temp_dir.name, 'legacy_user.db'), legacy, 'u1')
+        self.assertEqual([doc['id'] for doc in store.list('u1')], ['cert1'])
+        self.assertEqual(store.count(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
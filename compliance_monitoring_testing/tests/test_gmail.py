@@ -4,6 +4,8 @@ import os
 import sys
 import tempfile
 import shutil
+import sqlite3
+from datetime import datetime, timedelta
 
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -22,14 +24,35 @@ class TestGmailTool(unittest.TestCase):
     def tearDown(self):
         shutil.rmtree(self.temp_dir)
 
-    @patch('gmail_tool.sqlite3.connect')
-    def test_init_db(self, mock_connect):
-        mock_conn = MagicMock()
-        mock_connect.return_value = mock_conn
+    def test_init_db(self):
         gmail_tool.init_db()
-        mock_conn.cursor().execute.assert_called()
-        mock_conn.commit.assert_called()
-        mock_conn.close.assert_called()
+        conn = sqlite3.connect(self.temp_db)
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        journal_mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+        conn.close()
+        self.assertTrue({'users', 'seen_messages'} <= tables)
+        self.assertEqual(journal_mode, 'wal')
+
+    def test_bulk_store_and_get_tokens(self):
+        gmail_tool.store_tokens({'u1': 't1', 'u2': 't2'})
+        gmail_tool.store_history_id('u1', '42')
+        gmail_tool.store_tokens({'u1': 't1-new'})
+        self.assertEqual(gmail_tool.get_tokens(['u1', 'u2', 'u3']), {'u1': 't1-new', 'u2': 't2'})
+        # Replacing a token keeps the Gmail sync checkpoint
+        self.assertEqual(gmail_tool.get_history_id('u1'), '42')
+
+    def test_concurrent_token_access(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        def worker(i):
+            gmail_tool.store_token(f'user{i % 10}', f'token{i}')
+            gmail_tool.mark_seen(f'user{i % 10}', [f'm{i}'])
+            return gmail_tool.get_token(f'user{i % 10}')
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(worker, range(200)))
+        self.assertTrue(all(result and result.startswith('token') for result in results))
+        self.assertEqual(len(gmail_tool.get_tokens([f'user{i}' for i in range(10)])), 10)
 
     def test_store_and_get_token(self):
         user_id = 'test_user'
@@ -90,7 +113,191 @@ class TestGmailTool(unittest.TestCase):
         mock_creds = MagicMock()
         result = gmail_tool.scan_emails(mock_creds)
         self.assertEqual(result, [])
-        mock_build.assert_called_with('gmail', 'v1', credentials=mock_creds)
+        self.assertEqual(mock_build.call_args.args, ('gmail', 'v1'))
+        self.assertTrue(mock_build.call_args.kwargs['static_discovery'])
+
+class FakeBatch:
+    """Gmail batch request stand-in that answers from a callable."""
+
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id=None):
+        self.requests.append(request_id)
+
+    def execute(self):
+        self.service.batch_sizes.append(len(self.requests))
+        for request_id in self.requests:
+            response, exception = self.service.respond(request_id)
+            self.callback(request_id, response, exception)
+
+
+class FakeGmailMixin:
+    """Builds MagicMock Gmail services backed by FakeBatch."""
+
+    def make_service(self, message_ids, respond):
+        service = MagicMock()
+        service.batch_sizes = []
+        service.respond = respond
+        service.new_batch_http_request.side_effect = lambda callback: FakeBatch(service, callback)
+        service.users().messages().list().execute.return_value = {
+            'messages': [{'id': message_id} for message_id in message_ids]
+        }
+        return service
+
+    @staticmethod
+    def message(message_id, subject='Hiring: Python Developer'):
+        return {
+            'id': message_id,
+            'snippet': 'We are hiring',
+            'payload': {
+                'mimeType': 'text/plain',
+                'headers': [{'name': 'Subject', 'value': subject}, {'name': 'From', 'value': 'hr@example.com'}],
+                'body': {'data': 'job body'}
+            }
+        }
+
+
+class TestBatchScanning(FakeGmailMixin, unittest.TestCase):
+
+    def test_fetches_up_to_100_messages_per_batch(self):
+        ids = [f'm{i}' for i in range(250)]
+        service = self.make_service(ids, lambda message_id: (self.message(message_id), None))
+        with patch.object(gmail_tool, 'build', return_value=service):
+            emails = gmail_tool.scan_emails(MagicMock(), max_results=250)
+        self.assertEqual(service.batch_sizes, [100, 100, 50])
+        self.assertEqual([email['id'] for email in emails], ids)
+        self.assertEqual(emails[0]['body'], 'job body')
+        # One full fetch per message, no separate metadata request
+        service.users().messages().get.assert_called_with(userId='me', id='m249', format='full')
+
+    def test_backs_off_and_retries_rate_limited_messages(self):
+        from googleapiclient.errors import HttpError
+        throttled_once = set()
+
+        def respond(message_id):
+            if message_id not in throttled_once and int(message_id[1:]) % 2:
+                throttled_once.add(message_id)
+                return None, HttpError(MagicMock(status=429), b'Too Many Requests')
+            return self.message(message_id), None
+
+        ids = [f'm{i}' for i in range(40)]
+        service = self.make_service(ids, respond)
+        with patch.object(gmail_tool.time, 'sleep') as mock_sleep:
+            fetched = gmail_tool.fetch_messages(service, ids, batch_size=40)
+        self.assertEqual(set(fetched), set(ids))
+        mock_sleep.assert_called_once()
+        self.assertEqual(service.batch_sizes[:2], [40, 20])
+
+    def test_backoff_never_sleeps_past_the_deadline(self):
+        from googleapiclient.errors import HttpError
+        clock = {'now': 100.0}
+        ids = [f'm{i}' for i in range(10)]
+        service = self.make_service(
+            ids, lambda message_id: (None, HttpError(MagicMock(status=429), b'Too Many Requests')))
+
+        def sleep(delay):
+            clock['now'] += delay
+
+        with patch.object(gmail_tool.time, 'monotonic', side_effect=lambda: clock['now']), \
+                patch.object(gmail_tool.time, 'sleep', side_effect=sleep):
+            fetched = gmail_tool.fetch_messages(service, ids, batch_size=10, deadline=100.0 + 1.5)
+        self.assertEqual(fetched, {})
+        self.assertLessEqual(clock['now'], 101.5)
+
+class TestIncrementalSync(FakeGmailMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        gmail_tool.DB_PATH = os.path.join(self.temp_dir, 'test_users.db')
+        gmail_tool.init_db()
+        gmail_tool.store_token('user1', 'refresh_token')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_only_new_messages_are_fetched(self):
+        service = self.make_service(['m1', 'm2'], lambda message_id: (self.message(message_id), None))
+        service.users().getProfile().execute.return_value = {'historyId': '100'}
+        history = service.users().history().list().execute
+
+        with patch.object(gmail_tool, 'build', return_value=service), \
+             patch.object(gmail_tool, 'GMAIL_SYNC_MODE', 'incremental'):
+            first = gmail_tool.scan_emails(MagicMock(), user_id='user1')
+            self.assertEqual([email['id'] for email in first], ['m1', 'm2'])
+            self.assertEqual(gmail_tool.get_history_id('user1'), '100')
+            history.assert_not_called()
+
+            # m2 shows up again in history but was already processed
+            history.return_value = {'historyId': '105', 'history': [
+                {'messagesAdded': [{'message': {'id': 'm3'}}, {'message': {'id': 'm2'}}]}
+            ]}
+            second = gmail_tool.scan_emails(MagicMock(), user_id='user1')
+            self.assertEqual([email['id'] for email in second], ['m3'])
+            self.assertEqual(gmail_tool.get_history_id('user1'), '105')
+
+            # Steady state: one history call, nothing fetched
+            history.return_value = {'historyId': '105'}
+            batches = len(service.batch_sizes)
+            self.assertEqual(gmail_tool.scan_emails(MagicMock(), user_id='user1'), [])
+            self.assertEqual(len(service.batch_sizes), batches)
+
+class TestCredentialCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        gmail_tool.DB_PATH = os.path.join(self.temp_dir, 'test_users.db')
+        gmail_tool.init_db()
+        gmail_tool._sessions.clear()
+        gmail_tool.store_token('user1', 'refresh_token')
+        self.refreshes = 0
+
+    def tearDown(self):
+        gmail_tool._sessions.clear()
+        shutil.rmtree(self.temp_dir)
+
+    def fake_refresh(self, creds, expires_in):
+        def refresh(request):
+            self.refreshes += 1
+            creds.token = f'access{self.refreshes}'
+            creds.expiry = datetime.utcnow() + timedelta(seconds=expires_in)
+        return refresh
+
+    def test_credentials_cached_and_refreshed_before_expiry(self):
+        with patch('builtins.open', side_effect=FileNotFoundError):
+            creds = gmail_tool._load_credentials('user1')
+        with patch.object(gmail_tool, '_load_credentials', return_value=creds), \
+             patch.object(creds, 'refresh', side_effect=self.fake_refresh(creds, 3600)):
+            self.assertIs(gmail_tool.get_credentials('user1'), creds)
+            self.assertIs(gmail_tool.get_credentials('user1'), creds)
+            self.assertEqual(self.refreshes, 1)
+
+            # Inside the refresh margin the token is renewed proactively
+            creds.expiry = datetime.utcnow() + timedelta(seconds=60)
+            gmail_tool.get_credentials('user1')
+            self.assertEqual(self.refreshes, 2)
+            self.assertEqual(creds.token, 'access2')
+
+    def test_service_built_once_per_user(self):
+        creds = MagicMock()
+        with patch.object(gmail_tool, 'build') as mock_build:
+            first = gmail_tool.get_gmail_service(creds, 'user1')
+            second = gmail_tool.get_gmail_service(creds, 'user1')
+        self.assertIs(first, second)
+        mock_build.assert_called_once()
+
+    def test_lru_eviction_and_token_change(self):
+        cache = gmail_tool.SessionCache(max_size=2)
+        for user_id in ['a', 'b', 'c']:
+            cache.put(user_id, gmail_tool._UserSession(MagicMock()))
+        self.assertIsNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('c'))
+
+        gmail_tool._sessions.put('user1', gmail_tool._UserSession(MagicMock()))
+        gmail_tool.store_token('user1', 'new_refresh_token')
+        self.assertIsNone(gmail_tool._sessions.get('user1'))
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
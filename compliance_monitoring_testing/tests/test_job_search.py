@@ -0,0 +1,306 @@
+import unittest
+import asyncio
+from datetime import datetime
+from unittest.mock import patch, AsyncMock, MagicMock
+import os
+import sys
+import tempfile
+import shutil
+
+import httpx
+import mongomock
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from job_discovery_matching import job_search
+from job_discovery_matching import search_cache
+from job_discovery_matching import rate_limiter
+from job_discovery_matching import http_client
+
+
+class TestSearchCache(unittest.TestCase):
+
+    def test_cache_key_normalization(self):
+        """Test that equivalent searches share a cache key."""
+        key1 = search_cache.make_cache_key({'keywords': 'Python  Developer', 'location': 'Cape Town '})
+        key2 = search_cache.make_cache_key({'keywords': 'python developer', 'location': 'cape town', 'max_age_days': 30})
+        key3 = search_cache.make_cache_key({'keywords': 'python developer', 'location': 'cape town', 'salary_min': 1000})
+        self.assertEqual(key1, key2)
+        self.assertNotEqual(key1, key3)
+
+    def test_memory_cache_lru_and_byte_budget(self):
+        """Test LRU eviction when the byte budget is exceeded."""
+        cache = search_cache.InMemorySearchCache(ttl_seconds=60, max_entries=10, max_bytes=120)
+        cache.set('a', [{'title': 'a' * 30}])
+        cache.set('b', [{'title': 'b' * 30}])
+        cache.get('a')
+        cache.set('c', [{'title': 'c' * 30}])
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+
+    def test_memory_cache_ttl(self):
+        """Test that expired entries are not served."""
+        cache = search_cache.InMemorySearchCache(ttl_seconds=0)
+        cache.set('a', [{'title': 'Developer'}])
+        self.assertIsNone(cache.get('a'))
+
+    def test_mongo_cache_round_trip(self):
+        """Test the MongoDB backend against the job_searches collection."""
+        collection = mongomock.MongoClient().db.job_searches
+        cache = search_cache.MongoSearchCache(collection=collection, max_entries=1)
+        cache.set('a', [{'title': 'Developer'}], {'keywords': 'dev'})
+        self.assertEqual(cache.get('a'), [{'title': 'Developer'}])
+        cache.set('b', [{'title': 'Engineer'}])
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(collection.count_documents({}), 1)
+
+    def test_mongo_cache_aggregates_only_over_budget(self):
+        """Test writes within budget use the running totals instead of aggregating the collection."""
+        collection = mongomock.MongoClient().db.job_searches
+        cache = search_cache.MongoSearchCache(collection=collection, max_entries=3, totals_refresh_seconds=3600)
+        with patch.object(collection, 'aggregate', wraps=collection.aggregate) as aggregate:
+            for key in ('a', 'b', 'a', 'c'):
+                cache.set(key, [{'title': key}])
+            self.assertEqual(aggregate.call_count, 1)
+            cache.set('d', [{'title': 'd'}])
+            self.assertEqual(aggregate.call_count, 2)
+        self.assertEqual(collection.count_documents({}), 3)
+        self.assertIsNotNone(cache.get('d'))
+
+    def test_search_jobs_served_from_cache(self):
+        """Test that a repeated search does not call the APIs again."""
+        search_cache.set_search_cache(search_cache.InMemorySearchCache())
+        self.addCleanup(search_cache.set_search_cache, None)
+        api = AsyncMock(return_value=[{'title': 'Python Developer', 'company': 'Tech Corp'}])
+        with patch.multiple(job_search, search_adzuna=api, search_careerjet=api, search_upwork=api,
+                            search_serapi_google=api, search_rapidapi_jobs=api):
+            first = asyncio.run(job_search.search_jobs_async({'keywords': 'python'}))
+            second = asyncio.run(job_search.search_jobs_async({'keywords': 'Python'}))
+        self.assertEqual(first, second)
+        self.assertEqual(api.await_count, 5)
+
+    def test_partial_results_are_cached_briefly(self):
+        """Test results missing a rate-limited provider get the partial TTL, full results the default."""
+        cache = search_cache.InMemorySearchCache()
+        search_cache.set_search_cache(cache)
+        self.addCleanup(search_cache.set_search_cache, None)
+        api = AsyncMock(return_value=[{'title': 'Python Developer', 'company': 'Tech Corp'}])
+
+        async def skipped_adzuna(*args):
+            rate_limiter.record_skip('adzuna')
+            return []
+
+        with patch.object(cache, 'aset', wraps=cache.aset) as mock_aset, \
+                patch.multiple(job_search, search_careerjet=api, search_upwork=api,
+                               search_serapi_google=api, search_rapidapi_jobs=api):
+            with patch.object(job_search, 'search_adzuna', skipped_adzuna):
+                asyncio.run(job_search.search_jobs_async({'keywords': 'python'}))
+            with patch.object(job_search, 'search_adzuna', api):
+                asyncio.run(job_search.search_jobs_async({'keywords': 'python'}, use_cache=False))
+        self.assertEqual(mock_aset.call_args_list[0].args[3], search_cache.PARTIAL_CACHE_TTL_SECONDS)
+        self.assertIsNone(mock_aset.call_args_list[1].args[3])
+
+    def test_search_restores_priority_and_skips(self):
+        """Test the caller's context keeps its own priority and skip set after a search."""
+        search_cache.set_search_cache(search_cache.InMemorySearchCache())
+        self.addCleanup(search_cache.set_search_cache, None)
+        api = AsyncMock(return_value=[])
+
+        async def search():
+            await job_search.search_jobs_async({'keywords': 'python', 'priority': 0.2})
+            return rate_limiter.current_priority.get(), rate_limiter.current_skips.get()
+
+        with patch.multiple(job_search, search_adzuna=api, search_careerjet=api, search_upwork=api,
+                            search_serapi_google=api, search_rapidapi_jobs=api):
+            self.assertEqual(asyncio.run(search()), (rate_limiter.DEFAULT_PRIORITY, None))
+
+    def test_memory_cache_entry_ttl_override(self):
+        """Test a per-entry TTL overrides the cache default."""
+        cache = search_cache.InMemorySearchCache(ttl_seconds=60)
+        cache.set('a', [{'title': 'Developer'}], ttl_seconds=0)
+        cache.set('b', [{'title': 'Engineer'}])
+        self.assertIsNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('b'))
+
+
+class TestRemoveDuplicates(unittest.TestCase):
+
+    def setUp(self):
+        self.description = ("We are looking for a Python developer to build data pipelines on AWS, "
+                            "work with Docker and Kubernetes, and collaborate in an agile team.")
+
+    def test_exact_duplicates_removed(self):
+        """Test that exact title/company matches are still merged."""
+        jobs = [
+            {'title': 'Python Developer', 'company': 'Tech Corp', 'source': 'Adzuna'},
+            {'title': 'python developer', 'company': 'TECH CORP', 'source': 'Careerjet'}
+        ]
+        unique_jobs = job_search.remove_duplicates(jobs)
+        self.assertEqual(len(unique_jobs), 1)
+        self.assertEqual(unique_jobs[0]['sources'], ['Adzuna', 'Careerjet'])
+
+    def test_near_duplicate_repost_merged(self):
+        """Test that reposts with slightly different titles are merged with provenance."""
+        jobs = [
+            {'title': 'Senior Python Developer', 'company': 'Tech Corp', 'description': self.description,
+             'source': 'Adzuna', 'url': 'https://adzuna.example/1'},
+            {'title': 'Senior Python Developer (Remote)', 'company': 'Tech Corp', 'description': self.description + ' Apply now.',
+             'source': 'RapidAPI', 'url': 'https://rapidapi.example/1'},
+            {'title': 'Registered Nurse', 'company': 'City Hospital', 'description': 'Provide patient care in the ICU.',
+             'source': 'Adzuna'}
+        ]
+        unique_jobs = job_search.remove_duplicates(jobs)
+        self.assertEqual([job['title'] for job in unique_jobs], ['Senior Python Developer', 'Registered Nurse'])
+        self.assertEqual([entry['url'] for entry in unique_jobs[0]['merged_from']],
+                         ['https://adzuna.example/1', 'https://rapidapi.example/1'])
+
+    def test_threshold_is_configurable(self):
+        """Test that a strict threshold keeps similar but different postings."""
+        jobs = [
+            {'title': 'Python Developer', 'company': 'Tech Corp', 'description': self.description},
+            {'title': 'Python Developer II', 'company': 'Tech Corp', 'description': self.description + ' Relocation offered.'}
+        ]
+        self.assertEqual(len(job_search.remove_duplicates(jobs, threshold=0.8)), 1)
+        self.assertEqual(len(job_search.remove_duplicates(jobs, threshold=0.99)), 2)
+
+
+class TestExtractKeywords(unittest.TestCase):
+
+    def test_single_and_multi_word_skills(self):
+        """Test that multi-word skills are found alongside single words, in order."""
+        text = "Python engineer with Machine Learning and data science experience, Docker a plus."
+        self.assertEqual(job_search.extract_keywords(text),
+                         ['python', 'machine learning', 'data science', 'docker'])
+
+    def test_synonyms_map_to_canonical_skill(self):
+        """Test that synonyms are reported under their canonical skill once."""
+        text = "Node.js/JS developer; K8s, Amazon Web Services and AWS Lambda."
+        self.assertEqual(job_search.extract_keywords(text), ['node', 'javascript', 'kubernetes', 'aws'])
+
+    def test_word_boundaries(self):
+        """Test that skills inside longer words are not matched."""
+        self.assertEqual(job_search.extract_keywords("JavaScript, maintained by our AIrline team"), ['javascript'])
+        self.assertEqual(job_search.extract_keywords(""), [])
+
+    def test_everyday_words_are_not_skills(self):
+        """Test that ordinary words only match as part of a skill phrase."""
+        text = "Take a rest after 5 ml of coffee; the rest of the team builds RESTful services."
+        self.assertEqual(job_search.extract_keywords(text), ['rest api'])
+        self.assertEqual(job_search.extract_keywords("Design REST APIs for ML pipelines"), ['rest api'])
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.accountant = rate_limiter.QuotaAccountant(os.path.join(self.temp_dir, 'usage.db'))
+        self.now = datetime(2025, 9, 21, 12, 0)  # 10 days left in September
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_token_bucket_burst(self):
+        """Test that the bucket allows a burst and then asks callers to wait."""
+        bucket = rate_limiter.TokenBucket(rate=1.0, burst=2)
+        self.assertEqual(bucket.try_acquire(), 0.0)
+        self.assertEqual(bucket.try_acquire(), 0.0)
+        self.assertGreater(bucket.try_acquire(), 0.0)
+
+    def test_quota_paced_over_remaining_days(self):
+        """Test that the monthly budget is spread evenly and favours high priority."""
+        with patch.dict(rate_limiter.PROVIDER_LIMITS['serpapi'], {'monthly_quota': 100}):
+            self.accountant.record('serpapi', 80, now=datetime(2025, 9, 5))
+            self.assertAlmostEqual(self.accountant.daily_allowance('serpapi', self.now), 2.0)
+
+            self.assertTrue(self.accountant.reserve('serpapi', priority=0.0, now=self.now))
+            self.assertFalse(self.accountant.reserve('serpapi', priority=0.0, now=self.now))
+            self.assertTrue(self.accountant.reserve('serpapi', priority=1.0, now=self.now))
+            self.assertFalse(self.accountant.reserve('serpapi', priority=1.0, now=self.now))
+
+    def test_monthly_quota_exhausted(self):
+        """Test that no calls are admitted once the monthly quota is used."""
+        with patch.dict(rate_limiter.PROVIDER_LIMITS['adzuna'], {'monthly_quota': 10}):
+            self.accountant.record('adzuna', 10, now=self.now)
+            self.assertFalse(self.accountant.admit('adzuna', priority=1.0, now=self.now))
+
+    def test_search_priority_reaches_quota_check(self):
+        """Test searches default to full priority and workflow searches pass their own."""
+        limiter = rate_limiter.RateLimiter(self.accountant)
+        rate_limiter.set_rate_limiter(limiter)
+        self.addCleanup(rate_limiter.set_rate_limiter, None)
+        priorities = []
+
+        async def search_adzuna(*args):
+            await rate_limiter.acquire('adzuna')
+            return []
+
+        async def record(provider, priority=rate_limiter.DEFAULT_PRIORITY):
+            priorities.append(priority)
+            return False
+
+        with patch.object(limiter, 'acquire', side_effect=record), \
+             patch.object(job_search, 'search_adzuna', search_adzuna), \
+             patch.object(search_cache, 'get_search_cache', return_value=search_cache.SearchCache()):
+            for params in ({'keywords': 'python'}, {'keywords': 'python', 'priority': rate_limiter.BACKGROUND_PRIORITY}):
+                asyncio.run(job_search.search_jobs_async(params))
+        self.assertEqual(priorities[0], 1.0)
+        self.assertEqual(priorities[-1], rate_limiter.BACKGROUND_PRIORITY)
+
+    def test_429_pauses_provider(self):
+        """Test that a 429 response blocks the provider's bucket."""
+        limiter = rate_limiter.RateLimiter(self.accountant)
+        response = MagicMock(status_code=429, headers={'Retry-After': '30'})
+        response.request.url = 'https://serpapi.com/search.json?q=python'
+        asyncio.run(limiter.on_response(response))
+        self.assertGreater(limiter.buckets['serpapi'].try_acquire(), 25)
+
+class TestPooledClient(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = http_client.PooledClientManager()
+        self.clients = []
+        real_client = httpx.AsyncClient
+
+        def mock_client(**kwargs):
+            client = real_client(transport=httpx.MockTransport(lambda request: httpx.Response(200)), **kwargs)
+            self.clients.append(client)
+            return client
+
+        patcher = patch.object(http_client.httpx, 'AsyncClient', side_effect=mock_client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_requests_in_one_loop_share_a_client(self):
+        """Test concurrent requests in one event loop reuse a single pooled client."""
+        async def search():
+            responses = await asyncio.gather(*[self.manager.get(f'https://api.example.com/{i}') for i in range(5)])
+            return [response.status_code for response in responses], self.manager.get_client()
+
+        statuses, client = asyncio.run(search())
+        self.assertEqual(statuses, [200] * 5)
+        self.assertEqual(self.clients, [client])
+
+    def test_client_closed_when_loop_shuts_down(self):
+        """Test each asyncio.run() closes its pool's client and the next run opens a new one."""
+        first = asyncio.run(self.manager.get('https://api.example.com/'))
+        second = asyncio.run(self.manager.get('https://api.example.com/'))
+        self.assertEqual((first.status_code, second.status_code), (200, 200))
+        self.assertEqual(len(self.clients), 2)
+        self.assertTrue(all(client.is_closed for client in self.clients))
+
+    def test_shutdown_closes_the_loop_pool(self):
+        """Test the service shutdown hook closes the pool and a later request reopens one."""
+        async def service():
+            await self.manager.startup()
+            await self.manager.shutdown()
+            closed = self.clients[0].is_closed
+            await self.manager.get('https://api.example.com/')
+            return closed
+
+        self.assertTrue(asyncio.run(service()))
+        self.assertEqual(len(self.clients), 2)
+
+if __name__ == '__main__':
+    unittest.main()
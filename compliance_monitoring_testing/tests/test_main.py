@@ -1,12 +1,17 @@
 import unittest
-from unittest.mock import patch
+from unittest.mock import patch, AsyncMock
+import asyncio
+import json
 import os
 import sys
+import threading
 
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
-from agent_core.main import app, AgentState
+from agent_core.main import app, AgentState, parallel_app, async_app, async_api_app, API_WORKFLOW_NODES, NODE_OUTPUTS, get_search_params
+from agent_core.main import search_local_api_jobs_async, colab_integration, job_search, build_parallel_workflow
+from external_services_deployment.colab_integration import ColabIntegration
 
 class TestMain(unittest.TestCase):
 
@@ -34,5 +39,128 @@ class TestMain(unittest.TestCase):
         self.assertIn('user_id', result)
         self.assertEqual(result['user_id'], "test_user")
 
+    def test_parallel_workflow_dependencies(self):
+        """Test that independent branches of the parallel workflow start together."""
+        graph = parallel_app.get_graph()
+        start_targets = {edge.target for edge in graph.edges if edge.source == '__start__'}
+        self.assertEqual(start_targets, {'scan_gmail', 'search_api_jobs', 'parse_resume'})
+
+        fit_sources = {edge.source for edge in graph.edges if edge.target == 'analyze_job_fit'}
+        self.assertEqual(fit_sources, {'parse_jobs', 'search_api_jobs', 'parse_resume'})
+
+        self.assertEqual(set(NODE_OUTPUTS), set(graph.nodes) - {'__start__', '__end__'})
+
+    def test_parallel_workflow_matches_sequential_order(self):
+        """Test that the parallel graph merges stub node outputs into the sequential pipeline's state."""
+        stub_outputs = {
+            'scan_gmail': lambda s: {'job_emails': [{'id': 'e1'}, {'id': 'e2'}]},
+            'search_api_jobs': lambda s: {'api_jobs': [{'id': 'a1'}]},
+            'parse_jobs': lambda s: {'parsed_jobs': [{'id': e['id']} for e in s['job_emails']]},
+            'parse_resume': lambda s: {'parsed_resume': {'skills': ['python']}},
+            'analyze_job_fit': lambda s: {
+                'parsed_jobs': [dict(job, fit=len(job['id']) + len(s['parsed_resume']['skills']))
+                                for job in s['parsed_jobs'] + s['api_jobs']],
+                'skill_gaps': ['sql']},
+            'generate_resumes': lambda s: {'generated_resumes': [{'job': job['id']} for job in s['parsed_jobs']]},
+            'audit_resumes': lambda s: {'audited_resumes': [dict(r, passed=True) for r in s['generated_resumes']]},
+            'select_documents': lambda s: {'selected_documents': [{'job': job['id']} for job in s['parsed_jobs']]},
+            'suggest_courses': lambda s: {'course_suggestions': {gap: [{'title': gap}] for gap in s['skill_gaps']}},
+            'generate_game_recommendations': lambda s: {'game_recommendations': {'skills': s['parsed_resume']['skills']}},
+            'award_activity_tokens': lambda s: {'token_activities': [{
+                'audited': len(s['audited_resumes']), 'courses': len(s['course_suggestions']),
+                'games': len(s['game_recommendations'])}]},
+            'send_emails': lambda s: {'sent_emails': [f"{r['job']}:{len(s['selected_documents'])}"
+                                                      for r in s['audited_resumes']]},
+            'discord_notifications': lambda s: {'discord_notifications': [
+                f"{len(s['sent_emails'])} sent, {len(s['token_activities'])} awarded"]},
+        }
+
+        def stub(name):
+            # Like the real nodes: update the state in place and return all of it
+            def node(state):
+                state.update(stub_outputs[name](state))
+                return state
+            node.__name__ = name
+            return node
+
+        stubs = {name: stub(name) for name in NODE_OUTPUTS}
+        initial_state = {'messages': [], 'user_id': 'test_user', 'job_emails': [], 'api_jobs': [], 'parsed_jobs': [],
+                         'parsed_resume': {}, 'generated_resumes': [], 'audited_resumes': [], 'selected_documents': [],
+                         'sent_emails': [], 'discord_notifications': [], 'course_suggestions': {}, 'skill_gaps': [],
+                         'game_recommendations': {}, 'token_activities': [], 'search_params': {}}
+
+        expected = dict(initial_state)
+        for name in app.get_graph().nodes:
+            if name in stubs:
+                expected = stubs[name](dict(expected))
+
+        result = build_parallel_workflow(stubs).compile().invoke(initial_state)
+        self.assertEqual(result, expected)
+        self.assertEqual(len(result['parsed_jobs']), 3)
+        self.assertEqual(result['discord_notifications'], ['3 sent, 1 awarded'])
+
+    def test_search_params_from_state(self):
+        """Test that explicit search params take precedence over message parsing."""
+        state = {'messages': [], 'search_params': {'keywords': 'python', 'location': 'Cape Town'}}
+        self.assertEqual(get_search_params(state)['keywords'], 'python')
+        self.assertEqual(get_search_params({'messages': []})['keywords'], 'software engineer')
+        self.assertEqual(get_search_params(state)['priority'], 0.5)
+        self.assertEqual(get_search_params({'messages': [], 'search_params': {'priority': 1.0}})['priority'], 1.0)
+
+    def test_async_workflow_has_same_nodes(self):
+        """Test that the async workflow mirrors the parallel graph."""
+        self.assertEqual(set(async_app.get_graph().nodes), set(parallel_app.get_graph().nodes))
+
+    def test_api_workflow_skips_mailbox_steps(self):
+        """Test that the orchestrator's workflow never scans Gmail or sends email."""
+        graph = async_api_app.get_graph()
+        self.assertEqual(set(graph.nodes) - {'__start__', '__end__'}, set(API_WORKFLOW_NODES))
+        self.assertFalse({'scan_gmail', 'parse_jobs', 'select_documents', 'send_emails'} & set(graph.nodes))
+
+        fit_sources = {edge.source for edge in graph.edges if edge.target == 'analyze_job_fit'}
+        self.assertEqual(fit_sources, {'search_api_jobs', 'parse_resume'})
+        notify_sources = {edge.source for edge in graph.edges if edge.target == 'discord_notifications'}
+        self.assertEqual(notify_sources, {'award_activity_tokens'})
+
+    def test_api_search_skips_colab(self):
+        """Test that the orchestrator's job search goes straight to the local job APIs."""
+        state = {'messages': [], 'search_params': {'keywords': 'python', 'priority': 1.0}}
+        with patch.object(colab_integration, 'check_colab_status') as check_colab, \
+                patch.object(job_search, 'search_jobs_async', AsyncMock(return_value=[{'id': 'j1'}])) as search:
+            result = asyncio.run(search_local_api_jobs_async(state))
+        check_colab.assert_not_called()
+        self.assertEqual(search.call_args.args[0]['priority'], 1.0)
+        self.assertEqual(result['api_jobs'], [{'id': 'j1'}])
+
+class TestColabIntegration(unittest.TestCase):
+
+    def test_drive_calls_run_off_the_event_loop(self):
+        """Test that submitting a Colab task never runs the Drive client on the loop thread."""
+        with patch.object(ColabIntegration, 'setup_google_drive'):
+            colab = ColabIntegration()
+        colab.drive_service = object()
+        colab.input_folder_id, colab.output_folder_id = 'in', 'out'
+        threads = []
+
+        def record(result):
+            def call(*args):
+                threads.append(threading.get_ident())
+                return result
+            return call
+
+        def download(file_id, local_path):
+            threads.append(threading.get_ident())
+            with open(local_path, 'w') as f:
+                json.dump({'status': 'completed'}, f)
+            return True
+
+        with patch.object(colab, 'upload_file', record('task')), patch.object(colab, 'delete_file', record(True)), \
+                patch.object(colab, 'list_files', record([{'id': 'done'}])), patch.object(colab, 'download_file', download):
+            result = asyncio.run(colab.submit_job_search({'keywords': 'python'}))
+
+        self.assertEqual(result, {'status': 'completed'})
+        self.assertTrue(threads)
+        self.assertNotIn(threading.get_ident(), threads)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
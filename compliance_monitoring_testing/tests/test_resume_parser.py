@@ -4,7 +4,8 @@ import os
 import tempfile
 from unittest.mock import patch, MagicMock
 from resume_doc_processing import resume_parser
-from agent_core import documents
+from resume_doc_processing import parser_tool
+from resume_doc_processing import parse_pool
 
 class TestResumeParser(unittest.TestCase):
 
@@ -127,6 +128,59 @@ class TestResumeParser(unittest.TestCase):
         finally:
             os.unlink(temp_file_path)
 
+    def test_segment_sections(self):
+        """Test headings are only recognised on their own line, with inline content."""
+        sections = resume_parser.segment_sections(
+            "Jane Doe\n\nSummary\nExperience in APIs.\n\nTechnical Skills: Python, SQL\n- Docker\n\n"
+            "WORK EXPERIENCE\nEngineer\n\nSkills\nIgnored duplicate"
+        )
+        self.assertEqual(sections["header"].strip(), "Jane Doe")
+        self.assertEqual(sections["summary"].strip(), "Experience in APIs.")
+        self.assertEqual(resume_parser._list_items(sections["skills"]), ["Python", "SQL", "Docker"])
+        self.assertEqual(sections["experience"].strip(), "Engineer")
+
+    def test_synthetic_corpus_parses(self):
+        """Test every benchmark resume yields its skills and experience sections."""
+        from compliance_monitoring_testing import benchmark_resume_parser
+        for text in benchmark_resume_parser.synthetic_corpus(50):
+            parsed = resume_parser.parse_resume_text(text)
+            self.assertTrue(parsed["skills"])
+            self.assertTrue(parsed["experience"])
+            self.assertEqual(parsed["certifications"], ["Python Programming Certificate", "AWS Cloud Practitioner"])
+
+    def make_pdf(self, pages):
+        """Write a PDF with one page per entry; empty entries give pages without text."""
+        from reportlab.pdfgen import canvas
+        temp_file = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
+        temp_file.close()
+        pdf = canvas.Canvas(temp_file.name)
+        for text in pages:
+            if text:
+                pdf.drawString(72, 720, text)
+            pdf.showPage()
+        pdf.save()
+        self.addCleanup(os.unlink, temp_file.name)
+        return temp_file.name
+
+    def test_iter_pdf_pages_handles_pages_without_text(self):
+        """Test that image-only pages yield empty text instead of crashing."""
+        pdf_path = self.make_pdf(["Ronald Williams", "", "Skills: Python"])
+        self.assertEqual(list(resume_parser.iter_pdf_pages(pdf_path)), ["Ronald Williams", "", "Skills: Python"])
+
+    def test_pdf_page_and_byte_budget(self):
+        """Test that extraction stops at the page and byte budgets."""
+        pdf_path = self.make_pdf([f"Page {i} " + "x" * 50 for i in range(6)])
+        self.assertEqual(len(list(resume_parser.iter_pdf_pages(pdf_path, max_pages=2))), 2)
+        self.assertEqual(len(list(resume_parser.iter_pdf_pages(pdf_path, max_bytes=120))), 2)
+
+    def test_parallel_pdf_extraction_matches_sequential(self):
+        """Test that page-parallel extraction returns the same text in order."""
+        pdf_path = self.make_pdf([f"Page {i}" for i in range(10)])
+        with patch.object(resume_parser, 'PDF_PARALLEL_MIN_PAGES', 2):
+            parallel = resume_parser.extract_pdf_text(pdf_path, workers=2)
+        self.assertEqual(parallel, resume_parser.extract_pdf_text(pdf_path))
+        self.assertTrue(parallel.startswith("Page 0\nPage 1\n"))
+
     @patch('resume_parser.Document')
     def test_parse_docx_resume(self, mock_document):
         """Test DOCX resume parsing."""
@@ -169,66 +223,73 @@ class TestResumeParser(unittest.TestCase):
         self.assertIn("Existing Cert", merged["certifications"])
         self.assertIn("New Cert", merged["certifications"])
 
-class TestDocumentSelection(unittest.TestCase):
+class TestJobEmailParsing(unittest.TestCase):
 
     def setUp(self):
-        """Set up test fixtures for document selection."""
-        self.sample_job_details = {
-            "job_title": "Python Developer",
-            "skills": ["Python", "Django", "SQL"],
-            "description": "Looking for a Python developer with web development experience."
-        }
-
-        self.sample_documents = {
-            "cert1": {
-                "id": "cert1",
-                "type": "certificate",
-                "content_preview": "Python Programming Certificate from Coursera",
-                "filename": "python_cert.pdf"
-            },
-            "cert2": {
-                "id": "cert2",
-                "type": "certificate",
-                "content_preview": "Java Certificate from Oracle",
-                "filename": "java_cert.pdf"
+        """Set up sample job emails."""
+        self.emails = [
+            {
+                'id': f'msg{i}',
+                'subject': f'Opening {i}',
+                'sender': f'Recruiter <jobs{i}@example.com>',
+                'body': f'Job Title: Python Developer {i}\nWe need Python and SQL skills.',
+                'snippet': 'We need Python'
             }
-        }
-
-    @patch('documents.load_documents_metadata')
-    @patch('documents.requests.post')
-    def test_select_relevant_documents(self, mock_post, mock_load):
-        """Test document selection for job relevance."""
-        mock_load.return_value = self.sample_documents
-
-        # Mock API response
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = [{
-            'generated_text': '{"selected_documents": [{"doc_id": "cert1", "relevance_score": 9, "reason": "Python certificate matches job requirements"}]}'
-        }]
-        mock_post.return_value = mock_response
-
-        result = documents.select_relevant_documents(self.sample_job_details)
-
-        self.assertTrue(len(result) > 0)
-        self.assertEqual(result[0]["doc_id"], "cert1")
-
-    @patch('documents.load_documents_metadata')
-    def test_list_documents(self, mock_load):
-        """Test listing documents."""
-        mock_load.return_value = self.sample_documents
-
-        docs = documents.list_documents()
-
-        self.assertEqual(len(docs), 2)
-        self.assertEqual(docs[0]["type"], "certificate")
-
-    def test_allowed_file(self):
-        """Test file extension validation."""
-        self.assertTrue(documents.allowed_file("test.pdf"))
-        self.assertTrue(documents.allowed_file("test.docx"))
-        self.assertFalse(documents.allowed_file("test.txt"))
-        self.assertFalse(documents.allowed_file("test.jpg"))
+            for i in range(5)
+        ]
+
+    def test_batch_matches_single_email_parsing(self):
+        """Test that batched parsing returns the same jobs, in order."""
+        parsed = parser_tool.parse_job_emails(self.emails, batch_size=2)
+        self.assertEqual([job['email_id'] for job in parsed], [f'msg{i}' for i in range(5)])
+        self.assertEqual(parsed[3]['job_title'], 'Python Developer 3')
+        self.assertEqual(parsed[3]['employer_email'], 'jobs3@example.com')
+        for email, job in zip(self.emails, parsed):
+            expected = parser_tool.parse_job_email(email)
+            self.assertEqual(sorted(job['skills']), sorted(expected['skills']))
+
+    def test_streaming_is_lazy(self):
+        """Test that emails are consumed as parsed jobs are requested."""
+        consumed = []
+
+        def stream():
+            for email in self.emails:
+                consumed.append(email['id'])
+                yield email
+
+        jobs = parser_tool.iter_parse_job_emails(stream(), batch_size=1)
+        self.assertEqual(consumed, [])
+        self.assertEqual(next(jobs)['email_id'], 'msg0')
+        self.assertLess(len(consumed), len(self.emails))
+
+    def test_bad_email_does_not_stop_the_batch(self):
+        """Test that missing or malformed email text yields an error result in place."""
+        emails = [self.emails[0], {'id': 'nobody', 'body': None, 'subject': None},
+                  {'id': 'bytes', 'body': b'raw', 'subject': 'Hiring'}, self.emails[1]]
+        parsed = parser_tool.parse_job_emails(emails, batch_size=2)
+        self.assertEqual([job['email_id'] for job in parsed], ['msg0', 'nobody', 'bytes', 'msg1'])
+        self.assertEqual(parsed[2]['job_title'], 'Error parsing')
+        self.assertEqual(parsed[3]['job_title'], 'Python Developer 1')
+
+class TestParsePool(unittest.TestCase):
+
+    def test_run_in_worker_process(self):
+        """Test that parsing work runs outside the calling process."""
+        import asyncio
+        pool = parse_pool.ParsePool(workers=1, queue_limit=0)
+        pool.start()
+        self.addCleanup(pool.shutdown)
+        self.assertNotEqual(asyncio.run(pool.run(os.getpid)), os.getpid())
+
+    def test_slot_rejects_when_full(self):
+        """Test admission control once workers and queue are taken."""
+        pool = parse_pool.ParsePool(workers=1, queue_limit=1)
+        with pool.slot(), pool.slot():
+            with self.assertRaises(parse_pool.ParseQueueFull) as ctx:
+                with pool.slot():
+                    pass
+            self.assertGreaterEqual(ctx.exception.retry_after, 1)
+        self.assertEqual(pool.in_flight, 0)
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
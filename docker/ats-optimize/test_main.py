@@ -289,14 +289,14 @@ class TestATSOptimizeToolCalls:
         assert "Resume optimization analysis complete" in data["content"][0]["text"]
 
     @patch('main.db')
-    @patch('main.generate_resume')
-    def test_generate_resume_variants_tool_success(self, mock_generate_resume, mock_db):
+    @patch('main.generate_resumes_for_jobs')
+    def test_generate_resume_variants_tool_success(self, mock_generate_resumes, mock_db):
         """Test generate_resume_variants tool success"""
         mock_resume = {
             "content": "Variant resume content",
             "fit_score": 82.0
         }
-        mock_generate_resume.return_value = mock_resume
+        mock_generate_resumes.return_value = [mock_resume, mock_resume]
 
         job_list = [
             {"title": "Python Developer", "company": "Tech Corp"},
@@ -317,13 +317,14 @@ class TestATSOptimizeToolCalls:
         data = response.json()
         assert "content" in data
         assert "Generated 2 resume variants" in data["content"][0]["text"]
+        mock_generate_resumes.assert_called_once_with(job_list)
 
     @patch('main.db')
-    @patch('main.generate_resume')
-    def test_generate_resume_variants_tool_with_errors(self, mock_generate_resume, mock_db):
+    @patch('main.generate_resumes_for_jobs')
+    def test_generate_resume_variants_tool_with_errors(self, mock_generate_resumes, mock_db):
         """Test generate_resume_variants tool with some generation errors"""
-        # First call succeeds, second fails
-        mock_generate_resume.side_effect = [
+        # First job succeeds, second fails
+        mock_generate_resumes.return_value = [
             {"content": "Good resume", "fit_score": 80.0},
             {"error": "Generation failed"}
         ]
@@ -16,10 +16,11 @@ from pymongo import MongoClient
 import asyncio
 
 # Import existing logic
-from agent_core.main import AgentState, scan_gmail, search_api_jobs, parse_jobs, parse_resume, analyze_job_fit, generate_resumes, audit_resumes, suggest_courses, discord_notifications, generate_game_recommendations, award_activity_tokens
+from agent_core.main import AgentState, async_api_app, scan_gmail
 from agent_core import conversational_ai
 from resume_doc_processing import resume_tool
 from job_discovery_matching import job_search
+from job_discovery_matching import rate_limiter
 from learning_recommendations import course_suggestions
 from gamification_engine import token_system
 
@@ -348,37 +349,17 @@ async def run_workflow(arguments: Dict[str, Any], background_tasks: BackgroundTa
 async def run_workflow_async(state: AgentState, keywords: str, location: str, max_age_days: int):
     """Run workflow asynchronously"""
     try:
-        # Step 1: Parse resume
-        state = parse_resume(state)
-
-        # Step 2: Search jobs
-        search_params = {
+        # Requested through the API, so the search gets the interactive quota priority
+        state['search_params'] = {
             'keywords': keywords,
             'location': location,
-            'max_age_days': max_age_days
+            'max_age_days': max_age_days,
+            'priority': rate_limiter.DEFAULT_PRIORITY
         }
-        state['api_jobs'] = await job_search.search_jobs_async(search_params)
-
-        # Step 3: Analyze fit
-        state = analyze_job_fit(state)
-
-        # Step 4: Generate resumes for high-fit jobs
-        state = generate_resumes(state)
-
-        # Step 5: Audit resumes
-        state = audit_resumes(state)
-
-        # Step 6: Suggest courses
-        state = suggest_courses(state)
-
-        # Step 7: Generate game recommendations
-        state = generate_game_recommendations(state)
-
-        # Step 8: Award tokens
-        state = award_activity_tokens(state)
 
-        # Step 9: Send notifications
-        state = discord_notifications(state)
+        # Independent steps run concurrently; blocking work is kept off the event loop.
+        # Same steps as before: no Gmail scan, document selection or outgoing email
+        state = await async_api_app.ainvoke(state)
 
         # Save workflow results to MongoDB
         workflow_result = {
@@ -424,7 +405,7 @@ async def scan_gmail_tool(arguments: Dict[str, Any]) -> MCPToolResponse:
             token_activities=[]
         )
 
-        state = scan_gmail(state)
+        state = await asyncio.to_thread(scan_gmail, state)
 
         return MCPToolResponse(
             content=[{
@@ -475,7 +456,7 @@ async def analyze_fit_tool(arguments: Dict[str, Any]) -> MCPToolResponse:
     try:
         # Load master resume (should be user's resume)
         master_resume = resume_tool.load_master_resume()
-        fit_score = resume_tool.calculate_fit_score(master_resume, job_data)
+        fit_score = await asyncio.to_thread(resume_tool.calculate_fit_score, master_resume, job_data)
 
         return MCPToolResponse(
             content=[{
@@ -496,7 +477,7 @@ async def generate_resume_tool(arguments: Dict[str, Any]) -> MCPToolResponse:
     job_data = arguments["job_data"]
 
     try:
-        resume = resume_tool.generate_resume(job_data)
+        resume = await asyncio.to_thread(resume_tool.generate_resume, job_data)
 
         return MCPToolResponse(
             content=[{
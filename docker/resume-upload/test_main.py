@@ -3,6 +3,7 @@ Comprehensive pytest test suite for Resume Upload MCP Server
 Tests MCP endpoints, core functionality, error handling, MongoDB integration, and API responses
 """
 
+import os
 import pytest
 import json
 from datetime import datetime
@@ -13,7 +14,8 @@ import mongomock
 from io import BytesIO
 
 # Import the FastAPI app and related functions
-from main import app, MCPToolResponse, parse_resume_file_tool, extract_resume_sections_tool, merge_resume_data_tool, validate_resume_completeness_tool, anonymize_resume_data_tool
+from main import app, MCPToolResponse, parse_resume_file_tool, extract_resume_sections_tool, merge_resume_data_tool, validate_resume_completeness_tool, anonymize_resume_data_tool, parse_pool, parse_cache
+from resume_doc_processing.parse_cache import ParseCache
 
 # Create test client
 client = TestClient(app)
@@ -299,7 +301,9 @@ class TestFileUploadEndpoint:
     @patch('main.parse_resume_file')
     @patch('builtins.open', new_callable=MagicMock)
     @patch('os.remove')
-    def test_upload_resume_success(self, mock_remove, mock_open, mock_parse_resume, mock_db):
+    @patch.object(parse_cache, 'get', return_value=None)
+    @patch.object(parse_cache, 'set')
+    def test_upload_resume_success(self, mock_cache_set, mock_cache_get, mock_remove, mock_open, mock_parse_resume, mock_db):
         """Test successful resume upload"""
         mock_parse_resume.return_value = {
             "personal_info": {"name": "John Doe"},
@@ -334,7 +338,8 @@ class TestFileUploadEndpoint:
         assert "Only PDF and DOCX files are supported" in result["detail"]
 
     @patch('main.parse_resume_file')
-    def test_upload_resume_parsing_error(self, mock_parse_resume):
+    @patch.object(parse_cache, 'get', return_value=None)
+    def test_upload_resume_parsing_error(self, mock_cache_get, mock_parse_resume):
         """Test upload when resume parsing fails"""
         mock_parse_resume.side_effect = Exception("Parsing failed")
 
@@ -345,6 +350,80 @@ class TestFileUploadEndpoint:
         response = client.post("/upload-resume", files=files, data=data)
         assert response.status_code == 500
 
+    @patch('main.parse_resume_file')
+    def test_upload_resume_queue_full(self, mock_parse_resume):
+        """Test upload is rejected with 429 and Retry-After when the parse queue is full"""
+        files = {"file": ("test_resume.pdf", BytesIO(b"Mock PDF content"), "application/pdf")}
+        data = {"user_id": "test_user"}
+
+        with patch.object(parse_pool, 'in_flight', parse_pool.capacity):
+            response = client.post("/upload-resume", files=files, data=data)
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        mock_parse_resume.assert_not_called()
+        assert parse_pool.in_flight == 0
+
+    @patch('main.save_upload')
+    def test_upload_resume_rejected_before_body_is_read(self, mock_save_upload):
+        """Test Content-Length over the limit is rejected by the middleware before form parsing"""
+        files = {"file": ("big_resume.pdf", BytesIO(b"x" * 64), "application/pdf")}
+        data = {"user_id": "test_user"}
+
+        with patch('main.MAX_UPLOAD_BYTES', 32), patch('main.MULTIPART_OVERHEAD_BYTES', 0):
+            response = client.post("/upload-resume", files=files, data=data)
+        assert response.status_code == 413
+        mock_save_upload.assert_not_called()
+
+    @patch('main.parse_resume_file')
+    def test_upload_resume_too_large(self, mock_parse_resume):
+        """Test oversized uploads are rejected while streaming and the temp file is removed"""
+        files = {"file": ("big_resume.pdf", BytesIO(b"x" * 64), "application/pdf")}
+        data = {"user_id": "test_user"}
+
+        with patch('main.MAX_UPLOAD_BYTES', 32), patch('main.UPLOAD_CHUNK_SIZE', 16):
+            response = client.post("/upload-resume", files=files, data=data)
+        assert response.status_code == 413
+        mock_parse_resume.assert_not_called()
+        assert not os.path.exists("/tmp/test_user_big_resume.pdf")
+
+    @patch('main.db')
+    @patch('main.popia_compliance')
+    @patch('main.parse_resume_file')
+    def test_upload_resume_cache_hit(self, mock_parse_resume, mock_popia, mock_db):
+        """Test re-uploading the same file is served from the parse cache"""
+        mock_parse_resume.return_value = {"personal_info": {"name": "Anon"}, "skills": ["python"]}
+        cache = ParseCache(mongomock.MongoClient().db.resume_parse_cache, parser_version="test-1")
+        data = {"user_id": "test_user", "anonymize": True}
+
+        with patch('main.parse_cache', cache):
+            responses = [
+                client.post("/upload-resume", data=data,
+                            files={"file": ("cv.pdf", BytesIO(b"same bytes"), "application/pdf")}).json()
+                for _ in range(2)
+            ]
+        assert [r["cached"] for r in responses] == [False, True]
+        assert responses[0]["content_hash"] == responses[1]["content_hash"]
+        assert responses[1]["sections_extracted"] == ["personal_info", "skills"]
+        mock_parse_resume.assert_called_once()
+        # Both uploads update one resumes document keyed by content hash
+        assert mock_db.resumes.update_one.call_args[0][0]["content_hash"] == responses[0]["content_hash"]
+
+    def test_parse_cache_invalidated_by_parser_version(self):
+        """Test entries from another parser version are not returned"""
+        collection = mongomock.MongoClient().db.resume_parse_cache
+        ParseCache(collection, parser_version="1.0").set("abc", True, {"skills": ["python"]})
+        assert ParseCache(collection, parser_version="1.0").get("abc", True) == {"skills": ["python"]}
+        assert ParseCache(collection, parser_version="2.0").get("abc", True) is None
+        assert ParseCache(collection, parser_version="1.0").get("abc", False) is None
+
+    def test_parse_cache_skips_raw_parses(self):
+        """Test parses with personal data are never written to the cache"""
+        collection = mongomock.MongoClient().db.resume_parse_cache
+        cache = ParseCache(collection, parser_version="1.0")
+        cache.set("abc", False, {"personal_info": {"email": "jane@example.com"}})
+        assert collection.count_documents({}) == 0
+        assert cache.get("abc", False) is None
+
 class TestErrorHandling:
     """Test error handling scenarios"""
 
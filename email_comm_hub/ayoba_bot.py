@@ -53,11 +53,13 @@ def upload_document():
 
         file = request.files['file']
         doc_type = request.form.get('doc_type', 'certificate')  # Default to certificate
+        # Clients that don't send a user_id upload to the shared documents, as before
+        user_id = request.form.get('user_id', documents.DEFAULT_USER)
 
         if file.filename == '':
             return jsonify({"error": "No selected file"}), 400
 
-        result = documents.upload_document(file, doc_type)
+        result = documents.upload_document(file, doc_type, user_id)
 
         if result['success']:
             return jsonify({
@@ -108,8 +110,8 @@ def ayoba_webhook():
                 logger.info(f"Ayoba command response: {response_msg}")
 
             elif command == 'list_docs':
-                # List uploaded documents
-                docs = documents.list_documents()
+                # List the sender's uploaded documents
+                docs = documents.list_documents(sender)
                 if docs:
                     response_msg = f"You have {len(docs)} uploaded documents: " + ", ".join([d['filename'] for d in docs])
                 else:
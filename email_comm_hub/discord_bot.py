@@ -120,8 +120,8 @@ async def on_message(message):
                     'recent_activity': 'Direct messaging bot'
                 }
 
-                # Generate response
-                response = conversational_ai.chat_with_user(user_id, content, user_context)
+                # Generate response off the event loop; bursts queue in the LLM gateway
+                response = await asyncio.to_thread(conversational_ai.chat_with_user, user_id, content, user_context)
 
                 # Send response
                 embed = discord.Embed(
@@ -1326,8 +1326,8 @@ async def chat_command(interaction: discord.Interaction, message: str):
                 'recent_activity': 'Chatting with assistant'
             }
 
-            # Generate conversational response
-            response = conversational_ai.chat_with_user(user_id, message, user_context)
+            # Generate conversational response off the event loop
+            response = await asyncio.to_thread(conversational_ai.chat_with_user, user_id, message, user_context)
 
             # Send response
             embed = discord.Embed(
@@ -1,11 +1,19 @@
 import os
 import json
-import sqlite3
+import time
+import random
 import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest, build_http
+from email_comm_hub.token_store import get_token_store
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -14,45 +22,82 @@ logger = logging.getLogger(__name__)
 # Database setup
 DB_PATH = 'users.db'
 
+# Gmail batch fetching (Gmail accepts at most 100 calls per batch request)
+GMAIL_BATCH_SIZE = min(100, int(os.getenv('GMAIL_BATCH_SIZE', '100')))
+GMAIL_MIN_BATCH_SIZE = 10
+GMAIL_INITIAL_BACKOFF = 1.0
+GMAIL_MAX_BACKOFF = 32.0
+GMAIL_MAX_RETRIES = 5
+
+# 'incremental' syncs from the stored historyId; 'full' re-runs the keyword search
+GMAIL_SYNC_MODE = os.getenv('GMAIL_SYNC_MODE', 'incremental')
+GMAIL_SEEN_RETENTION_DAYS = int(os.getenv('GMAIL_SEEN_RETENTION_DAYS', '90'))
+
+# Per-user credential/service cache
+GMAIL_SESSION_CACHE_SIZE = int(os.getenv('GMAIL_SESSION_CACHE_SIZE', '256'))
+GMAIL_TOKEN_REFRESH_MARGIN = timedelta(seconds=int(os.getenv('GMAIL_TOKEN_REFRESH_MARGIN', '300')))
+
+def token_store():
+    """Pooled store for the current DB_PATH."""
+    return get_token_store(DB_PATH)
+
 def init_db():
     """Initialize SQLite database for storing user tokens."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            user_id TEXT PRIMARY KEY,
-            refresh_token TEXT NOT NULL
-        )
-    ''')
-    conn.commit()
-    conn.close()
+    token_store()
 
 def store_token(user_id, refresh_token):
     """Store refresh token for a user."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('INSERT OR REPLACE INTO users (user_id, refresh_token) VALUES (?, ?)', (user_id, refresh_token))
-        conn.commit()
-        conn.close()
+        token_store().store_token(user_id, refresh_token)
+        # Drop cached credentials built from the previous token
+        _sessions.invalidate(user_id)
         logger.info(f"Stored token for user {user_id}")
     except Exception as e:
         logger.error(f"Error storing token for user {user_id}: {e}")
         raise
 
+def store_tokens(tokens):
+    """Store refresh tokens for many users ({user_id: refresh_token}) at once."""
+    token_store().store_tokens(tokens)
+    for user_id in tokens:
+        _sessions.invalidate(user_id)
+    logger.info(f"Stored tokens for {len(tokens)} users")
+
 def get_token(user_id):
     """Retrieve refresh token for a user."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('SELECT refresh_token FROM users WHERE user_id = ?', (user_id,))
-        result = cursor.fetchone()
-        conn.close()
-        return result[0] if result else None
+        return token_store().get_token(user_id)
     except Exception as e:
         logger.error(f"Error retrieving token for user {user_id}: {e}")
         return None
 
+def get_tokens(user_ids):
+    """Retrieve refresh tokens for many users; users without one are omitted."""
+    return token_store().get_tokens(user_ids)
+
+def get_history_id(user_id):
+    """Last synced Gmail historyId for a user, or None."""
+    try:
+        return token_store().get_history_id(user_id)
+    except Exception as e:
+        logger.error(f"Error retrieving history id for user {user_id}: {e}")
+        return None
+
+def store_history_id(user_id, history_id):
+    """Save the Gmail historyId a user is synced up to."""
+    if not token_store().store_history_id(user_id, history_id):
+        logger.warning(f"No stored user {user_id}; history id not saved")
+
+def filter_unseen(user_id, message_ids):
+    """Drop message ids that were already processed for a user."""
+    if not message_ids:
+        return []
+    return token_store().filter_unseen(user_id, message_ids)
+
+def mark_seen(user_id, message_ids):
+    """Record processed message ids and forget ones past the retention window."""
+    token_store().mark_seen(user_id, message_ids, GMAIL_SEEN_RETENTION_DAYS)
+
 def get_oauth_url(user_id, redirect_uri='urn:ietf:wg:oauth:2.0:oob'):
     """Generate OAuth authorization URL for a user using out-of-band flow."""
     try:
@@ -85,21 +130,64 @@ def exchange_code_for_token(code, user_id, redirect_uri='urn:ietf:wg:oauth:2.0:o
         logger.error(f"Error exchanging code for user {user_id}: {e}")
         raise
 
-def get_credentials(user_id):
-    """Get valid credentials for a user, refreshing if necessary."""
-    # Try to load from token.json file first
-    try:
-        with open('token.json', 'r') as f:
-            token_data = json.load(f)
+class _UserSession:
+    """Cached credentials and Gmail service for one user."""
 
-        creds = Credentials.from_authorized_user_info(token_data)
+    def __init__(self, creds):
+        self.creds = creds
+        self.service = None
+        self.lock = threading.Lock()
 
-        if creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-            logger.info(f"Refreshed credentials for user {user_id}")
 
-        return creds
+class SessionCache:
+    """Thread-safe LRU cache of per-user sessions."""
+
+    def __init__(self, max_size=GMAIL_SESSION_CACHE_SIZE):
+        self.max_size = max_size
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            session = self._sessions.get(user_id)
+            if session is not None:
+                self._sessions.move_to_end(user_id)
+            return session
+
+    def put(self, user_id, session):
+        with self._lock:
+            self._sessions[user_id] = session
+            self._sessions.move_to_end(user_id)
+            while len(self._sessions) > self.max_size:
+                self._sessions.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._sessions.pop(user_id, None)
 
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+
+_sessions = SessionCache()
+
+def _needs_refresh(creds):
+    """True when the access token is missing, expired or about to expire."""
+    if not creds.refresh_token:
+        return False
+    if creds.expired or not creds.token:
+        return True
+    expiry = creds.expiry
+    return isinstance(expiry, datetime) and expiry - datetime.utcnow() < GMAIL_TOKEN_REFRESH_MARGIN
+
+def _load_credentials(user_id):
+    """Load a user's credentials from token.json or the database."""
+    # Try to load from token.json file first
+    try:
+        with open('token.json', 'r') as f:
+            token_data = json.load(f)
+        return Credentials.from_authorized_user_info(token_data)
     except (FileNotFoundError, json.JSONDecodeError) as e:
         logger.warning(f"Could not load token.json: {e}. Trying database...")
 
@@ -108,109 +196,275 @@ def get_credentials(user_id):
     if not refresh_token:
         raise ValueError(f"No refresh token found for user {user_id}. Please authorize first.")
 
-    try:
-        creds = Credentials.from_authorized_user_info({
-            'refresh_token': refresh_token,
-            'client_id': os.getenv('GOOGLE_CLIENT_ID'),
-            'client_secret': os.getenv('GOOGLE_CLIENT_SECRET'),
-            'token_uri': 'https://oauth2.googleapis.com/token',
-            'scopes': ['https://www.googleapis.com/auth/gmail.readonly']
-        })
-
-        if creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-            logger.info(f"Refreshed credentials for user {user_id}")
-
-        return creds
-    except Exception as e:
-        logger.error(f"Error getting credentials for user {user_id}: {e}")
-        raise
+    return Credentials.from_authorized_user_info({
+        'refresh_token': refresh_token,
+        'client_id': os.getenv('GOOGLE_CLIENT_ID'),
+        'client_secret': os.getenv('GOOGLE_CLIENT_SECRET'),
+        'token_uri': 'https://oauth2.googleapis.com/token',
+        'scopes': ['https://www.googleapis.com/auth/gmail.readonly']
+    })
 
-def scan_emails(creds, keywords=['job', 'hiring', 'Our recommendation:'], max_results=10, timeout=30, batch_size=5):
-    """Scan Gmail for emails containing job-related keywords with timeout and memory management."""
-    try:
-        import time
-        from googleapiclient.http import build_http
-
-        # Create HTTP client with timeout to prevent hanging
-        http = build_http()
-        http.timeout = timeout
-
-        service = build('gmail', 'v1', credentials=creds)
-        query = ' OR '.join(f'"{kw}"' for kw in keywords)
-
-        # Add timeout to message list request
+def get_credentials(user_id):
+    """Get valid credentials for a user, refreshing if necessary.
+
+    Credentials are cached per user and refreshed shortly before the access
+    token expires, so repeated scans skip the token lookup and refresh.
+    """
+    session = _sessions.get(user_id)
+    if session is None:
+        session = _UserSession(_load_credentials(user_id))
+        _sessions.put(user_id, session)
+
+    with session.lock:
+        try:
+            if _needs_refresh(session.creds):
+                session.creds.refresh(Request())
+                logger.info(f"Refreshed credentials for user {user_id}")
+        except Exception as e:
+            _sessions.invalidate(user_id)
+            logger.error(f"Error getting credentials for user {user_id}: {e}")
+            raise
+    return session.creds
+
+def build_gmail_service(creds):
+    """Build a Gmail service from the bundled discovery document.
+
+    httplib2 connections are not thread-safe, so each thread sending
+    requests through the service gets its own authorized connection.
+    """
+    local = threading.local()
+
+    def request_builder(http, *args, **kwargs):
+        if getattr(local, 'http', None) is None:
+            local.http = AuthorizedHttp(creds, http=build_http())
+        return HttpRequest(local.http, *args, **kwargs)
+
+    return build('gmail', 'v1', credentials=creds, requestBuilder=request_builder,
+                 static_discovery=True, cache_discovery=False)
+
+def get_gmail_service(creds, user_id=None):
+    """Return the cached Gmail service for a user, building it on first use."""
+    if user_id is None:
+        return build_gmail_service(creds)
+
+    session = _sessions.get(user_id)
+    if session is None or session.creds is not creds:
+        session = _UserSession(creds)
+        _sessions.put(user_id, session)
+    with session.lock:
+        if session.service is None:
+            session.service = build_gmail_service(creds)
+        return session.service
+
+def _is_rate_limited(error):
+    """True for Gmail 429s and 403 rate-limit errors."""
+    if not isinstance(error, HttpError):
+        return False
+    if error.resp.status == 429:
+        return True
+    return error.resp.status == 403 and 'ratelimitexceeded' in str(error).lower()
+
+def fetch_messages(service, message_ids, batch_size=GMAIL_BATCH_SIZE, deadline=None, failed=None):
+    """Fetch full messages with Gmail batch requests, up to batch_size per round trip.
+
+    Rate-limited messages are retried in later batches; after a throttled
+    round trip the batch shrinks and the backoff doubles, and both recover
+    after clean round trips. Returns {message_id: message} for the messages
+    fetched before the deadline; ids that failed for good are appended to
+    failed, if given.
+    """
+    failed = failed if failed is not None else []
+    fetched = {}
+    pending = list(message_ids)
+    attempts = {}
+    current_size = batch_size
+    backoff = GMAIL_INITIAL_BACKOFF
+
+    while pending:
+        if deadline is not None and time.monotonic() >= deadline:
+            logger.warning(f"Gmail fetch deadline reached with {len(pending)} messages left")
+            break
+
+        chunk, pending = pending[:current_size], pending[current_size:]
+        throttled = []
+
+        def callback(request_id, response, exception):
+            if exception is None:
+                fetched[request_id] = response
+            elif _is_rate_limited(exception):
+                throttled.append(request_id)
+            else:
+                failed.append(request_id)
+                logger.warning(f"Error fetching message {request_id}: {exception}")
+
+        batch = service.new_batch_http_request(callback=callback)
+        for message_id in chunk:
+            batch.add(service.users().messages().get(userId='me', id=message_id, format='full'),
+                      request_id=message_id)
+        batch.execute()
+
+        if throttled:
+            retry = []
+            for message_id in throttled:
+                attempts[message_id] = attempts.get(message_id, 0) + 1
+                if attempts[message_id] <= GMAIL_MAX_RETRIES:
+                    retry.append(message_id)
+                else:
+                    failed.append(message_id)
+                    logger.warning(f"Giving up on message {message_id} after {GMAIL_MAX_RETRIES} rate-limited attempts")
+            pending = retry + pending
+            current_size = max(GMAIL_MIN_BATCH_SIZE, current_size // 2)
+            delay = backoff + random.uniform(0, backoff / 2)
+            if deadline is not None:
+                # Never sleep past the deadline; the loop then stops with what was fetched
+                delay = max(0.0, min(delay, deadline - time.monotonic()))
+            logger.info(f"Gmail rate limited {len(throttled)} requests, backing off {delay:.1f}s (batch size {current_size})")
+            time.sleep(delay)
+            backoff = min(backoff * 2, GMAIL_MAX_BACKOFF)
+        else:
+            current_size = min(batch_size, current_size * 2)
+            backoff = GMAIL_INITIAL_BACKOFF
+
+    return fetched
+
+def to_job_email(msg_data, keywords):
+    """Build a job email dict from a full message, or None if it is not job-related."""
+    headers = msg_data.get('payload', {}).get('headers', [])
+    subject = next((h['value'] for h in headers if h['name'] == 'Subject'), '')
+    sender = next((h['value'] for h in headers if h['name'] == 'From'), '')
+
+    # Use the body only when the subject looks job-related, otherwise the snippet
+    if any(kw.lower() in subject.lower() for kw in keywords):
+        body = get_email_body(msg_data['payload'])
+    else:
+        body = msg_data.get('snippet', '')
+
+    if not any(kw.lower() in (subject + body).lower() for kw in keywords):
+        return None
+    return {
+        'id': msg_data['id'],
+        'subject': subject,
+        'sender': sender,
+        'body': body,
+        'snippet': msg_data.get('snippet', '')
+    }
+
+def list_message_ids(service, query, max_results):
+    """Ids of messages matching a query, following pagination up to max_results."""
+    message_ids = []
+    page_token = None
+    while len(message_ids) < max_results:
         results = service.users().messages().list(
             userId='me',
             q=query,
-            maxResults=max_results
+            maxResults=min(500, max_results - len(message_ids)),
+            pageToken=page_token
+        ).execute()
+        message_ids.extend(msg['id'] for msg in results.get('messages', []))
+        page_token = results.get('nextPageToken')
+        if not page_token:
+            break
+    return message_ids
+
+def list_history_message_ids(service, start_history_id):
+    """Ids of messages added since a historyId, and the mailbox's latest historyId.
+
+    Raises HttpError 404 when the start historyId is too old to sync from.
+    """
+    message_ids = []
+    latest_history_id = start_history_id
+    page_token = None
+    while True:
+        results = service.users().history().list(
+            userId='me',
+            startHistoryId=start_history_id,
+            historyTypes=['messageAdded'],
+            pageToken=page_token
         ).execute()
+        latest_history_id = results.get('historyId', latest_history_id)
+        for record in results.get('history', []):
+            for added in record.get('messagesAdded', []):
+                if added['message']['id'] not in message_ids:
+                    message_ids.append(added['message']['id'])
+        page_token = results.get('nextPageToken')
+        if not page_token:
+            break
+    return message_ids, latest_history_id
+
+def incremental_message_ids(service, user_id, query, max_results):
+    """New message ids for a user since the last sync, and the historyId to store.
+
+    The first sync (or one whose checkpoint expired) falls back to the
+    keyword search; after that only the history since the checkpoint is read.
+    """
+    history_id = get_history_id(user_id)
+    if history_id:
+        try:
+            return list_history_message_ids(service, history_id)
+        except HttpError as e:
+            if e.resp.status != 404:
+                raise
+            logger.info(f"History {history_id} expired for user {user_id}, running a full scan")
+
+    # Take the checkpoint before listing so nothing arriving meanwhile is missed
+    latest_history_id = service.users().getProfile(userId='me').execute()['historyId']
+    return list_message_ids(service, query, max_results), latest_history_id
+
+def scan_emails(creds, keywords=['job', 'hiring', 'Our recommendation:'], max_results=10, timeout=30,
+                batch_size=GMAIL_BATCH_SIZE, user_id=None):
+    """Scan Gmail for emails containing job-related keywords.
+
+    Messages are fetched in Gmail batch requests of up to batch_size (max 100)
+    messages; scanning stops fetching once timeout seconds have passed.
+
+    With a user_id and GMAIL_SYNC_MODE=incremental only messages added since
+    the user's last scan are read, using the Gmail history API, and messages
+    already processed are skipped.
+    """
+    try:
+        deadline = time.monotonic() + timeout
+        service = get_gmail_service(creds, user_id)
+        query = ' OR '.join(f'"{kw}"' for kw in keywords)
 
-        messages = results.get('messages', [])
-        if not messages:
-            logger.info("No messages found matching the query")
+        incremental = user_id is not None and GMAIL_SYNC_MODE == 'incremental'
+        if incremental:
+            message_ids, latest_history_id = incremental_message_ids(service, user_id, query, max_results)
+            unseen = filter_unseen(user_id, message_ids)
+            message_ids = unseen[:max_results]
+        else:
+            message_ids = list_message_ids(service, query, max_results)
+
+        if not message_ids:
+            if incremental:
+                store_history_id(user_id, latest_history_id)
+            logger.info("No new messages found matching the query")
             return []
 
+        failed = []
+        fetched = fetch_messages(service, message_ids, min(batch_size, 100), deadline, failed)
+        if incremental:
+            done = list(fetched) + failed
+            mark_seen(user_id, done)
+            # Only advance the checkpoint once every new message was handled;
+            # until then the seen set keeps re-reads cheap
+            if len(done) == len(unseen):
+                store_history_id(user_id, latest_history_id)
+
         job_emails = []
-        processed_count = 0
-        error_count = 0
-
-        # Process messages in batches to manage memory usage
-        for i in range(0, len(messages), batch_size):
-            batch = messages[i:i + batch_size]
-            batch_results = []
-
-            for msg in batch:
-                try:
-                    # Add timeout to individual message retrieval and use metadata-only format
-                    msg_data = service.users().messages().get(
-                        userId='me',
-                        id=msg['id'],
-                        format='metadata',  # Only get metadata to reduce memory usage
-                        metadataHeaders=['Subject', 'From']
-                    ).execute()
-
-                    payload = msg_data['payload']
-                    headers = payload['headers']
-
-                    subject = next((h['value'] for h in headers if h['name'] == 'Subject'), '')
-                    sender = next((h['value'] for h in headers if h['name'] == 'From'), '')
-
-                    # Get body only if we need full content, otherwise use snippet
-                    if any(kw.lower() in subject.lower() for kw in keywords):
-                        # Get full message for body analysis
-                        full_msg_data = service.users().messages().get(
-                            userId='me',
-                            id=msg['id'],
-                            format='full'
-                        ).execute()
-                        body = get_email_body(full_msg_data['payload'])
-                    else:
-                        body = msg_data.get('snippet', '')
-
-                    if any(kw.lower() in (subject + body).lower() for kw in keywords):
-                        batch_results.append({
-                            'id': msg['id'],
-                            'subject': subject,
-                            'sender': sender,
-                            'body': body,
-                            'snippet': msg_data.get('snippet', '')
-                        })
-
-                    processed_count += 1
-
-                except Exception as msg_error:
-                    error_count += 1
-                    logger.warning(f"Error processing message {msg['id']}: {msg_error}")
-                    continue
-
-            job_emails.extend(batch_results)
-
-            # Add small delay between batches to prevent rate limiting
-            if i + batch_size < len(messages):
-                time.sleep(0.1)
-
-        logger.info(f"Scanned {len(job_emails)} job-related emails from {processed_count} messages ({error_count} errors)")
+        error_count = len(message_ids) - len(fetched)
+        for message_id in message_ids:
+            if message_id not in fetched:
+                continue
+            try:
+                job_email = to_job_email(fetched[message_id], keywords)
+            except Exception as msg_error:
+                error_count += 1
+                logger.warning(f"Error processing message {message_id}: {msg_error}")
+                continue
+            if job_email:
+                job_emails.append(job_email)
+
+        logger.info(f"Scanned {len(job_emails)} job-related emails from {len(fetched)} messages ({error_count} errors)")
         return job_emails
 
     except Exception as e:
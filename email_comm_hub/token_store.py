@@ -0,0 +1,186 @@
+"""
+User Token Store
+
+Thread-safe storage layer for users.db (Gmail refresh tokens, sync
+checkpoints and processed message ids). Connections are pooled and opened
+in WAL mode, so readers never block the writer and concurrent Discord bot
+and orchestrator workers no longer fail with "database is locked".
+"""
+
+import os
+import queue
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.getenv('TOKEN_DB_POOL_SIZE', '5'))
+BUSY_TIMEOUT_SECONDS = float(os.getenv('TOKEN_DB_BUSY_TIMEOUT', '30'))
+SQLITE_MAX_VARIABLES = 500
+
+# Statements are kept as module constants so sqlite3's per-connection
+# statement cache reuses their prepared form
+UPSERT_TOKEN = '''
+    INSERT INTO users (user_id, refresh_token) VALUES (?, ?)
+    ON CONFLICT(user_id) DO UPDATE SET refresh_token = excluded.refresh_token
+'''
+SELECT_TOKEN = 'SELECT refresh_token FROM users WHERE user_id = ?'
+SELECT_HISTORY_ID = 'SELECT history_id FROM users WHERE user_id = ?'
+UPDATE_HISTORY_ID = 'UPDATE users SET history_id = ? WHERE user_id = ?'
+INSERT_SEEN = 'INSERT OR IGNORE INTO seen_messages (user_id, message_id) VALUES (?, ?)'
+PRUNE_SEEN = "DELETE FROM seen_messages WHERE user_id = ? AND seen_at < datetime('now', ?)"
+
+
+class ConnectionPool:
+    """Fixed-size pool of WAL-mode SQLite connections shared across threads."""
+
+    def __init__(self, db_path: str, size: int = POOL_SIZE, timeout: float = BUSY_TIMEOUT_SECONDS):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False,
+                               cached_statements=64)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA busy_timeout={int(self.timeout * 1000)}')
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; commits on success and rolls back on error."""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+            if create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                conn = self._idle.get(timeout=self.timeout)
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._created = 0
+
+
+class TokenStore:
+    """Refresh tokens, Gmail sync checkpoints and seen message ids per user."""
+
+    def __init__(self, db_path: str, pool_size: int = POOL_SIZE):
+        self.db_path = db_path
+        self.pool = ConnectionPool(db_path, pool_size)
+        self._init_schema()
+
+    def _init_schema(self):
+        with self.pool.connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS users (
+                    user_id TEXT PRIMARY KEY,
+                    refresh_token TEXT NOT NULL
+                )
+            ''')
+            # Gmail sync checkpoint, stored next to the refresh token
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(users)').fetchall()]
+            if 'history_id' not in columns:
+                conn.execute('ALTER TABLE users ADD COLUMN history_id TEXT')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS seen_messages (
+                    user_id TEXT NOT NULL,
+                    message_id TEXT NOT NULL,
+                    seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (user_id, message_id)
+                )
+            ''')
+
+    def store_token(self, user_id: str, refresh_token: str):
+        self.store_tokens({user_id: refresh_token})
+
+    def store_tokens(self, tokens: Dict[str, str]):
+        """Upsert many refresh tokens in one transaction; sync checkpoints are kept."""
+        with self.pool.connection() as conn:
+            conn.executemany(UPSERT_TOKEN, tokens.items())
+
+    def get_token(self, user_id: str) -> Optional[str]:
+        with self.pool.connection() as conn:
+            row = conn.execute(SELECT_TOKEN, (user_id,)).fetchone()
+        return row[0] if row else None
+
+    def get_tokens(self, user_ids: Iterable[str]) -> Dict[str, str]:
+        """Refresh tokens for many users; users without a token are omitted."""
+        user_ids = list(user_ids)
+        tokens = {}
+        with self.pool.connection() as conn:
+            for i in range(0, len(user_ids), SQLITE_MAX_VARIABLES):
+                chunk = user_ids[i:i + SQLITE_MAX_VARIABLES]
+                tokens.update(conn.execute(
+                    f'SELECT user_id, refresh_token FROM users WHERE user_id IN ({",".join("?" * len(chunk))})',
+                    chunk
+                ).fetchall())
+        return tokens
+
+    def get_history_id(self, user_id: str) -> Optional[str]:
+        with self.pool.connection() as conn:
+            row = conn.execute(SELECT_HISTORY_ID, (user_id,)).fetchone()
+        return row[0] if row else None
+
+    def store_history_id(self, user_id: str, history_id) -> bool:
+        """Save a user's sync checkpoint; False if the user is unknown."""
+        with self.pool.connection() as conn:
+            return conn.execute(UPDATE_HISTORY_ID, (str(history_id), user_id)).rowcount > 0
+
+    def filter_unseen(self, user_id: str, message_ids: List[str]) -> List[str]:
+        """Drop message ids that were already processed for a user."""
+        seen = set()
+        with self.pool.connection() as conn:
+            for i in range(0, len(message_ids), SQLITE_MAX_VARIABLES):
+                chunk = message_ids[i:i + SQLITE_MAX_VARIABLES]
+                seen.update(row[0] for row in conn.execute(
+                    f'SELECT message_id FROM seen_messages WHERE user_id = ? AND message_id IN ({",".join("?" * len(chunk))})',
+                    (user_id, *chunk)
+                ))
+        return [message_id for message_id in message_ids if message_id not in seen]
+
+    def mark_seen(self, user_id: str, message_ids: Iterable[str], retention_days: int):
+        """Record processed message ids and forget ones past the retention window."""
+        with self.pool.connection() as conn:
+            conn.executemany(INSERT_SEEN, ((user_id, message_id) for message_id in message_ids))
+            conn.execute(PRUNE_SEEN, (user_id, f'-{retention_days} days'))
+
+
+_stores: Dict[str, TokenStore] = {}
+_stores_lock = threading.Lock()
+
+def get_token_store(db_path: str) -> TokenStore:
+    """Return the shared store for a database file (created on first use)."""
+    with _stores_lock:
+        store = _stores.get(db_path)
+        if store is None:
+            store = _stores[db_path] = TokenStore(db_path)
+        return store
@@ -8,6 +8,7 @@ import os
 import json
 import time
 import logging
+import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 import asyncio
@@ -34,6 +35,8 @@ class ColabIntegration:
         self.shared_folder_id = None
         self.input_folder_id = None
         self.output_folder_id = None
+        # The Drive client isn't thread-safe; calls made from worker threads take turns
+        self._drive_lock = threading.RLock()
         self.setup_google_drive()
 
     def setup_google_drive(self):
@@ -232,29 +235,63 @@ class ColabIntegration:
             logger.error(f"Failed to delete file {file_id}: {e}")
             return False
 
-    async def submit_task(self, task_type: str, task_data: Dict, timeout_minutes: int = 30) -> Optional[Dict]:
-        """Submit a task to Colab processor and wait for results."""
-        if not self.drive_service or not self.input_folder_id:
-            logger.error("Google Drive not properly configured")
+    def _locked(self, func, *args):
+        with self._drive_lock:
+            return func(*args)
+
+    async def _drive_call(self, func, *args):
+        """Run a blocking Drive helper in a worker thread, keeping the event loop free."""
+        return await asyncio.to_thread(self._locked, func, *args)
+
+    def fetch_json(self, folder_id: str, filename: str, delete: bool = True) -> Optional[Any]:
+        """Download and parse a JSON file from a Drive folder, removing it from Drive if delete is set."""
+        files = self.list_files(folder_id, filename)
+        if not files:
+            return None
+        local_path = f"/tmp/{filename}"
+        if not self.download_file(files[0]['id'], local_path):
             return None
+        try:
+            with open(local_path, 'r') as f:
+                data = json.load(f)
+        finally:
+            os.remove(local_path)
+        if delete:
+            self.delete_file(files[0]['id'])
+        return data
+
+    def _write_and_upload_task(self, task_type: str, task_data: Dict) -> Optional[str]:
+        task_payload = {
+            'type': task_type,
+            'timestamp': datetime.now().isoformat(),
+            'data': task_data
+        }
+
+        # Save task to local temp file
+        task_filename = f"task_{int(time.time())}.json"
+        local_task_path = f"/tmp/{task_filename}"
+
+        with open(local_task_path, 'w') as f:
+            json.dump(task_payload, f, indent=2)
 
         try:
-            # Create task file
-            task_payload = {
-                'type': task_type,
-                'timestamp': datetime.now().isoformat(),
-                'data': task_data
-            }
+            return self.upload_file(local_task_path, 'task.json', self.input_folder_id)
+        finally:
+            os.remove(local_task_path)
 
-            # Save task to local temp file
-            task_filename = f"task_{int(time.time())}.json"
-            local_task_path = f"/tmp/{task_filename}"
+    async def submit_task(self, task_type: str, task_data: Dict, timeout_minutes: int = 30) -> Optional[Dict]:
+        """Submit a task to Colab processor and wait for results.
 
-            with open(local_task_path, 'w') as f:
-                json.dump(task_payload, f, indent=2)
+        Drive calls run in worker threads, so waiting on Colab never blocks
+        the event loop.
+        """
+        if not self.drive_service or not self.input_folder_id:
+            logger.error("Google Drive not properly configured")
+            return None
 
+        try:
             # Upload task to Drive
-            task_file_id = self.upload_file(local_task_path, 'task.json', self.input_folder_id)
+            task_file_id = await self._drive_call(self._write_and_upload_task, task_type, task_data)
             if not task_file_id:
                 return None
 
@@ -262,8 +299,7 @@ class ColabIntegration:
             result = await self.wait_for_completion(task_type, timeout_minutes)
 
             # Clean up task file
-            self.delete_file(task_file_id)
-            os.remove(local_task_path)
+            await self._drive_call(self.delete_file, task_file_id)
 
             return result
 
@@ -279,19 +315,9 @@ class ColabIntegration:
         while datetime.now() < timeout_time:
             try:
                 # Check for completion file
-                files = self.list_files(self.output_folder_id, completion_filename)
-                if files:
-                    # Download result
-                    local_result_path = f"/tmp/{completion_filename}"
-                    if self.download_file(files[0]['id'], local_result_path):
-                        with open(local_result_path, 'r') as f:
-                            result = json.load(f)
-
-                        # Clean up
-                        self.delete_file(files[0]['id'])
-                        os.remove(local_result_path)
-
-                        return result
+                result = await self._drive_call(self.fetch_json, self.output_folder_id, completion_filename)
+                if result is not None:
+                    return result
 
                 # Wait before checking again
                 await asyncio.sleep(10)
@@ -303,52 +329,26 @@ class ColabIntegration:
         logger.warning(f"Timeout waiting for {task_type} completion")
         return None
 
-    async def submit_job_search(self, search_params: Dict) -> Optional[List[Dict]]:
-        """Submit job search task to Colab."""
-        result = await self.submit_task('job_search', {'params': search_params})
+    async def _submit_and_fetch(self, task_type: str, task_data: Dict, results_filename: str) -> Optional[Any]:
+        result = await self.submit_task(task_type, task_data)
 
         if result and result.get('status') == 'completed':
-            # Download job search results
-            files = self.list_files(self.output_folder_id, 'job_search_results.json')
-            if files:
-                local_path = f"/tmp/job_search_results.json"
-                if self.download_file(files[0]['id'], local_path):
-                    with open(local_path, 'r') as f:
-                        jobs = json.load(f)
-
-                    # Clean up
-                    self.delete_file(files[0]['id'])
-                    os.remove(local_path)
-
-                    return jobs
+            # Download the task's results
+            return await self._drive_call(self.fetch_json, self.output_folder_id, results_filename)
 
         return None
 
+    async def submit_job_search(self, search_params: Dict) -> Optional[List[Dict]]:
+        """Submit job search task to Colab."""
+        return await self._submit_and_fetch('job_search', {'params': search_params}, 'job_search_results.json')
+
     async def submit_fit_analysis(self, jobs: List[Dict], master_resume: Dict) -> Optional[Dict]:
         """Submit fit analysis task to Colab."""
         task_data = {
             'jobs': jobs,
             'master_resume': master_resume
         }
-
-        result = await self.submit_task('fit_analysis', task_data)
-
-        if result and result.get('status') == 'completed':
-            # Download fit analysis results
-            files = self.list_files(self.output_folder_id, 'fit_analysis_results.json')
-            if files:
-                local_path = f"/tmp/fit_analysis_results.json"
-                if self.download_file(files[0]['id'], local_path):
-                    with open(local_path, 'r') as f:
-                        analysis = json.load(f)
-
-                    # Clean up
-                    self.delete_file(files[0]['id'])
-                    os.remove(local_path)
-
-                    return analysis
-
-        return None
+        return await self._submit_and_fetch('fit_analysis', task_data, 'fit_analysis_results.json')
 
     async def submit_resume_generation(self, high_fit_jobs: List[Dict], master_resume: Dict) -> Optional[List[Dict]]:
         """Submit resume generation task to Colab."""
@@ -356,46 +356,11 @@ class ColabIntegration:
             'high_fit_jobs': high_fit_jobs,
             'master_resume': master_resume
         }
-
-        result = await self.submit_task('resume_generation', task_data)
-
-        if result and result.get('status') == 'completed':
-            # Download generated resumes
-            files = self.list_files(self.output_folder_id, 'generated_resumes.json')
-            if files:
-                local_path = f"/tmp/generated_resumes.json"
-                if self.download_file(files[0]['id'], local_path):
-                    with open(local_path, 'r') as f:
-                        resumes = json.load(f)
-
-                    # Clean up
-                    self.delete_file(files[0]['id'])
-                    os.remove(local_path)
-
-                    return resumes
-
-        return None
+        return await self._submit_and_fetch('resume_generation', task_data, 'generated_resumes.json')
 
     async def submit_course_suggestions(self, skill_gaps: List[str]) -> Optional[Dict[str, List[Dict]]]:
         """Submit course suggestions task to Colab."""
-        result = await self.submit_task('course_suggestions', {'skill_gaps': skill_gaps})
-
-        if result and result.get('status') == 'completed':
-            # Download course suggestions
-            files = self.list_files(self.output_folder_id, 'course_suggestions.json')
-            if files:
-                local_path = f"/tmp/course_suggestions.json"
-                if self.download_file(files[0]['id'], local_path):
-                    with open(local_path, 'r') as f:
-                        suggestions = json.load(f)
-
-                    # Clean up
-                    self.delete_file(files[0]['id'])
-                    os.remove(local_path)
-
-                    return suggestions
-
-        return None
+        return await self._submit_and_fetch('course_suggestions', {'skill_gaps': skill_gaps}, 'course_suggestions.json')
 
     def get_status(self) -> Optional[Dict]:
         """Get current Colab processor status."""
@@ -403,15 +368,7 @@ class ColabIntegration:
             return None
 
         try:
-            files = self.list_files(self.shared_folder_id, 'status.json')
-            if files:
-                local_path = f"/tmp/status.json"
-                if self.download_file(files[0]['id'], local_path):
-                    with open(local_path, 'r') as f:
-                        status = json.load(f)
-
-                    os.remove(local_path)
-                    return status
+            return self._locked(self.fetch_json, self.shared_folder_id, 'status.json', False)
         except Exception as e:
             logger.error(f"Failed to get status: {e}")
 
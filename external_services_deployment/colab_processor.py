@@ -32,6 +32,14 @@ import httpx
 import requests
 from bs4 import BeautifulSoup
 
+# Near-duplicate detection is shared with the job search service when the
+# repository is available (e.g. cloned into Colab); otherwise fall back to
+# exact title/company matching
+try:
+    from job_discovery_matching.near_duplicates import deduplicate_jobs
+except ImportError:
+    deduplicate_jobs = None
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -727,7 +735,10 @@ class ColabProcessor:
         return list(set(keywords))[:10]  # Return unique keywords, max 10
 
     def remove_duplicates(self, jobs: List[Dict]) -> List[Dict]:
-        """Remove duplicate jobs based on title and company."""
+        """Remove duplicate jobs based on title and company, plus near-duplicates if available."""
+        if deduplicate_jobs is not None:
+            return deduplicate_jobs([job for job in jobs if job.get('title', '').strip()])
+
         seen = set()
         unique_jobs = []
 
@@ -0,0 +1,142 @@
+import os
+import asyncio
+import logging
+import weakref
+import importlib.util
+from typing import Awaitable, Callable, Dict, List
+from urllib.parse import urlsplit
+
+import httpx
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Pool configuration
+MAX_CONNECTIONS = int(os.getenv('JOB_API_MAX_CONNECTIONS', '100'))
+MAX_CONNECTIONS_PER_HOST = int(os.getenv('JOB_API_MAX_CONNECTIONS_PER_HOST', '10'))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('JOB_API_MAX_KEEPALIVE_CONNECTIONS', '20'))
+KEEPALIVE_EXPIRY = float(os.getenv('JOB_API_KEEPALIVE_EXPIRY', '30'))
+DEFAULT_TIMEOUT = float(os.getenv('JOB_API_TIMEOUT', '10'))
+
+# HTTP/2 needs the optional h2 package (httpx[http2])
+HTTP2_ENABLED = (
+    os.getenv('JOB_API_HTTP2', 'true').lower() == 'true'
+    and importlib.util.find_spec('h2') is not None
+)
+
+
+# Async callables run for every response, e.g. quota bookkeeping
+_response_hooks: List[Callable[[httpx.Response], Awaitable[None]]] = []
+
+def add_response_hook(hook: Callable[[httpx.Response], Awaitable[None]]):
+    """Register an async hook called with every pooled response."""
+    if hook not in _response_hooks:
+        _response_hooks.append(hook)
+
+
+class _LoopPool:
+    """Client and per-host semaphores bound to a single event loop."""
+
+    def __init__(self):
+        self.client = httpx.AsyncClient(
+            http2=HTTP2_ENABLED,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY
+            ),
+            timeout=DEFAULT_TIMEOUT,
+            event_hooks={'response': _response_hooks}
+        )
+        self.host_limits: Dict[str, asyncio.Semaphore] = {}
+        # asyncio.run() cancels leftover tasks before closing its loop; this
+        # one closes the client then, so per-run pools don't leak connections
+        self.closer = asyncio.get_running_loop().create_task(self._close_on_loop_shutdown())
+
+    async def _close_on_loop_shutdown(self):
+        try:
+            await asyncio.get_running_loop().create_future()
+        finally:
+            if not self.client.is_closed:
+                await self.client.aclose()
+                logger.info("Closed pooled HTTP client on event loop shutdown")
+
+    async def close(self):
+        self.closer.cancel()
+        await self.client.aclose()
+
+    def host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self.host_limits:
+            self.host_limits[host] = asyncio.Semaphore(MAX_CONNECTIONS_PER_HOST)
+        return self.host_limits[host]
+
+
+class PooledClientManager:
+    """Shares one keep-alive httpx.AsyncClient across all job-board connectors.
+
+    httpx clients are tied to the event loop that opened their connections, so
+    one pool is kept per running loop. Long-lived services (FastAPI) reuse a
+    single pool; callers that use asyncio.run() get a pool per run, closed
+    when that run's loop shuts down.
+    """
+
+    def __init__(self):
+        self._pools = weakref.WeakKeyDictionary()
+
+    def _pool(self) -> _LoopPool:
+        loop = asyncio.get_running_loop()
+        pool = self._pools.get(loop)
+        if pool is None or pool.client.is_closed:
+            if pool is not None:
+                pool.closer.cancel()
+            pool = _LoopPool()
+            self._pools[loop] = pool
+            logger.info(f"Opened pooled HTTP client (http2={HTTP2_ENABLED})")
+        return pool
+
+    def get_client(self) -> httpx.AsyncClient:
+        """Return the pooled client for the running event loop."""
+        return self._pool().client
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request through the pool, honouring the per-host limit."""
+        pool = self._pool()
+        async with pool.host_limit(url):
+            return await pool.client.request(method, url, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request('POST', url, **kwargs)
+
+    async def startup(self):
+        """Open the pool for the current loop (FastAPI startup hook)."""
+        self._pool()
+
+    async def shutdown(self):
+        """Close the pool for the current loop (FastAPI shutdown hook)."""
+        loop = asyncio.get_running_loop()
+        pool = self._pools.pop(loop, None)
+        if pool is not None:
+            await pool.close()
+            logger.info("Closed pooled HTTP client")
+
+
+client_manager = PooledClientManager()
+
+async def get(url: str, **kwargs) -> httpx.Response:
+    """GET through the shared connection pool."""
+    return await client_manager.get(url, **kwargs)
+
+async def post(url: str, **kwargs) -> httpx.Response:
+    """POST through the shared connection pool."""
+    return await client_manager.post(url, **kwargs)
+
+async def startup():
+    await client_manager.startup()
+
+async def shutdown():
+    await client_manager.shutdown()
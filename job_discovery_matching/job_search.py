@@ -1,9 +1,13 @@
 import os
 import asyncio
 import logging
-import httpx
 from typing import Dict, List, Optional
 from dotenv import load_dotenv
+from job_discovery_matching import http_client
+from job_discovery_matching import search_cache
+from job_discovery_matching import rate_limiter
+from job_discovery_matching import near_duplicates
+from job_discovery_matching.skill_extractor import extract_skills
 
 # Load environment variables
 load_dotenv()
@@ -21,8 +25,21 @@ UPWORK_CLIENT_ID = os.getenv('UPWORK_CLIENT_ID')  # Free tier
 UPWORK_CLIENT_SECRET = os.getenv('UPWORK_CLIENT_SECRET')
 RAPIDAPI_KEY = os.getenv('RAPIDAPI_KEY')  # Free tier available
 
-async def search_jobs_async(search_params: Dict) -> List[Dict]:
-    """Search jobs from multiple APIs asynchronously."""
+async def search_jobs_async(search_params: Dict, use_cache: bool = True) -> List[Dict]:
+    """Search jobs from multiple APIs asynchronously.
+
+    Results are cached on the normalized search parameters; pass
+    use_cache=False to force a fresh search. Results missing providers that
+    were rate-limited or skipped are cached only for the partial TTL.
+    """
+    cache = search_cache.get_search_cache()
+    cache_key = search_cache.make_cache_key(search_params)
+    if use_cache:
+        cached_jobs = await cache.aget(cache_key)
+        if cached_jobs is not None:
+            logger.info(f"Serving {len(cached_jobs)} jobs from search cache")
+            return cached_jobs
+
     keywords = search_params.get('keywords', '')
     location = search_params.get('location', '')
     max_age_days = search_params.get('max_age_days', 30)
@@ -38,14 +55,24 @@ async def search_jobs_async(search_params: Dict) -> List[Dict]:
         search_rapidapi_jobs  # Free tier available
     ]
 
-    # Run all searches in parallel
-    tasks = []
-    for func in search_functions:
-        task = asyncio.create_task(func(keywords, location, salary_min, salary_max))
-        tasks.append(task)
-
-    # Wait for all to complete
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    # Quota scheduling priority (0-1) for the connector calls below; reset
+    # afterwards so later work in the caller's context doesn't inherit it
+    priority_token = rate_limiter.current_priority.set(search_params.get('priority', rate_limiter.DEFAULT_PRIORITY))
+    # Connector tasks share this set and add providers the rate limits kept out
+    skipped_providers = set()
+    skips_token = rate_limiter.current_skips.set(skipped_providers)
+    try:
+        # Run all searches in parallel
+        tasks = []
+        for func in search_functions:
+            task = asyncio.create_task(func(keywords, location, salary_min, salary_max))
+            tasks.append(task)
+
+        # Wait for all to complete
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        rate_limiter.current_skips.reset(skips_token)
+        rate_limiter.current_priority.reset(priority_token)
 
     # Flatten results and filter out exceptions
     all_jobs = []
@@ -62,20 +89,25 @@ async def search_jobs_async(search_params: Dict) -> List[Dict]:
     filtered_jobs = apply_filters(unique_jobs, location, max_age_days)
 
     logger.info(f"Found {len(unique_jobs)} unique jobs, {len(filtered_jobs)} after filtering from {len(search_functions)} APIs")
-    return filtered_jobs
 
-def remove_duplicates(jobs: List[Dict]) -> List[Dict]:
-    """Remove duplicate jobs based on title and company."""
-    seen = set()
-    unique_jobs = []
+    # Empty results are usually misconfiguration or transient failures, don't pin them
+    if filtered_jobs:
+        ttl_seconds = None
+        if skipped_providers:
+            logger.info(f"Caching partial results briefly, missing {', '.join(sorted(skipped_providers))}")
+            ttl_seconds = search_cache.PARTIAL_CACHE_TTL_SECONDS
+        await cache.aset(cache_key, filtered_jobs, search_params, ttl_seconds)
+    return filtered_jobs
 
-    for job in jobs:
-        key = (job.get('title', '').lower(), job.get('company', '').lower())
-        if key not in seen:
-            seen.add(key)
-            unique_jobs.append(job)
+def remove_duplicates(jobs: List[Dict], threshold: Optional[float] = None) -> List[Dict]:
+    """Remove exact and near-duplicate jobs (reposts across boards).
 
-    return unique_jobs
+    Uses a MinHash/LSH index over title, company and description; merged
+    postings are kept under 'merged_from' on the surviving job.
+    """
+    if threshold is None:
+        threshold = near_duplicates.DEFAULT_THRESHOLD
+    return near_duplicates.deduplicate_jobs(jobs, threshold)
 
 async def search_adzuna(keywords: str, location: str, salary_min: Optional[int], salary_max: Optional[int]) -> List[Dict]:
     """Search jobs using Adzuna API."""
@@ -83,6 +115,9 @@ async def search_adzuna(keywords: str, location: str, salary_min: Optional[int],
         logger.warning("Adzuna API keys not configured")
         return []
 
+    if not await rate_limiter.acquire('adzuna'):
+        return []
+
     try:
         url = f"https://api.adzuna.com/v1/api/jobs/us/search/1"
         params = {
@@ -96,8 +131,7 @@ async def search_adzuna(keywords: str, location: str, salary_min: Optional[int],
             'results_per_page': 10
         }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params, timeout=10)
+        response = await http_client.get(url, params=params, timeout=10)
 
         if response.status_code == 200:
             data = response.json()
@@ -141,8 +175,7 @@ async def search_indeed(keywords: str, location: str, salary_min: Optional[int],
         if salary_min:
             params['salary'] = f"{salary_min}+"
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params, timeout=10)
+        response = await http_client.get(url, params=params, timeout=10)
 
         if response.status_code == 200:
             data = response.json()
@@ -187,8 +220,7 @@ async def search_google_jobs(keywords: str, location: str, salary_min: Optional[
             }
         }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, headers=headers, timeout=10)
+        response = await http_client.post(url, json=payload, headers=headers, timeout=10)
 
         if response.status_code == 200:
             data = response.json()
@@ -220,6 +252,9 @@ async def search_serapi_google(keywords: str, location: str, salary_min: Optiona
         logger.warning("SerpApi key not configured")
         return []
 
+    if not await rate_limiter.acquire('serpapi'):
+        return []
+
     try:
         url = "https://serpapi.com/search.json"
         params = {
@@ -230,8 +265,7 @@ async def search_serapi_google(keywords: str, location: str, salary_min: Optiona
             'api_key': SERPAPI_API_KEY
         }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params, timeout=10)
+        response = await http_client.get(url, params=params, timeout=10)
 
         if response.status_code == 200:
             data = response.json()
@@ -271,8 +305,7 @@ async def search_theirstack(keywords: str, location: str, salary_min: Optional[i
             'limit': 10
         }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers, params=params, timeout=10)
+        response = await http_client.get(url, headers=headers, params=params, timeout=10)
 
         if response.status_code == 200:
             data = response.json()
@@ -312,8 +345,7 @@ async def search_coresignal(keywords: str, location: str, salary_min: Optional[i
             'limit': 10
         }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, headers=headers, timeout=10)
+        response = await http_client.post(url, json=payload, headers=headers, timeout=10)
 
         if response.status_code == 200:
             data = response.json()
@@ -344,6 +376,9 @@ async def search_careerjet(keywords: str, location: str, salary_min: Optional[in
         logger.warning("Careerjet API key not configured")
         return []
 
+    if not await rate_limiter.acquire('careerjet'):
+        return []
+
     try:
         url = "https://public-api.careerjet.net/search"
         params = {
@@ -354,8 +389,7 @@ async def search_careerjet(keywords: str, location: str, salary_min: Optional[in
             'pagesize': 10
         }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params, timeout=10)
+        response = await http_client.get(url, params=params, timeout=10)
 
         if response.status_code == 200:
             data = response.json()
@@ -386,6 +420,9 @@ async def search_upwork(keywords: str, location: str, salary_min: Optional[int],
         logger.warning("Upwork credentials not configured")
         return []
 
+    if not await rate_limiter.acquire('upwork'):
+        return []
+
     try:
         # First get access token
         auth_url = "https://www.upwork.com/api/v3/oauth2/token"
@@ -395,8 +432,7 @@ async def search_upwork(keywords: str, location: str, salary_min: Optional[int],
             'client_secret': UPWORK_CLIENT_SECRET
         }
 
-        async with httpx.AsyncClient() as client:
-            auth_response = await client.post(auth_url, data=auth_data, timeout=10)
+        auth_response = await http_client.post(auth_url, data=auth_data, timeout=10)
 
         if auth_response.status_code != 200:
             logger.error(f"Upwork auth failed: {auth_response.status_code}")
@@ -414,8 +450,7 @@ async def search_upwork(keywords: str, location: str, salary_min: Optional[int],
             'limit': 10
         }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(search_url, headers=headers, params=params, timeout=10)
+        response = await http_client.get(search_url, headers=headers, params=params, timeout=10)
 
         if response.status_code == 200:
             data = response.json()
@@ -446,6 +481,9 @@ async def search_rapidapi_jobs(keywords: str, location: str, salary_min: Optiona
         logger.warning("RapidAPI key not configured")
         return []
 
+    if not await rate_limiter.acquire('rapidapi'):
+        return []
+
     try:
         url = "https://jsearch.p.rapidapi.com/search"
         headers = {
@@ -458,8 +496,7 @@ async def search_rapidapi_jobs(keywords: str, location: str, salary_min: Optiona
             'num_pages': 1
         }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers, params=params, timeout=10)
+        response = await http_client.get(url, headers=headers, params=params, timeout=10)
 
         if response.status_code == 200:
             data = response.json()
@@ -485,24 +522,8 @@ async def search_rapidapi_jobs(keywords: str, location: str, salary_min: Optiona
         return []
 
 def extract_keywords(text: str) -> List[str]:
-    """Extract keywords from job description."""
-    if not text:
-        return []
-
-    # Simple keyword extraction (can be enhanced with NLP)
-    words = text.lower().split()
-    keywords = []
-
-    # Common tech skills
-    tech_skills = ['python', 'java', 'javascript', 'react', 'node', 'sql', 'aws', 'docker', 'kubernetes',
-                   'machine learning', 'ai', 'data science', 'devops', 'agile', 'scrum']
-
-    for word in words:
-        word = word.strip('.,!?()[]{}')
-        if word in tech_skills and word not in keywords:
-            keywords.append(word)
-
-    return keywords
+    """Extract skill keywords from a job description in one pass."""
+    return extract_skills(text)
 
 def apply_filters(jobs: List[Dict], location: str, max_age_days: int) -> List[Dict]:
     """Apply location and date filters to jobs."""
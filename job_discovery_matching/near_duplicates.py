@@ -0,0 +1,155 @@
+"""
+Near-Duplicate Job Detection
+
+MinHash signatures over character shingles of title, company and description,
+indexed with locality-sensitive hashing (LSH) banding. Each job is hashed once
+and only compared with the jobs that share an LSH bucket, so deduplicating a
+search runs in roughly linear time instead of comparing every pair.
+"""
+
+import os
+import re
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = float(os.getenv('JOB_DEDUP_THRESHOLD', '0.8'))
+NUM_PERM = 128
+SHINGLE_SIZE = 5
+MAX_TEXT_CHARS = 4000
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+
+
+def job_text(job: Dict) -> str:
+    """Normalized text used to fingerprint a job."""
+    parts = [job.get('title', ''), job.get('company', ''), job.get('description', '')]
+    text = ' '.join(str(part) for part in parts if part).lower()
+    return re.sub(r'\s+', ' ', re.sub(r'[^\w\s]', ' ', text)).strip()[:MAX_TEXT_CHARS]
+
+def shingle_hashes(text: str, k: int = SHINGLE_SIZE) -> np.ndarray:
+    """32-bit rolling hashes of all character k-grams, computed vectorized."""
+    codes = np.frombuffer(text.encode('utf-8'), dtype=np.uint8).astype(np.uint64)
+    if len(codes) == 0:
+        return np.zeros(0, dtype=np.uint64)
+    k = min(k, len(codes))
+    count = len(codes) - k + 1
+    hashes = np.zeros(count, dtype=np.uint64)
+    for offset in range(k):
+        hashes = (hashes * np.uint64(257) + codes[offset:offset + count]) & _MAX_HASH
+    return np.unique(hashes)
+
+def minhash_signature(text: str) -> np.ndarray:
+    """MinHash signature of a text's shingle set."""
+    hashes = shingle_hashes(text)
+    if len(hashes) == 0:
+        return np.full(NUM_PERM, _MAX_HASH, dtype=np.uint64)
+    permuted = (np.outer(_PERM_A, hashes) + _PERM_B[:, None]) % _MERSENNE_PRIME & _MAX_HASH
+    return permuted.min(axis=1)
+
+def lsh_params(threshold: float, num_perm: int = NUM_PERM) -> Tuple[int, int]:
+    """Pick (bands, rows) so the LSH S-curve rises just below the threshold.
+
+    Candidates are verified against the signature afterwards, so the
+    curve is placed slightly low to favour recall.
+    """
+    target = max(0.05, threshold - 0.1)
+    best = (num_perm, 1)
+    best_error = float('inf')
+    for bands in range(1, num_perm + 1):
+        if num_perm % bands:
+            continue
+        rows = num_perm // bands
+        error = abs((1.0 / bands) ** (1.0 / rows) - target)
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+class NearDuplicateIndex:
+    """Incremental MinHash LSH index over job postings."""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.bands, self.rows = lsh_params(threshold)
+        self.buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        self.signatures: List[np.ndarray] = []
+
+    def query(self, signature: np.ndarray) -> Optional[int]:
+        """Return the id of the most similar indexed job above the threshold."""
+        candidates = set()
+        for band, bucket in enumerate(self.buckets):
+            key = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            candidates.update(bucket.get(key, ()))
+
+        best_id, best_similarity = None, self.threshold
+        for candidate in candidates:
+            similarity = float(np.mean(self.signatures[candidate] == signature))
+            if similarity >= best_similarity:
+                best_id, best_similarity = candidate, similarity
+        return best_id
+
+    def add(self, signature: np.ndarray) -> int:
+        item_id = len(self.signatures)
+        self.signatures.append(signature)
+        for band, bucket in enumerate(self.buckets):
+            key = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            bucket.setdefault(key, []).append(item_id)
+        return item_id
+
+
+def _provenance(job: Dict) -> Dict:
+    return {
+        'source': job.get('source', ''),
+        'title': job.get('title', ''),
+        'company': job.get('company', ''),
+        'url': job.get('url', '')
+    }
+
+def _merge(kept: Dict, duplicate: Dict):
+    """Record a dropped repost on the job that is kept."""
+    kept.setdefault('merged_from', [_provenance(kept)]).append(_provenance(duplicate))
+    sources = kept.setdefault('sources', [kept.get('source', '')])
+    if duplicate.get('source', '') not in sources:
+        sources.append(duplicate.get('source', ''))
+
+def deduplicate_jobs(jobs: List[Dict], threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """Drop exact and near-duplicate jobs, keeping the first posting.
+
+    Exact (title, company) matches are always merged; other jobs are merged
+    when their estimated Jaccard similarity reaches the threshold. Kept jobs
+    list every merged posting under 'merged_from' and their boards under
+    'sources'.
+    """
+    index = NearDuplicateIndex(threshold)
+    exact: Dict[Tuple[str, str], int] = {}
+    unique_jobs: List[Dict] = []
+
+    for job in jobs:
+        key = (str(job.get('title', '')).lower(), str(job.get('company', '')).lower())
+        if key in exact:
+            _merge(unique_jobs[exact[key]], job)
+            continue
+
+        signature = minhash_signature(job_text(job))
+        match = index.query(signature)
+        if match is not None:
+            _merge(unique_jobs[match], job)
+            continue
+
+        job = dict(job)
+        exact[key] = index.add(signature)
+        unique_jobs.append(job)
+
+    if len(unique_jobs) < len(jobs):
+        logger.info(f"Merged {len(jobs) - len(unique_jobs)} duplicate jobs (threshold {threshold})")
+    return unique_jobs
@@ -0,0 +1,266 @@
+"""
+Job API Rate Limiting and Quota Accounting
+
+Keeps the free-tier job APIs inside their limits instead of running into
+429s halfway through the month:
+- a token bucket per provider smooths the request rate
+- monthly/daily usage counters are persisted in SQLite
+- the remaining monthly budget is paced evenly over the rest of the month,
+  and background (workflow) searches are cut off before interactive ones
+"""
+
+import os
+import time
+import asyncio
+import sqlite3
+import calendar
+import logging
+import threading
+import contextvars
+from datetime import datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+from dotenv import load_dotenv
+from job_discovery_matching import http_client
+
+# Load environment variables
+load_dotenv()
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+USAGE_DB_PATH = os.getenv('JOB_API_USAGE_DB', 'job_api_usage.db')
+MAX_WAIT_SECONDS = float(os.getenv('JOB_API_MAX_WAIT', '5'))
+# Searches someone is waiting on may use all of today's allowance; automated
+# workflow runs are held to part of it so interactive searches aren't starved
+DEFAULT_PRIORITY = 1.0
+BACKGROUND_PRIORITY = 0.5
+
+# Priority of the search currently running in this task (0 = lowest, 1 = highest)
+current_priority = contextvars.ContextVar('job_search_priority', default=DEFAULT_PRIORITY)
+# Providers the current search skipped or was throttled by; None outside a search
+current_skips = contextvars.ContextVar('job_search_skips', default=None)
+
+# Requests per second, burst size and monthly quota (None = unmetered).
+# Monthly quotas can be overridden with JOB_API_QUOTA_<PROVIDER>.
+PROVIDER_LIMITS = {
+    'adzuna': {'rate': 0.4, 'burst': 5, 'monthly_quota': 250},   # Free tier: ~100-250 calls/month
+    'careerjet': {'rate': 1.0, 'burst': 5, 'monthly_quota': None},  # Free public access
+    'upwork': {'rate': 0.5, 'burst': 3, 'monthly_quota': None},  # Free tier for basic searches
+    'serpapi': {'rate': 0.5, 'burst': 3, 'monthly_quota': 100},  # Free tier: 100 searches/month
+    'rapidapi': {'rate': 0.5, 'burst': 3, 'monthly_quota': 200},  # Free tier available
+}
+
+PROVIDER_HOSTS = {
+    'api.adzuna.com': 'adzuna',
+    'public-api.careerjet.net': 'careerjet',
+    'www.upwork.com': 'upwork',
+    'serpapi.com': 'serpapi',
+    'jsearch.p.rapidapi.com': 'rapidapi',
+}
+
+for _provider, _limits in PROVIDER_LIMITS.items():
+    _override = os.getenv(f'JOB_API_QUOTA_{_provider.upper()}')
+    if _override:
+        _limits['monthly_quota'] = int(_override) or None
+
+
+class TokenBucket:
+    """Thread-safe token bucket; usable from any event loop or thread."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self) -> float:
+        """Take a token if available; otherwise return seconds until one is."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                return self.blocked_until - now
+            self._refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def block_for(self, seconds: float):
+        """Stop handing out tokens, e.g. after a 429 with Retry-After."""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+    async def acquire(self, max_wait: float = MAX_WAIT_SECONDS) -> bool:
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = self.try_acquire()
+            if wait == 0:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+
+
+class QuotaAccountant:
+    """Persisted per-provider usage counters with even monthly pacing."""
+
+    def __init__(self, db_path: str = USAGE_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS api_usage (
+                    provider TEXT NOT NULL,
+                    period TEXT NOT NULL,
+                    count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (provider, period)
+                )
+            ''')
+
+    @staticmethod
+    def _periods(now: datetime):
+        return now.strftime('%Y-%m'), now.strftime('%Y-%m-%d')
+
+    def usage(self, provider: str, now: Optional[datetime] = None) -> Dict[str, int]:
+        month, day = self._periods(now or datetime.now())
+        with sqlite3.connect(self.db_path) as conn:
+            rows = dict(conn.execute(
+                'SELECT period, count FROM api_usage WHERE provider = ? AND period IN (?, ?)',
+                (provider, month, day)
+            ).fetchall())
+        return {'month': rows.get(month, 0), 'day': rows.get(day, 0)}
+
+    def record(self, provider: str, calls: int = 1, now: Optional[datetime] = None):
+        month, day = self._periods(now or datetime.now())
+        with self._lock, sqlite3.connect(self.db_path) as conn:
+            self._record(conn, provider, calls, month, day)
+
+    @staticmethod
+    def _record(conn, provider: str, calls: int, month: str, day: str):
+        conn.executemany('''
+            INSERT INTO api_usage (provider, period, count) VALUES (?, ?, ?)
+            ON CONFLICT(provider, period) DO UPDATE SET count = count + excluded.count
+        ''', [(provider, month, calls), (provider, day, calls)])
+
+    def daily_allowance(self, provider: str, now: Optional[datetime] = None) -> Optional[float]:
+        """Today's share of what is left of the monthly quota."""
+        quota = PROVIDER_LIMITS.get(provider, {}).get('monthly_quota')
+        if not quota:
+            return None
+        now = now or datetime.now()
+        usage = self.usage(provider, now)
+        days_in_month = calendar.monthrange(now.year, now.month)[1]
+        days_left = days_in_month - now.day + 1
+        remaining_at_day_start = max(0, quota - usage['month'] + usage['day'])
+        return remaining_at_day_start / days_left
+
+    def admit(self, provider: str, priority: float = DEFAULT_PRIORITY, now: Optional[datetime] = None) -> bool:
+        """Decide whether a query of the given priority (0-1) may use the provider.
+
+        Low-priority queries may only use part of today's allowance, so the
+        rest stays available for high-value queries later in the day.
+        """
+        quota = PROVIDER_LIMITS.get(provider, {}).get('monthly_quota')
+        if not quota:
+            return True
+        now = now or datetime.now()
+        usage = self.usage(provider, now)
+        if usage['month'] >= quota:
+            return False
+        allowance = self.daily_allowance(provider, now)
+        threshold = 0.5 + 0.5 * min(max(priority, 0.0), 1.0)
+        return usage['day'] < allowance * threshold
+
+    def reserve(self, provider: str, priority: float = DEFAULT_PRIORITY, now: Optional[datetime] = None) -> bool:
+        """Atomically admit a call and count it against the quota."""
+        now = now or datetime.now()
+        with self._lock:
+            if not self.admit(provider, priority, now):
+                return False
+            with sqlite3.connect(self.db_path) as conn:
+                self._record(conn, provider, 1, *self._periods(now))
+            return True
+
+
+class RateLimiter:
+    """Combines token buckets and quota accounting for all job providers."""
+
+    def __init__(self, accountant: Optional[QuotaAccountant] = None):
+        self.accountant = accountant or QuotaAccountant()
+        self.buckets = {
+            provider: TokenBucket(limits['rate'], limits['burst'])
+            for provider, limits in PROVIDER_LIMITS.items()
+        }
+
+    async def acquire(self, provider: str, priority: float = DEFAULT_PRIORITY) -> bool:
+        """Reserve one call to a provider; False means skip it this time."""
+        if not await asyncio.to_thread(self.accountant.admit, provider, priority):
+            logger.info(f"Skipping {provider}: quota budget reserved for higher-priority searches")
+            return False
+        bucket = self.buckets.get(provider)
+        if bucket and not await bucket.acquire():
+            logger.info(f"Skipping {provider}: rate limit wait exceeds {MAX_WAIT_SECONDS}s")
+            return False
+        # Re-check under the lock; concurrent searches may have used the budget meanwhile
+        return await asyncio.to_thread(self.accountant.reserve, provider, priority)
+
+    def throttled(self, provider: str, retry_after: float):
+        logger.warning(f"{provider} returned 429, pausing for {retry_after:.0f}s")
+        self.buckets[provider].block_for(retry_after)
+
+    async def on_response(self, response):
+        """httpx response hook: back off a provider that answers 429."""
+        if response.status_code != 429:
+            return
+        provider = PROVIDER_HOSTS.get(urlsplit(str(response.request.url)).netloc)
+        if provider in self.buckets:
+            try:
+                retry_after = float(response.headers.get('Retry-After', 60))
+            except ValueError:
+                retry_after = 60.0
+            self.throttled(provider, retry_after)
+
+
+_rate_limiter = None
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the shared rate limiter (created on first use)."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter()
+    return _rate_limiter
+
+def set_rate_limiter(limiter: RateLimiter):
+    """Replace the shared rate limiter."""
+    global _rate_limiter
+    _rate_limiter = limiter
+
+def record_skip(provider: str):
+    """Note that the current search got no results from provider because of rate limits."""
+    skips = current_skips.get()
+    if skips is not None:
+        skips.add(provider)
+
+async def acquire(provider: str) -> bool:
+    """Reserve a call for the current search, using its scheduling priority."""
+    acquired = await get_rate_limiter().acquire(provider, current_priority.get())
+    if not acquired:
+        record_skip(provider)
+    return acquired
+
+async def on_response(response):
+    if response.status_code == 429:
+        host = urlsplit(str(response.request.url)).netloc
+        record_skip(PROVIDER_HOSTS.get(host, host))
+    await get_rate_limiter().on_response(response)
+
+http_client.add_response_hook(on_response)
@@ -0,0 +1,325 @@
+"""
+Job Search Result Cache
+
+Caches aggregated job search results keyed on normalized search parameters,
+so repeated searches (Discord /search_jobs, the search_jobs_multi_api MCP tool,
+workflow runs) are served without spending free-tier API quota.
+
+Backends:
+- memory: in-process LRU with TTL and a byte budget (default)
+- mongodb: shared cache stored in the job_searches collection
+- none: caching disabled
+"""
+
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Try to import MongoDB
+try:
+    from pymongo import MongoClient, ASCENDING
+    from pymongo.errors import PyMongoError
+    MONGODB_AVAILABLE = True
+except ImportError:
+    MONGODB_AVAILABLE = False
+
+CACHE_BACKEND = os.getenv('JOB_SEARCH_CACHE_BACKEND', 'memory')
+CACHE_TTL_SECONDS = int(os.getenv('JOB_SEARCH_CACHE_TTL', str(6 * 60 * 60)))
+# Results missing some providers (rate-limited or skipped) are only kept briefly
+PARTIAL_CACHE_TTL_SECONDS = int(os.getenv('JOB_SEARCH_CACHE_PARTIAL_TTL', str(15 * 60)))
+CACHE_MAX_ENTRIES = int(os.getenv('JOB_SEARCH_CACHE_MAX_ENTRIES', '1000'))
+CACHE_MAX_BYTES = int(os.getenv('JOB_SEARCH_CACHE_MAX_BYTES', str(50 * 1024 * 1024)))
+# The MongoDB backend recounts its shared totals at least this often
+CACHE_TOTALS_REFRESH_SECONDS = int(os.getenv('JOB_SEARCH_CACHE_TOTALS_REFRESH', '60'))
+
+def normalize_search_params(search_params: Dict) -> Dict:
+    """Normalize the parameters that determine a search's results."""
+    def text(value) -> str:
+        return re.sub(r'\s+', ' ', str(value or '')).strip().lower()
+
+    def number(value) -> Optional[int]:
+        try:
+            return int(value) if value not in (None, '') else None
+        except (TypeError, ValueError):
+            return None
+
+    return {
+        'keywords': text(search_params.get('keywords')),
+        'location': text(search_params.get('location')),
+        'salary_min': number(search_params.get('salary_min')),
+        'salary_max': number(search_params.get('salary_max')),
+        'max_age_days': number(search_params.get('max_age_days', 30))
+    }
+
+def make_cache_key(search_params: Dict) -> str:
+    """Build a stable cache key from normalized search parameters."""
+    normalized = normalize_search_params(search_params)
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class SearchCache:
+    """Interface for job search cache backends."""
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        return None
+
+    def set(self, key: str, jobs: List[Dict], search_params: Optional[Dict] = None,
+            ttl_seconds: Optional[int] = None):
+        pass
+
+    def clear(self):
+        pass
+
+    def stats(self) -> Dict:
+        return {'backend': 'none'}
+
+    async def aget(self, key: str) -> Optional[List[Dict]]:
+        return self.get(key)
+
+    async def aset(self, key: str, jobs: List[Dict], search_params: Optional[Dict] = None,
+                   ttl_seconds: Optional[int] = None):
+        self.set(key, jobs, search_params, ttl_seconds)
+
+
+class InMemorySearchCache(SearchCache):
+    """Thread-safe LRU cache with TTL and a byte budget.
+
+    Entries are stored as serialized JSON so callers always receive a fresh
+    copy and the byte budget reflects the real payload size.
+    """
+
+    def __init__(self, ttl_seconds: int = CACHE_TTL_SECONDS, max_entries: int = CACHE_MAX_ENTRIES,
+                 max_bytes: int = CACHE_MAX_BYTES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, payload, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            payload = entry[1]
+        return json.loads(payload)
+
+    def set(self, key: str, jobs: List[Dict], search_params: Optional[Dict] = None,
+            ttl_seconds: Optional[int] = None):
+        payload = json.dumps(jobs, default=str)
+        size = len(payload.encode('utf-8'))
+        if size > self.max_bytes:
+            logger.info(f"Search result of {size} bytes exceeds cache budget, not cached")
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+            self._entries[key] = (time.monotonic() + ttl, payload, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str):
+        self._bytes -= self._entries.pop(key)[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+class MongoSearchCache(SearchCache):
+    """Shared cache stored alongside search history in job_searches.
+
+    Cache documents are identified by a cache_key field; expiry is enforced by
+    a TTL index on expires_at and the byte budget by evicting the least
+    recently used documents.
+
+    Entry and byte totals are kept as a running estimate updated on each
+    write, so the collection is only aggregated when the estimate crosses a
+    budget or is older than totals_refresh_seconds (other processes share
+    the collection, and expired documents are removed by MongoDB).
+    """
+
+    def __init__(self, collection=None, ttl_seconds: int = CACHE_TTL_SECONDS,
+                 max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES,
+                 totals_refresh_seconds: int = CACHE_TOTALS_REFRESH_SECONDS):
+        if collection is None:
+            mongodb_uri = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
+            database_name = os.getenv('MONGODB_DATABASE', 'job_application_agent')
+            client = MongoClient(mongodb_uri, serverSelectionTimeoutMS=5000)
+            collection = client[database_name].job_searches
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.totals_refresh_seconds = totals_refresh_seconds
+        self._totals = None  # (bytes, entries) estimate
+        self._totals_at = 0.0
+        self._totals_lock = threading.Lock()
+        self._indexes_ready = False
+
+    def _ensure_indexes(self):
+        if self._indexes_ready:
+            return
+        self.collection.create_index([('cache_key', ASCENDING)], unique=True,
+                                     partialFilterExpression={'cache_key': {'$exists': True}})
+        self.collection.create_index([('expires_at', ASCENDING)], expireAfterSeconds=0)
+        self.collection.create_index([('last_accessed', ASCENDING)])
+        self._indexes_ready = True
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        try:
+            self._ensure_indexes()
+            doc = self.collection.find_one_and_update(
+                {'cache_key': key, 'expires_at': {'$gt': datetime.utcnow()}},
+                {'$set': {'last_accessed': datetime.utcnow()}}
+            )
+            return json.loads(doc['payload']) if doc else None
+        except PyMongoError as e:
+            logger.warning(f"Search cache lookup failed: {e}")
+            return None
+
+    def set(self, key: str, jobs: List[Dict], search_params: Optional[Dict] = None,
+            ttl_seconds: Optional[int] = None):
+        payload = json.dumps(jobs, default=str)
+        size = len(payload.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        now = datetime.utcnow()
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        try:
+            self._ensure_indexes()
+            previous = self.collection.find_one_and_update(
+                {'cache_key': key},
+                {'$set': {
+                    'cache_key': key,
+                    'search_params': normalize_search_params(search_params or {}),
+                    'payload': payload,
+                    'size_bytes': size,
+                    'results_count': len(jobs),
+                    'last_accessed': now,
+                    'expires_at': now + timedelta(seconds=ttl)
+                }},
+                projection={'size_bytes': 1},
+                upsert=True
+            )
+            if previous:
+                self._track(size - previous.get('size_bytes', 0), 0)
+            else:
+                self._track(size, 1)
+        except PyMongoError as e:
+            logger.warning(f"Search cache store failed: {e}")
+
+    def _within_budget(self, total_bytes: int, count: int) -> bool:
+        return total_bytes <= self.max_bytes and count <= self.max_entries
+
+    def _count_totals(self) -> tuple:
+        totals = list(self.collection.aggregate([
+            {'$match': {'cache_key': {'$exists': True}}},
+            {'$group': {'_id': None, 'bytes': {'$sum': '$size_bytes'}, 'count': {'$sum': 1}}}
+        ]))
+        return (totals[0]['bytes'], totals[0]['count']) if totals else (0, 0)
+
+    def _track(self, delta_bytes: int, delta_count: int):
+        """Add a write to the running totals, evicting once they cross a budget."""
+        with self._totals_lock:
+            now = time.monotonic()
+            if self._totals is None or now - self._totals_at >= self.totals_refresh_seconds:
+                self._totals, self._totals_at = self._count_totals(), now
+            else:
+                self._totals = (self._totals[0] + delta_bytes, self._totals[1] + delta_count)
+            if not self._within_budget(*self._totals):
+                self._totals, self._totals_at = self._evict(), now
+
+    def _evict(self) -> tuple:
+        """Drop least recently used entries until within entry and byte budgets; returns the new totals."""
+        total_bytes, count = self._count_totals()
+        if self._within_budget(total_bytes, count):
+            return total_bytes, count
+
+        cache_filter = {'cache_key': {'$exists': True}}
+        for doc in self.collection.find(cache_filter, {'cache_key': 1, 'size_bytes': 1}).sort('last_accessed', ASCENDING):
+            if self._within_budget(total_bytes, count):
+                break
+            self.collection.delete_one({'cache_key': doc['cache_key']})
+            total_bytes -= doc.get('size_bytes', 0)
+            count -= 1
+        return total_bytes, count
+
+    def clear(self):
+        self.collection.delete_many({'cache_key': {'$exists': True}})
+        with self._totals_lock:
+            self._totals = None
+
+    def stats(self) -> Dict:
+        return {
+            'backend': 'mongodb',
+            'entries': self.collection.count_documents({'cache_key': {'$exists': True}})
+        }
+
+    async def aget(self, key: str) -> Optional[List[Dict]]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, jobs: List[Dict], search_params: Optional[Dict] = None,
+                   ttl_seconds: Optional[int] = None):
+        await asyncio.to_thread(self.set, key, jobs, search_params, ttl_seconds)
+
+
+_search_cache = None
+
+def get_search_cache() -> SearchCache:
+    """Return the configured search cache backend (created on first use)."""
+    global _search_cache
+    if _search_cache is None:
+        if CACHE_BACKEND == 'mongodb' and MONGODB_AVAILABLE:
+            _search_cache = MongoSearchCache()
+        elif CACHE_BACKEND == 'none':
+            _search_cache = SearchCache()
+        else:
+            if CACHE_BACKEND not in ('memory', 'mongodb'):
+                logger.warning(f"Unknown search cache backend '{CACHE_BACKEND}', using memory")
+            _search_cache = InMemorySearchCache()
+        logger.info(f"Job search cache backend: {type(_search_cache).__name__}")
+    return _search_cache
+
+def set_search_cache(cache: SearchCache):
+    """Replace the active search cache backend."""
+    global _search_cache
+    _search_cache = cache
@@ -0,0 +1,117 @@
+"""
+Skill Extraction
+
+Aho-Corasick automaton over a skill dictionary (canonical skills plus
+synonyms). The automaton is compiled once at import and scans each job
+description in a single pass, matching single- and multi-word skills
+("machine learning", "data science") on word boundaries.
+"""
+
+import logging
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Canonical skill -> synonyms that should be reported as that skill. Entries
+# must not be everyday words ("rest", "ml"), which would match ordinary prose.
+SKILL_SYNONYMS: Dict[str, List[str]] = {
+    'python': ['python3'],
+    'java': [],
+    'javascript': ['js', 'ecmascript'],
+    'typescript': [],
+    'react': ['react.js', 'reactjs'],
+    'node': ['node.js', 'nodejs'],
+    'sql': ['mysql', 'postgresql', 'postgres', 'sql server'],
+    'aws': ['amazon web services'],
+    'azure': ['microsoft azure'],
+    'gcp': ['google cloud', 'google cloud platform'],
+    'docker': [],
+    'kubernetes': ['k8s'],
+    'machine learning': [],
+    'ai': ['artificial intelligence'],
+    'data science': [],
+    'data analysis': ['data analytics'],
+    'devops': ['dev ops'],
+    'ci/cd': ['continuous integration', 'continuous delivery'],
+    'agile': [],
+    'scrum': [],
+    'git': ['github', 'gitlab'],
+    'linux': [],
+    'rest api': ['rest apis', 'restful'],
+    'graphql': [],
+}
+
+
+class SkillMatcher:
+    """Aho-Corasick automaton mapping dictionary phrases to canonical skills."""
+
+    def __init__(self, skills: Optional[Dict[str, Iterable[str]]] = None):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[Tuple[int, str]]] = [[]]  # (phrase length, canonical skill)
+
+        for canonical, synonyms in (skills if skills is not None else SKILL_SYNONYMS).items():
+            for phrase in [canonical, *synonyms]:
+                self._add(phrase.lower(), canonical)
+        self._build_failure_links()
+
+    def _add(self, phrase: str, canonical: str):
+        state = 0
+        for char in phrase:
+            if char not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[state][char] = len(self.goto) - 1
+            state = self.goto[state][char]
+        self.output[state].append((len(phrase), canonical))
+
+    def _build_failure_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def find(self, text: str) -> List[Tuple[int, str]]:
+        """Return (start offset, canonical skill) for every whole-word match."""
+        text = text.lower()
+        matches = []
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for length, canonical in self.output[state]:
+                start = end - length + 1
+                before_ok = start == 0 or not text[start - 1].isalnum()
+                after_ok = end + 1 == len(text) or not text[end + 1].isalnum()
+                if before_ok and after_ok:
+                    matches.append((start, canonical))
+        return matches
+
+    def extract(self, text: str) -> List[str]:
+        """Canonical skills in order of first appearance, without repeats."""
+        skills = []
+        for _, canonical in sorted(self.find(text)):
+            if canonical not in skills:
+                skills.append(canonical)
+        return skills
+
+
+# Compiled once and shared by all connectors
+skill_matcher = SkillMatcher()
+
+def extract_skills(text: str) -> List[str]:
+    """Extract canonical skills from free text."""
+    if not text:
+        return []
+    return skill_matcher.extract(text)
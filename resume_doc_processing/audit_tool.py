@@ -1,36 +1,177 @@
 import json
 import os
+import re
 import logging
 import requests
 from typing import Dict, List, Optional
+from resume_doc_processing import llm_client
+from resume_doc_processing.master_resume import iter_strings, load_master_resume, views_for
+from resume_doc_processing.resume_parser import BULLET_PREFIX_RE, LIST_ITEM_SPLIT_RE, segment_sections
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-HUGGINGFACE_API_KEY = os.getenv('HUGGINGFACE_API_KEY')
-if not HUGGINGFACE_API_KEY:
-    logger.error("HUGGINGFACE_API_KEY not found in environment variables")
-    raise ValueError("HUGGINGFACE_API_KEY is required")
+# The configured LLM backend must have credentials
+llm_client.require_credentials()
 
-def load_master_resume() -> Dict:
-    """Load the master resume from JSON file."""
-    try:
-        with open('master_resume.json', 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        logger.error("master_resume.json not found")
-        raise
-    except json.JSONDecodeError as e:
-        logger.error(f"Error parsing master_resume.json: {e}")
-        raise
+# Rule-based pre-audit: resumes whose claims all trace back to the master
+# resume are approved locally; only unverifiable ones are sent to the LLM
+PRE_AUDIT_ENABLED = os.getenv('AUDIT_PRE_AUDIT', 'true').lower() == 'true'
+
+WORD_RE = re.compile(r'[a-z0-9]+[+#]*')
+NUMBER_RE = re.compile(r'\d+(?:[.,]\d+)*')
+BULLET_LINE_RE = re.compile(r'^\s*[-*•·]')
+# Function words, month names and field labels carry no claim on their own
+PRE_AUDIT_STOPWORDS = {
+    'a', 'an', 'and', 'or', 'the', 'of', 'in', 'at', 'on', 'for', 'with', 'to', 'by', 'from', 'as', 'via',
+    'into', 'onto', 'over', 'across', 'through', 'within', 'while', 'using', 'including', 'also', 'both',
+    'i', 'me', 'my', 'we', 'our', 'us', 'you', 'your', 'their', 'it', 'its', 'this', 'that', 'these', 'those',
+    'is', 'are', 'was', 'were', 'be', 'been', 'being', 'has', 'have', 'had', 'who', 'which', 'where', 'when',
+    'present', 'current', 'now', 'date', 'dates', 'header', 'name', 'email', 'phone', 'location',
+    'linkedin', 'contact', 'tel', 'cell', 'mobile', 'http', 'https', 'www',
+    'jan', 'january', 'feb', 'february', 'mar', 'march', 'apr', 'april', 'may', 'jun', 'june', 'jul', 'july',
+    'aug', 'august', 'sep', 'sept', 'september', 'oct', 'october', 'nov', 'november', 'dec', 'december'
+}
+
+def _tokens(text: str) -> List[str]:
+    """Lowercased word tokens with a trailing plural 's' dropped."""
+    tokens = []
+    for token in WORD_RE.findall(text.lower()):
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+def _numbers(text: str) -> set:
+    return {number.replace(',', '') for number in NUMBER_RE.findall(text)}
+
+def build_master_index(master_resume: Dict) -> Dict:
+    """Tokens, figures and normalized phrase text of the master resume."""
+    text = '\n'.join(iter_strings(master_resume))
+    tokens = _tokens(text)
+    return {
+        'tokens': set(tokens),
+        'numbers': _numbers(text),
+        'phrase_text': f" {' '.join(tokens)} "
+    }
+
+def _unverified_terms(text: str, index: Dict) -> List[str]:
+    return [token for token in _tokens(text)
+            if token not in PRE_AUDIT_STOPWORDS and token not in index['tokens'] and not token.isdigit()]
+
+def _phrase_in(phrase: str, phrase_text: str) -> bool:
+    tokens = _tokens(phrase)
+    return bool(tokens) and f" {' '.join(tokens)} " in phrase_text
+
+def pre_audit_resume_content(generated_content: str, job_details: Dict, master_resume: Dict) -> Dict:
+    """Check the generated resume's claims against the master resume without the LLM.
+
+    - every figure (years, percentages, amounts) must appear in the master resume
+    - header lines, skills items, entry lines (titles, employers, degrees,
+      institutions, dates), summary lines and bullet points may only use
+      words found in the master resume
+    - job skills mentioned anywhere must appear as a phrase in the master resume
+
+    Returns the unverifiable claims, the job skills the resume doesn't
+    mention, the share of checked terms found in the master resume and
+    whether the resume needs an LLM audit.
+    """
+    index = views_for(master_resume).derive('pre_audit_index', build_master_index)
+    sections = segment_sections(generated_content)
+    claims = []
+    checked_terms = 0
+    unverified_terms = 0
+
+    def check(text: str) -> List[str]:
+        nonlocal checked_terms, unverified_terms
+        terms = _unverified_terms(text, index)
+        checked_terms += sum(1 for token in _tokens(text) if token not in PRE_AUDIT_STOPWORDS and not token.isdigit())
+        unverified_terms += len(terms)
+        return terms
+
+    if len(sections) == 1:
+        claims.append("Resume sections not recognised")
+
+    for number in sorted(_numbers(generated_content) - index['numbers']):
+        claims.append(f"Figure not in master resume: {number}")
+
+    for line in sections.get('header', '').splitlines():
+        if check(line):
+            claims.append(f"Unverified header detail: {line.strip()}")
+
+    for line in sections.get('summary', '').splitlines():
+        terms = check(line)
+        if terms:
+            claims.append(f"Unverified summary terms: {', '.join(dict.fromkeys(terms))}")
+
+    for item in LIST_ITEM_SPLIT_RE.split(sections.get('skills', '')):
+        item = BULLET_PREFIX_RE.sub('', item).strip()
+        if item and check(item) and not _phrase_in(item, index['phrase_text']):
+            claims.append(f"Skill not in master resume: {item}")
+
+    for section in ('experience', 'education', 'certifications'):
+        for line in sections.get(section, '').splitlines():
+            if not line.strip():
+                continue
+            terms = check(line)
+            if not terms:
+                continue
+            if BULLET_LINE_RE.match(line):
+                claims.append(f"Unverified {section} bullet terms: {', '.join(dict.fromkeys(terms))}")
+            else:
+                claims.append(f"Unverified {section} entry: {line.strip()}")
+
+    generated_phrases = f" {' '.join(_tokens(generated_content))} "
+    missing_skills = []
+    for skill in job_details.get('skills', []):
+        if not _phrase_in(skill, generated_phrases):
+            missing_skills.append(skill)
+        elif not _phrase_in(skill, index['phrase_text']):
+            claims.append(f"Job skill not supported by master resume: {skill}")
+
+    verified_share = 100 * (checked_terms - unverified_terms) / checked_terms if checked_terms else 0.0
+    return {
+        'claims': claims,
+        'missing_skills': missing_skills,
+        'verified_terms_pct': round(verified_share, 1),
+        'escalate': bool(claims) or not checked_terms
+    }
 
 def audit_resume_content(generated_content: str, job_details: Dict) -> Dict:
-    """Audit the generated resume for hallucinations using Hugging Face Llama 3.1."""
+    """Audit the generated resume for hallucinations.
+
+    A rule-based pre-audit approves resumes whose claims all trace back to
+    the master resume; the rest are audited by the LLM, which is told what
+    the pre-audit flagged.
+    """
     try:
         master_resume = load_master_resume()
 
+        pre_audit_flags = []
+        if PRE_AUDIT_ENABLED:
+            pre_audit = pre_audit_resume_content(generated_content, job_details, master_resume)
+            if not pre_audit['escalate']:
+                logger.info("Pre-audit passed, skipping LLM audit")
+                # No accuracy is measured locally: the pre-audit only shows
+                # that every checked term traces back to the master resume
+                return {
+                    "accuracy_score": None,
+                    "verified_terms_pct": pre_audit['verified_terms_pct'],
+                    "hallucinations_detected": [],
+                    "missing_skills": pre_audit['missing_skills'],
+                    "recommendations": [],
+                    "approved": True,
+                    "audit_method": "rule_based"
+                }
+            pre_audit_flags = pre_audit['claims']
+            logger.info(f"Pre-audit flagged {len(pre_audit_flags)} claims, escalating to LLM audit")
+
+        flags_section = ''
+        if pre_audit_flags:
+            flags_section = "UNVERIFIED CLAIMS FLAGGED BY PRE-AUDIT:\n" + '\n'.join(
+                f"        - {flag}" for flag in pre_audit_flags)
+
         prompt = f"""
         You are an expert auditor for resume content. Your task is to analyze the generated resume for accuracy and detect any potential hallucinations.
 
@@ -44,6 +185,8 @@ def audit_resume_content(generated_content: str, job_details: Dict) -> Dict:
         GENERATED RESUME CONTENT:
         {generated_content}
 
+        {flags_section}
+
         ANALYSIS INSTRUCTIONS:
         1. Compare the generated content against the master resume
         2. Check if any skills, experiences, or qualifications are fabricated
@@ -63,57 +206,35 @@ def audit_resume_content(generated_content: str, job_details: Dict) -> Dict:
         Return only the JSON response.
         """
 
-        # Hugging Face Inference API call
-        response = requests.post(
-            'https://api-inference.huggingface.co/models/meta-llama/Llama-3.1-8B-Instruct',
-            headers={
-                'Authorization': f'Bearer {HUGGINGFACE_API_KEY}',
-                'Content-Type': 'application/json'
-            },
-            json={
-                'inputs': prompt,
-                'parameters': {
-                    'max_new_tokens': 512,
-                    'temperature': 0.1,
-                    'do_sample': True
-                }
-            },
-            timeout=60
-        )
+        # Identical resume/job pairs are answered from the response cache; replies
+        # without parseable JSON are not cached so the next audit asks again
+        api_response = llm_client.complete(prompt, max_new_tokens=512, temperature=0.1, do_sample=True, timeout=60,
+                                           validate=llm_client.has_json_object)
 
-        if response.status_code == 200:
-            result = response.json()
-            if isinstance(result, list) and result:
-                api_response = result[0].get('generated_text', '').strip()
+        # Extract JSON from response
+        try:
+            # Find JSON in the response
+            start = api_response.find('{')
+            end = api_response.rfind('}') + 1
+            if start != -1 and end != -1:
+                json_str = api_response[start:end]
+                audit_result = json.loads(json_str)
             else:
-                raise Exception("Unexpected API response format")
-
-            # Extract JSON from response
-            try:
-                # Find JSON in the response
-                start = api_response.find('{')
-                end = api_response.rfind('}') + 1
-                if start != -1 and end != -1:
-                    json_str = api_response[start:end]
-                    audit_result = json.loads(json_str)
-                else:
-                    raise ValueError("No JSON found in response")
-
-                logger.info(f"Audit completed: Accuracy {audit_result.get('accuracy_score', 0)}%")
-                return audit_result
-
-            except json.JSONDecodeError as e:
-                logger.error(f"Error parsing audit response: {e}")
-                return {
-                    "accuracy_score": 50,
-                    "hallucinations_detected": ["Unable to parse audit response"],
-                    "missing_skills": [],
-                    "recommendations": ["Manual review required"],
-                    "approved": False
-                }
-        else:
-            logger.error(f"Hugging Face API error: {response.status_code} - {response.text}")
-            raise Exception(f"Failed to audit resume: {response.status_code}")
+                raise ValueError("No JSON found in response")
+
+            audit_result.setdefault('audit_method', 'llm')
+            logger.info(f"Audit completed: Accuracy {audit_result.get('accuracy_score', 0)}%")
+            return audit_result
+
+        except json.JSONDecodeError as e:
+            logger.error(f"Error parsing audit response: {e}")
+            return {
+                "accuracy_score": 50,
+                "hallucinations_detected": ["Unable to parse audit response"],
+                "missing_skills": [],
+                "recommendations": ["Manual review required"],
+                "approved": False
+            }
 
     except requests.RequestException as e:
         logger.error(f"Request error during audit: {e}")
@@ -154,7 +275,7 @@ def audit_resume(resume_data: Dict) -> Dict:
         content = resume_data.get('content', '')
         job_details = {
             'job_title': resume_data.get('job_title', ''),
-            'skills': [],  # This should come from parsed job data
+            'skills': resume_data.get('skills', []),
             'employer_email': resume_data.get('employer_email', '')
         }
 
@@ -0,0 +1,395 @@
+"""
+Embedding Index for Resume/Job Semantic Matching
+
+Job descriptions and resume sections are embedded once with a local CPU
+model and stored in memory-mapped float32 arrays on disk. New or changed
+items are upserted incrementally; unchanged items are never re-embedded,
+so fit scoring becomes a lookup plus one matrix product.
+
+Layout of an index directory:
+- vectors.f32: memory-mapped (capacity x dim) float32 matrix of unit vectors
+- meta.json: model name, dimension and the id/content-hash/embedding order
+  of every row
+- index.lock: flock serializing writers across processes
+
+The index holds at most EMBEDDING_INDEX_MAX_ITEMS rows; beyond that the
+least recently embedded items are evicted.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: writers are only serialized within one process
+    fcntl = None
+
+# Try to import the local embedding model backend
+try:
+    import torch
+    from transformers import AutoTokenizer, AutoModel
+    TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    TRANSFORMERS_AVAILABLE = False
+
+EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2')
+EMBEDDING_INDEX_DIR = os.getenv('EMBEDDING_INDEX_DIR', 'embedding_index')
+EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', '32'))
+EMBEDDING_MAX_TOKENS = int(os.getenv('EMBEDDING_MAX_TOKENS', '256'))
+EMBEDDING_INDEX_MAX_ITEMS = int(os.getenv('EMBEDDING_INDEX_MAX_ITEMS', '20000'))
+INITIAL_CAPACITY = 1024
+
+
+class LocalEmbedder:
+    """Sentence embeddings from a local transformers model, on CPU.
+
+    Mean-pooled token states, L2-normalized. The model is loaded on first
+    use from the Hugging Face cache.
+    """
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL, batch_size: int = EMBEDDING_BATCH_SIZE):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._tokenizer = None
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                logger.info(f"Loading embedding model {self.model_name} on CPU")
+                self._tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+                self._model = AutoModel.from_pretrained(self.model_name).to('cpu').eval()
+
+    @property
+    def dim(self) -> int:
+        self._load()
+        return self._model.config.hidden_size
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        self._load()
+        batches = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = list(texts[start:start + self.batch_size])
+            encoded = self._tokenizer(batch, padding=True, truncation=True,
+                                      max_length=EMBEDDING_MAX_TOKENS, return_tensors='pt')
+            with torch.inference_mode():
+                hidden = self._model(**encoded).last_hidden_state
+            mask = encoded['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+            batches.append(torch.nn.functional.normalize(pooled, dim=1).numpy())
+        return np.vstack(batches).astype(np.float32) if batches else np.zeros((0, self.dim), dtype=np.float32)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class EmbeddingIndex:
+    """Memory-mapped vector store with upserts, top-k search and a size bound.
+
+    Writers in different processes are serialized with an flock on
+    index.lock, and every upsert first reloads meta.json if another process
+    replaced it. Once the index would exceed max_items rows, the least
+    recently embedded items are dropped and the survivors are rewritten to
+    a fresh vectors file, so vectors.f32 and meta.json stay bounded.
+    """
+
+    def __init__(self, path: str, embed: Callable[[Sequence[str]], np.ndarray], dim: int,
+                 model_name: str = EMBEDDING_MODEL, max_items: int = EMBEDDING_INDEX_MAX_ITEMS):
+        self.path = path
+        self.embed = embed
+        self.dim = dim
+        self.model_name = model_name
+        self.max_items = max(1, max_items)
+        self.ids: List[str] = []
+        self.hashes: List[str] = []
+        # Embedding order of each row, for evicting the oldest items
+        self.stamps: List[int] = []
+        self.clock = 0
+        self.rows: Dict[str, int] = {}
+        self._meta_stat = None
+        self._lock = threading.RLock()
+        os.makedirs(path, exist_ok=True)
+        with self._file_lock():
+            self._open()
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.path, 'vectors.f32')
+
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.path, 'meta.json')
+
+    @contextmanager
+    def _file_lock(self, shared: bool = False):
+        """Lock the index directory against other processes (no-op without fcntl)."""
+        with open(os.path.join(self.path, 'index.lock'), 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _stat_meta(self):
+        try:
+            stat = os.stat(self._meta_path)
+        except FileNotFoundError:
+            return None
+        # meta.json is replaced atomically, so a new inode or mtime means another writer
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _open(self):
+        meta = None
+        if os.path.exists(self._meta_path) and os.path.exists(self._vectors_path):
+            with open(self._meta_path, 'r') as f:
+                meta = json.load(f)
+            if meta.get('model') != self.model_name or meta.get('dim') != self.dim:
+                logger.info(f"Embedding index at {self.path} built with another model, rebuilding")
+                meta = None
+
+        if meta is None:
+            self.ids, self.hashes, self.stamps, self.clock = [], [], [], 0
+            self.capacity = INITIAL_CAPACITY
+            self.vectors = np.memmap(self._vectors_path, dtype=np.float32, mode='w+',
+                                     shape=(self.capacity, self.dim))
+            self._save_meta()
+        else:
+            self.ids, self.hashes = meta['ids'], meta['hashes']
+            # Indexes written before eviction existed have no stamps: insertion order
+            self.stamps = meta.get('stamps', list(range(len(self.ids))))
+            self.clock = meta.get('clock', len(self.ids))
+            self.capacity = meta['capacity']
+            self.vectors = np.memmap(self._vectors_path, dtype=np.float32, mode='r+',
+                                     shape=(self.capacity, self.dim))
+            self._meta_stat = self._stat_meta()
+        self.rows = {item_id: row for row, item_id in enumerate(self.ids)}
+
+    def _refresh(self):
+        """Reload the index if another process changed it; call with the file lock held."""
+        if self._stat_meta() != self._meta_stat:
+            del self.vectors
+            self._open()
+
+    def _save_meta(self):
+        tmp_path = self._meta_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'model': self.model_name, 'dim': self.dim, 'capacity': self.capacity,
+                       'ids': self.ids, 'hashes': self.hashes, 'stamps': self.stamps,
+                       'clock': self.clock}, f)
+        os.replace(tmp_path, self._meta_path)
+        self._meta_stat = self._stat_meta()
+
+    def _grow(self, needed: int):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self.capacity:
+            return
+        self.vectors.flush()
+        del self.vectors
+        with open(self._vectors_path, 'r+b') as f:
+            f.truncate(capacity * self.dim * np.dtype(np.float32).itemsize)
+        self.capacity = capacity
+        self.vectors = np.memmap(self._vectors_path, dtype=np.float32, mode='r+',
+                                 shape=(self.capacity, self.dim))
+
+    def _compact(self, keep_ids: set, incoming: int):
+        """Evict the least recently embedded rows so `incoming` new items fit within max_items.
+
+        A quarter of the budget is freed at once so compaction doesn't run
+        on every upsert. Survivors are copied to a new file that replaces
+        vectors.f32, leaving other processes' mappings of the old file intact.
+        """
+        excess = len(self.ids) + incoming - self.max_items
+        if excess <= 0:
+            return
+        excess += self.max_items // 4
+        candidates = sorted((row for row, item_id in enumerate(self.ids) if item_id not in keep_ids),
+                            key=lambda row: self.stamps[row])
+        evicted = set(candidates[:excess])
+        if not evicted:
+            return
+        kept = [row for row in range(len(self.ids)) if row not in evicted]
+
+        tmp_path = self._vectors_path + '.tmp'
+        compacted = np.memmap(tmp_path, dtype=np.float32, mode='w+', shape=(self.capacity, self.dim))
+        compacted[:len(kept)] = self.vectors[kept]
+        compacted.flush()
+        del compacted
+        del self.vectors
+        os.replace(tmp_path, self._vectors_path)
+        self.vectors = np.memmap(self._vectors_path, dtype=np.float32, mode='r+',
+                                 shape=(self.capacity, self.dim))
+
+        self.ids = [self.ids[row] for row in kept]
+        self.hashes = [self.hashes[row] for row in kept]
+        self.stamps = [self.stamps[row] for row in kept]
+        self.rows = {item_id: row for row, item_id in enumerate(self.ids)}
+        logger.info(f"Evicted {len(evicted)} items from {self.path}, {len(self.ids)} remain")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def upsert(self, items: Dict[str, str]) -> List[int]:
+        """Insert or update items (id -> text); return their row numbers.
+
+        Only items that are new or whose text changed are embedded. Row
+        numbers are only stable until the next upsert; use vectors_for() to
+        read vectors consistently.
+        """
+        with self._lock, self._file_lock():
+            self._refresh()
+            stale = []
+            for item_id, text in items.items():
+                row = self.rows.get(item_id)
+                if row is None or self.hashes[row] != content_hash(text):
+                    stale.append(item_id)
+
+            if stale:
+                vectors = self.embed([items[item_id] for item_id in stale])
+                new_ids = [item_id for item_id in stale if item_id not in self.rows]
+                self._compact(set(items), len(new_ids))
+                self._grow(len(self.ids) + len(new_ids))
+                for item_id in new_ids:
+                    self.rows[item_id] = len(self.ids)
+                    self.ids.append(item_id)
+                    self.hashes.append('')
+                    self.stamps.append(0)
+                self.clock += 1
+                for item_id, vector in zip(stale, vectors):
+                    row = self.rows[item_id]
+                    self.vectors[row] = vector
+                    self.hashes[row] = content_hash(items[item_id])
+                    self.stamps[row] = self.clock
+                self.vectors.flush()
+                self._save_meta()
+                logger.info(f"Embedded {len(stale)} of {len(items)} items into {self.path}")
+
+            return [self.rows[item_id] for item_id in items]
+
+    def vectors_for(self, items: Dict[str, str]) -> np.ndarray:
+        """Upsert items and return their vectors, in the order of items."""
+        with self._lock:
+            return self.get(self.upsert(items))
+
+    def get(self, rows: Sequence[int]) -> np.ndarray:
+        """Vectors for the given rows."""
+        with self._lock:
+            return np.asarray(self.vectors[list(rows)])
+
+    def query(self, vector: np.ndarray, k: int = 10) -> List[Tuple[str, float]]:
+        """Top-k (id, cosine similarity) nearest neighbours of a unit vector."""
+        with self._lock, self._file_lock(shared=True):
+            self._refresh()
+            count = len(self.ids)
+            if count == 0:
+                return []
+            scores = np.asarray(self.vectors[:count]) @ vector.astype(np.float32)
+            k = min(k, count)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self.ids[row], float(scores[row])) for row in top]
+
+    def search(self, text: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Top-k nearest neighbours of a text."""
+        return self.query(self.embed([text])[0], k)
+
+
+def job_key(job: Dict) -> str:
+    """Stable id for a job: its id or URL, else a hash of title/company/description."""
+    if job.get('id') or job.get('url'):
+        return str(job.get('id') or job.get('url'))
+    return content_hash('|'.join(str(job.get(field, '')) for field in ('title', 'company', 'description')))
+
+def resume_sections(master_resume: Dict) -> List[str]:
+    """Texts of the resume sections that are matched against jobs."""
+    sections = []
+    if master_resume.get('skills'):
+        sections.append(' '.join(master_resume['skills']))
+    if master_resume.get('summary'):
+        sections.append(str(master_resume['summary']))
+    for entry in master_resume.get('experience', []) + master_resume.get('education', []):
+        if isinstance(entry, dict):
+            sections.append(' '.join(str(value) for value in entry.values() if isinstance(value, str)))
+        elif entry:
+            sections.append(str(entry))
+    if master_resume.get('certifications'):
+        sections.append(' '.join(str(cert) for cert in master_resume['certifications']))
+    return [section for section in sections if section.strip()]
+
+
+_indexes: Dict[str, EmbeddingIndex] = {}
+_embedder: Optional[LocalEmbedder] = None
+_load_error: Optional[Exception] = None
+_indexes_lock = threading.Lock()
+
+def get_index(name: str) -> EmbeddingIndex:
+    """Return the shared on-disk index with the given name ('jobs' or 'resume')."""
+    global _embedder, _load_error
+    with _indexes_lock:
+        if name not in _indexes:
+            if not TRANSFORMERS_AVAILABLE:
+                raise RuntimeError("transformers and torch are required for the embedding index")
+            if _load_error is not None:
+                # Don't retry a model download that already failed in this process
+                raise RuntimeError(f"embedding model unavailable: {_load_error}")
+            try:
+                if _embedder is None:
+                    _embedder = LocalEmbedder()
+                dim = _embedder.dim
+            except Exception as e:
+                _load_error = e
+                raise
+            _indexes[name] = EmbeddingIndex(os.path.join(EMBEDDING_INDEX_DIR, name), _embedder,
+                                            dim, _embedder.model_name)
+        return _indexes[name]
+
+def set_index(name: str, index: EmbeddingIndex):
+    """Replace a shared index."""
+    with _indexes_lock:
+        _indexes[name] = index
+
+def semantic_similarity_scores(master_resume: Dict, jobs: List[Dict]) -> np.ndarray:
+    """Best cosine similarity of each job description to any resume section, as percentages.
+
+    Jobs without a description score 0. Resume sections are keyed by their
+    content hash, so an unchanged resume is never re-embedded.
+    """
+    scores = np.zeros(len(jobs))
+    present = [i for i, job in enumerate(jobs) if job.get('description')]
+    sections = resume_sections(master_resume)
+    if not present or not sections:
+        return scores
+
+    resume_index = get_index('resume')
+    job_index = get_index('jobs')
+    section_vectors = resume_index.vectors_for({content_hash(text): text for text in sections})
+    job_descriptions = {job_key(jobs[i]): jobs[i]['description'] for i in present}
+    job_vectors = job_index.vectors_for(job_descriptions)
+    # Jobs sharing a key (e.g. the same URL) share one vector
+    positions = {key: position for position, key in enumerate(job_descriptions)}
+    job_vectors = job_vectors[[positions[job_key(jobs[i])] for i in present]]
+
+    similarity = (job_vectors @ section_vectors.T).max(axis=1)
+    scores[present] = np.clip(similarity, 0.0, 1.0) * 100
+    return scores
@@ -0,0 +1,633 @@
+"""
+Shared LLM Client
+
+Single gateway for the Llama 3.1 calls made by resume generation, resume
+audits, document selection and the conversational assistant.
+Completions are cached persistently, keyed by a hash of backend model,
+prompt and generation parameters, so identical prompts (e.g. repeated
+audits of the same resume) are answered from disk. Callers can pass a
+validator so malformed replies (e.g. audits without parseable JSON) are
+returned but not cached.
+
+The cache stores prompts' completions in plain text at LLM_CACHE_PATH for
+up to LLM_CACHE_TTL seconds. Generated resumes carry the master resume's
+personal details, so the file is personal data under POPIA: keep it on the
+service's private volume and clear it (ResponseCache.clear) as part of a
+data deletion. Conversational replies are not cached (use_cache=False).
+
+Calls that miss the cache are:
+- coalesced: identical requests already in flight share one backend call
+- capped: at most LLM_MAX_CONCURRENCY backend calls run at once; the rest
+  queue (up to LLM_QUEUE_TIMEOUT, or the backend's own timeout if longer)
+  instead of hammering the endpoint
+- retried: 429/503 ("model loading"), full queues and connection errors are retried
+  with jittered exponential backoff, honouring Retry-After/estimated_time
+- measured: latency, attempts and approximate token counts per call
+
+Backends (LLM_BACKEND):
+- huggingface: Hugging Face Inference API (default)
+- local: small instruct model run on CPU with transformers/torch, int8
+  dynamically quantized; concurrent prompts are micro-batched into one
+  generate() call. Lower quality than Llama 3.1 8B but no network
+  dependency; raise LLM_MAX_CONCURRENCY to at least LLM_LOCAL_BATCH_SIZE
+  so batches can fill
+- stub: deterministic local responses, never touches the network; for
+  tests and offline runs
+"""
+
+import os
+import json
+import time
+import random
+import sqlite3
+import hashlib
+import logging
+import threading
+from queue import Queue, Empty
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Callable, Dict, List, Optional
+
+import requests
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Try to import the local inference backend
+try:
+    import torch
+    from transformers import AutoTokenizer, AutoModelForCausalLM
+    TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    TRANSFORMERS_AVAILABLE = False
+
+HUGGINGFACE_API_KEY = os.getenv('HUGGINGFACE_API_KEY')
+LLM_BACKEND = os.getenv('LLM_BACKEND', 'huggingface')
+LLM_MODEL = os.getenv('LLM_MODEL', 'meta-llama/Llama-3.1-8B-Instruct')
+HF_INFERENCE_URL = 'https://api-inference.huggingface.co/models/{model}'
+
+LLM_LOCAL_MODEL = os.getenv('LLM_LOCAL_MODEL', 'Qwen/Qwen2.5-0.5B-Instruct')
+LLM_LOCAL_QUANTIZE = os.getenv('LLM_LOCAL_QUANTIZE', 'true').lower() == 'true'
+LLM_LOCAL_BATCH_SIZE = int(os.getenv('LLM_LOCAL_BATCH_SIZE', '4'))
+LLM_LOCAL_BATCH_WAIT_MS = float(os.getenv('LLM_LOCAL_BATCH_WAIT_MS', '50'))
+LLM_LOCAL_MAX_NEW_TOKENS = int(os.getenv('LLM_LOCAL_MAX_NEW_TOKENS', '1024'))
+# CPU generation is far slower than the HTTP timeouts the call sites pass
+LLM_LOCAL_TIMEOUT = float(os.getenv('LLM_LOCAL_TIMEOUT', '600'))
+LLM_LOCAL_THREADS = int(os.getenv('LLM_LOCAL_THREADS', '0'))
+
+LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH', 'llm_cache.db')
+LLM_CACHE_TTL_SECONDS = int(os.getenv('LLM_CACHE_TTL', str(7 * 24 * 60 * 60)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '5000'))
+LLM_CACHE_MAX_BYTES = int(os.getenv('LLM_CACHE_MAX_BYTES', str(100 * 1024 * 1024)))
+
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '4'))
+LLM_QUEUE_TIMEOUT = float(os.getenv('LLM_QUEUE_TIMEOUT', '120'))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '4'))
+LLM_BACKOFF_BASE = float(os.getenv('LLM_BACKOFF_BASE', '1'))
+LLM_BACKOFF_MAX = float(os.getenv('LLM_BACKOFF_MAX', '30'))
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """Non-success response from an LLM backend."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.status_code in RETRYABLE_STATUS_CODES
+
+
+class HuggingFaceBackend:
+    """Hugging Face Inference API text generation."""
+
+    name = 'huggingface'
+
+    def __init__(self, api_key: Optional[str] = HUGGINGFACE_API_KEY, model: str = LLM_MODEL):
+        self.api_key = api_key
+        self.model = model
+        self.session = requests.Session()
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    def generate(self, prompt: str, params: Dict, timeout: float) -> str:
+        if not self.api_key:
+            raise LLMError("HUGGINGFACE_API_KEY is required")
+        response = self.session.post(
+            HF_INFERENCE_URL.format(model=self.model),
+            headers={
+                'Authorization': f'Bearer {self.api_key}',
+                'Content-Type': 'application/json'
+            },
+            json={'inputs': prompt, 'parameters': params},
+            timeout=timeout
+        )
+        if response.status_code != 200:
+            logger.error(f"Hugging Face API error: {response.status_code} - {response.text}")
+            raise LLMError(f"Hugging Face API error: {response.status_code}", response.status_code,
+                           self._retry_after(response))
+        result = response.json()
+        if isinstance(result, list) and result:
+            return result[0].get('generated_text', '').strip()
+        raise LLMError("Unexpected API response format")
+
+    @staticmethod
+    def _retry_after(response) -> Optional[float]:
+        """Server hint for when to retry: Retry-After, or estimated_time while a model loads."""
+        try:
+            return float(response.headers['Retry-After'])
+        except (KeyError, TypeError, ValueError):
+            pass
+        try:
+            return float(response.json().get('estimated_time'))
+        except (ValueError, TypeError, AttributeError):
+            return None
+
+
+class StubBackend:
+    """Deterministic offline backend.
+
+    `responder(prompt, params)` supplies completions; by default prompts
+    that ask for JSON get "{}" and anything else a fixed placeholder.
+    """
+
+    name = 'stub'
+    model = 'stub'
+    configured = True
+
+    def __init__(self, responder: Optional[Callable[[str, Dict], str]] = None):
+        self.responder = responder
+        self.calls = 0
+
+    def generate(self, prompt: str, params: Dict, timeout: float) -> str:
+        self.calls += 1
+        if self.responder:
+            return self.responder(prompt, params)
+        return '{}' if 'JSON' in prompt else 'Stub response (LLM_BACKEND=stub)'
+
+
+class LocalBackend:
+    """Text generation with a local causal LM on CPU.
+
+    generate() enqueues the prompt and blocks; a single worker thread drains
+    the queue, waiting up to LLM_LOCAL_BATCH_WAIT_MS for up to
+    LLM_LOCAL_BATCH_SIZE prompts, and runs each group of prompts with
+    identical generation parameters through one left-padded generate()
+    call. The model is loaded on first use from the Hugging Face cache.
+    """
+
+    name = 'local'
+
+    def __init__(self, model: str = LLM_LOCAL_MODEL, quantize: bool = LLM_LOCAL_QUANTIZE,
+                 batch_size: int = LLM_LOCAL_BATCH_SIZE, batch_wait_ms: float = LLM_LOCAL_BATCH_WAIT_MS,
+                 max_new_tokens: int = LLM_LOCAL_MAX_NEW_TOKENS, timeout: float = LLM_LOCAL_TIMEOUT):
+        self.model = model
+        self.quantize = quantize
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = batch_wait_ms / 1000
+        self.max_new_tokens = max_new_tokens
+        self.timeout = timeout
+        self.batches = 0
+        self._tokenizer = None
+        self._model = None
+        self._queue: Queue = Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+    @property
+    def configured(self) -> bool:
+        return TRANSFORMERS_AVAILABLE
+
+    def _load(self):
+        with self._lock:
+            if self._model is not None:
+                return
+            logger.info(f"Loading local LLM {self.model} on CPU (quantize={self.quantize})")
+            if LLM_LOCAL_THREADS:
+                torch.set_num_threads(LLM_LOCAL_THREADS)
+            tokenizer = AutoTokenizer.from_pretrained(self.model, padding_side='left')
+            if tokenizer.pad_token is None:
+                tokenizer.pad_token = tokenizer.eos_token
+            model = AutoModelForCausalLM.from_pretrained(self.model, torch_dtype=torch.float32).to('cpu').eval()
+            if self.quantize:
+                model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            self._tokenizer, self._model = tokenizer, model
+
+    def _format(self, prompt: str) -> str:
+        """Wrap the prompt in the model's chat template, if it has one."""
+        if getattr(self._tokenizer, 'chat_template', None):
+            return self._tokenizer.apply_chat_template(
+                [{'role': 'user', 'content': prompt.strip()}], tokenize=False, add_generation_prompt=True)
+        return prompt
+
+    def _generate_batch(self, prompts: List[str], params: Dict) -> List[str]:
+        self._load()
+        encoded = self._tokenizer([self._format(prompt) for prompt in prompts],
+                                  padding=True, return_tensors='pt')
+        kwargs = {
+            'max_new_tokens': min(int(params.get('max_new_tokens', 512)), self.max_new_tokens),
+            'do_sample': bool(params.get('do_sample', False)),
+            'pad_token_id': self._tokenizer.pad_token_id
+        }
+        if kwargs['do_sample']:
+            kwargs['temperature'] = float(params.get('temperature', 0.7))
+        with torch.inference_mode():
+            output = self._model.generate(**encoded, **kwargs)
+        # Left padding puts every prompt's end at the same column
+        completions = output[:, encoded['input_ids'].shape[1]:]
+        return [text.strip() for text in self._tokenizer.batch_decode(completions, skip_special_tokens=True)]
+
+    def _collect_batch(self) -> List[tuple]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            groups: Dict[str, List[tuple]] = {}
+            for item in self._collect_batch():
+                # Skip prompts whose caller has already given up waiting
+                if item[3].set_running_or_notify_cancel():
+                    groups.setdefault(item[2], []).append(item)
+            for items in groups.values():
+                try:
+                    completions = self._generate_batch([item[0] for item in items], items[0][1])
+                    self.batches += 1
+                    for item, completion in zip(items, completions):
+                        item[3].set_result(completion)
+                except Exception as e:
+                    logger.error(f"Local generation failed for batch of {len(items)}: {e}")
+                    for item in items:
+                        item[3].set_exception(LLMError(f"Local generation failed: {e}"))
+
+    def generate(self, prompt: str, params: Dict, timeout: float) -> str:
+        """Queue the prompt for the next batch; the HTTP-style timeout is replaced by LLM_LOCAL_TIMEOUT."""
+        if not TRANSFORMERS_AVAILABLE:
+            raise LLMError("transformers and torch are required for LLM_BACKEND=local")
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name='local-llm-batcher', daemon=True)
+                self._worker.start()
+        future: Future = Future()
+        self._queue.put((prompt, params, json.dumps(params, sort_keys=True), future))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            # Still queued: cancel so the worker drops it instead of generating for nobody
+            future.cancel()
+            raise LLMError(f"Local generation exceeded {self.timeout:.0f}s")
+
+
+class ResponseCache:
+    """Persistent prompt -> completion cache in SQLite with TTL and LRU eviction."""
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl_seconds: int = LLM_CACHE_TTL_SECONDS,
+                 max_entries: int = LLM_CACHE_MAX_ENTRIES, max_bytes: int = LLM_CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    completion TEXT NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS llm_cache_last_accessed ON llm_cache (last_accessed)')
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(model: str, prompt: str, params: Dict) -> str:
+        payload = json.dumps({'model': model, 'prompt': prompt, 'params': params}, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        try:
+            with self._conn() as conn:
+                row = conn.execute('SELECT completion, created_at FROM llm_cache WHERE key = ?', (key,)).fetchone()
+                if row is None:
+                    return None
+                if now - row[1] > self.ttl_seconds:
+                    conn.execute('DELETE FROM llm_cache WHERE key = ?', (key,))
+                    return None
+                conn.execute('UPDATE llm_cache SET last_accessed = ? WHERE key = ?', (now, key))
+                return row[0]
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache lookup failed: {e}")
+            return None
+
+    def set(self, key: str, model: str, completion: str):
+        size = len(completion.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            with self._conn() as conn:
+                conn.execute('''
+                    INSERT INTO llm_cache (key, model, completion, size_bytes, created_at, last_accessed)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET completion = excluded.completion,
+                        size_bytes = excluded.size_bytes, created_at = excluded.created_at,
+                        last_accessed = excluded.last_accessed
+                ''', (key, model, completion, size, now, now))
+                self._evict(conn, now)
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache store failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """Drop expired entries, then least recently used ones until within budget."""
+        conn.execute('DELETE FROM llm_cache WHERE created_at < ?', (now - self.ttl_seconds,))
+        count, total_bytes = conn.execute('SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM llm_cache').fetchone()
+        if count <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+        rows = conn.execute('SELECT key, size_bytes FROM llm_cache ORDER BY last_accessed ASC').fetchall()
+        evicted = []
+        for key, size in rows:
+            if count <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            evicted.append((key,))
+            count -= 1
+            total_bytes -= size
+        conn.executemany('DELETE FROM llm_cache WHERE key = ?', evicted)
+
+    def clear(self):
+        with self._conn() as conn:
+            conn.execute('DELETE FROM llm_cache')
+
+    def stats(self) -> Dict:
+        count, total_bytes = self._conn().execute(
+            'SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM llm_cache').fetchone()
+        return {'entries': count, 'bytes': total_bytes}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token); the inference API reports none."""
+    return (len(text) + 3) // 4
+
+
+class LLMMetrics:
+    """Thread-safe counters and recent latencies for backend calls."""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.counters = {
+            'requests': 0, 'cache_hits': 0, 'coalesced': 0, 'backend_calls': 0,
+            'retries': 0, 'errors': 0, 'prompt_tokens': 0, 'completion_tokens': 0
+        }
+        self.in_flight = 0
+
+    def incr(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def call_started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def call_finished(self, latency: float, prompt: str, completion: Optional[str]):
+        with self._lock:
+            self.in_flight -= 1
+            self.counters['backend_calls'] += 1
+            self.counters['prompt_tokens'] += estimate_tokens(prompt)
+            if completion is None:
+                self.counters['errors'] += 1
+            else:
+                self.counters['completion_tokens'] += estimate_tokens(completion)
+            self._latencies.append(latency)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            snapshot = dict(self.counters, in_flight=self.in_flight)
+        if latencies:
+            snapshot.update({
+                'latency_avg': sum(latencies) / len(latencies),
+                'latency_p50': latencies[len(latencies) // 2],
+                'latency_p95': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+                'latency_max': latencies[-1]
+            })
+        return snapshot
+
+
+class LLMClient:
+    """Cached, coalesced, rate-capped and retried text generation on top of a backend."""
+
+    def __init__(self, backend, cache: Optional[ResponseCache] = None,
+                 max_concurrency: int = LLM_MAX_CONCURRENCY, max_retries: int = LLM_MAX_RETRIES,
+                 queue_timeout: float = LLM_QUEUE_TIMEOUT):
+        self.backend = backend
+        self.cache = cache
+        self.max_retries = max_retries
+        self.queue_timeout = queue_timeout
+        self.metrics = LLMMetrics()
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrency))
+        self._in_flight: Dict[str, Future] = {}
+        self._in_flight_lock = threading.Lock()
+
+    @property
+    def configured(self) -> bool:
+        return self.backend.configured
+
+    @property
+    def model_id(self) -> str:
+        return f"{self.backend.name}:{self.backend.model}"
+
+    def complete(self, prompt: str, max_new_tokens: int = 512, temperature: float = 0.7,
+                 do_sample: bool = True, timeout: float = 60, use_cache: bool = True,
+                 validate: Optional[Callable[[str], bool]] = None, **params) -> str:
+        """Generate a completion for prompt, served from the cache when possible.
+
+        With use_cache=False the call neither reads nor writes the cache and
+        is not coalesced with identical in-flight requests. Completions for
+        which validate(completion) is false are returned but not cached.
+        """
+        params = {'max_new_tokens': max_new_tokens, 'temperature': temperature, 'do_sample': do_sample, **params}
+        self.metrics.incr('requests')
+        if not use_cache:
+            return self._generate(prompt, params, timeout)
+
+        key = ResponseCache.make_key(self.model_id, prompt, params)
+        if self.cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.metrics.incr('cache_hits')
+                logger.info(f"LLM cache hit ({key[:12]})")
+                return cached
+
+        with self._in_flight_lock:
+            shared = self._in_flight.get(key)
+            if shared is None:
+                future = self._in_flight[key] = Future()
+        if shared is not None:
+            self.metrics.incr('coalesced')
+            return shared.result()
+
+        try:
+            completion = self._generate(prompt, params, timeout)
+            if self.cache and completion:
+                if validate is None or validate(completion):
+                    self.cache.set(key, self.model_id, completion)
+                else:
+                    logger.warning(f"LLM completion failed validation, not caching ({key[:12]})")
+            future.set_result(completion)
+            return completion
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._in_flight_lock:
+                del self._in_flight[key]
+
+    def _queue_wait(self, timeout: float) -> float:
+        """How long a call may wait for a slot: at least one backend call's timeout.
+
+        A slot frees up within one backend timeout, so waiting less would
+        fail calls that are only queued behind slow ones (the local backend
+        runs for up to LLM_LOCAL_TIMEOUT, not the caller's HTTP timeout).
+        """
+        return max(self.queue_timeout, getattr(self.backend, 'timeout', timeout))
+
+    def _attempt(self, prompt: str, params: Dict, timeout: float, attempt: int) -> str:
+        """One backend call under the concurrency cap; a full queue is a retryable 503."""
+        queue_wait = self._queue_wait(timeout)
+        if not self._slots.acquire(timeout=queue_wait):
+            self.metrics.incr('errors')
+            raise LLMError(f"LLM queue wait exceeded {queue_wait:.0f}s", 503)
+        self.metrics.call_started()
+        started = time.monotonic()
+        completion = None
+        try:
+            completion = self.backend.generate(prompt, params, timeout)
+            return completion
+        finally:
+            latency = time.monotonic() - started
+            self._slots.release()
+            self.metrics.call_finished(latency, prompt, completion)
+            logger.info(f"LLM call {self.model_id} attempt {attempt + 1}: {latency * 1000:.0f}ms, "
+                        f"~{estimate_tokens(prompt)} prompt / ~{estimate_tokens(completion or '')} completion tokens")
+
+    def _generate(self, prompt: str, params: Dict, timeout: float) -> str:
+        """Backend call under the concurrency cap, retried on transient failures."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self._attempt(prompt, params, timeout, attempt)
+            except LLMError as e:
+                if not e.retryable or attempt == self.max_retries:
+                    raise
+                error = e
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries:
+                    raise
+                error = e
+
+            # Sleep outside the concurrency slot so queued calls can proceed
+            delay = self._backoff(attempt, getattr(error, 'retry_after', None))
+            self.metrics.incr('retries')
+            logger.warning(f"LLM call failed ({error}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+    @staticmethod
+    def _backoff(attempt: int, retry_after: Optional[float]) -> float:
+        """Exponential backoff with equal jitter; server hints set the floor."""
+        ceiling = min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * (2 ** attempt))
+        delay = ceiling / 2 + random.uniform(0, ceiling / 2)
+        if retry_after:
+            delay = max(delay, min(retry_after, LLM_BACKOFF_MAX))
+        return delay
+
+
+def make_backend(name: str = LLM_BACKEND):
+    if name == 'stub':
+        return StubBackend()
+    if name == 'local':
+        if not TRANSFORMERS_AVAILABLE:
+            logger.error("LLM_BACKEND=local requires transformers and torch")
+        return LocalBackend()
+    if name != 'huggingface':
+        logger.warning(f"Unknown LLM_BACKEND '{name}', using huggingface")
+    return HuggingFaceBackend()
+
+
+_client: Optional[LLMClient] = None
+_client_lock = threading.Lock()
+
+def get_llm_client() -> LLMClient:
+    """Process-wide client for the configured backend (created on first use)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient(make_backend(), ResponseCache())
+        return _client
+
+def set_llm_client(client: Optional[LLMClient]):
+    """Replace the shared client, e.g. with a stub backend in tests."""
+    global _client
+    with _client_lock:
+        _client = client
+
+def credentials_available() -> bool:
+    """Whether the configured backend can be called (only the HF backend needs a key)."""
+    return LLM_BACKEND != 'huggingface' or bool(HUGGINGFACE_API_KEY)
+
+def require_credentials():
+    """Fail fast at import time when the configured backend has no credentials."""
+    if not credentials_available():
+        logger.error("HUGGINGFACE_API_KEY not found in environment variables")
+        raise ValueError("HUGGINGFACE_API_KEY is required")
+
+def has_json_object(completion: str) -> bool:
+    """Validator for prompts that ask for a JSON object: the outermost {...} must parse."""
+    start = completion.find('{')
+    end = completion.rfind('}') + 1
+    if start == -1 or end <= start:
+        return False
+    try:
+        return isinstance(json.loads(completion[start:end]), dict)
+    except ValueError:
+        return False
+
+def complete(prompt: str, **kwargs) -> str:
+    return get_llm_client().complete(prompt, **kwargs)
+
+def metrics() -> Dict:
+    """Metrics of the shared client, plus response cache size."""
+    client = get_llm_client()
+    snapshot = client.metrics.snapshot()
+    if client.cache:
+        snapshot['cache'] = client.cache.stats()
+    return snapshot
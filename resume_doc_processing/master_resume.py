@@ -0,0 +1,173 @@
+"""
+Master Resume Cache
+
+master_resume.json is parsed once per change on disk instead of on every
+resume generation, audit and fit-score call. The file is re-read only when
+its mtime or size changes, and re-parsed only when its content hash does.
+
+Scorers work from MasterResumeViews, which holds the parsed resume plus
+derived views computed once per resume version:
+- skills: lowercased skill set (keyword matching)
+- skill_text: skills joined into one string (similarity scoring)
+- tfidf: vectorizer fitted on the skills and the normalized skill vector,
+  so jobs are only transformed, never refitted
+Other modules can memoize their own views with MasterResumeViews.derive().
+Views for resumes that don't come from the file (uploaded or test data)
+are kept in a small LRU keyed by a content fingerprint.
+
+load_master_resume() returns the shared parsed dict; callers that modify
+it must copy it first.
+"""
+
+import os
+import copy
+import json
+import math
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from functools import cached_property
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MASTER_RESUME_PATH = (os.getenv('MASTER_RESUME_PATH')
+                      or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'master_resume.json'))
+VIEWS_CACHE_SIZE = int(os.getenv('MASTER_RESUME_VIEWS_CACHE_SIZE', '32'))
+
+
+def iter_strings(value) -> Iterator[str]:
+    """All string leaves of a JSON value."""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from iter_strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from iter_strings(item)
+
+def fingerprint(resume: Dict) -> str:
+    return hashlib.sha256(json.dumps(resume, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class MasterResumeViews:
+    """A parsed resume and the views derived from it. Treat as read-only."""
+
+    def __init__(self, data: Dict):
+        self.data = data
+        skills = [str(skill) for skill in data.get('skills', [])]
+        self.skills = frozenset(skill.lower() for skill in skills)
+        self.skill_text = ' '.join(skills)
+        self._derived: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    @cached_property
+    def tfidf(self) -> Optional[Dict]:
+        """TF-IDF vectorizer fitted on the skills and the L2-normalized skill vector.
+
+        Returns None when the skills have no indexable terms. The IDF is
+        fitted on the skills alone: fitting it on the other resume sections
+        down-weights the candidate's core terms, which recur in every
+        section, and ranked on-field jobs below unrelated ones. `unseen_idf`
+        is the IDF of a term outside the skills, used to weight job terms
+        outside the vocabulary, as a refit on the resume plus the job would.
+        """
+        if not self.skill_text.strip():
+            return None
+        vectorizer = TfidfVectorizer(stop_words='english', norm=None)
+        try:
+            vectorizer.fit([self.skill_text])
+        except ValueError:
+            # Only stop words in the skills
+            return None
+        vector = vectorizer.transform([self.skill_text])
+        norm = math.sqrt(vector.multiply(vector).sum())
+        if not norm:
+            return None
+        return {
+            'vectorizer': vectorizer,
+            'analyzer': vectorizer.build_analyzer(),
+            'vector': (vector / norm).tocsr(),
+            'unseen_idf': math.log(2) + 1
+        }
+
+    def derive(self, name: str, builder: Callable[[Dict], Any]) -> Any:
+        """builder(data), computed once per resume version and cached under name."""
+        with self._lock:
+            if name not in self._derived:
+                self._derived[name] = builder(self.data)
+            return self._derived[name]
+
+
+_views: 'OrderedDict[str, MasterResumeViews]' = OrderedDict()
+# path -> (mtime_ns, size, content sha256, views)
+_files: Dict[str, Tuple[int, int, str, MasterResumeViews]] = {}
+_lock = threading.Lock()
+
+def _remember(key: str, views: MasterResumeViews):
+    _views[key] = views
+    _views.move_to_end(key)
+    while len(_views) > VIEWS_CACHE_SIZE:
+        _views.popitem(last=False)
+
+def views_for(resume: Dict) -> MasterResumeViews:
+    """Views of an in-memory resume, memoized by content."""
+    with _lock:
+        # The dict handed out by load_master_resume() needs no fingerprint
+        for cached in _files.values():
+            if cached[3].data is resume:
+                return cached[3]
+    key = fingerprint(resume)
+    with _lock:
+        views = _views.get(key)
+        if views is not None:
+            _views.move_to_end(key)
+            return views
+    views = MasterResumeViews(copy.deepcopy(resume))
+    with _lock:
+        _remember(key, views)
+    return views
+
+def master_resume_views(path: str = MASTER_RESUME_PATH) -> MasterResumeViews:
+    """Views of the master resume file, reloaded only when the file changes."""
+    try:
+        stat = os.stat(path)
+        with _lock:
+            cached = _files.get(path)
+        if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[3]
+
+        with open(path, 'rb') as f:
+            raw = f.read()
+        content_hash = hashlib.sha256(raw).hexdigest()
+        if cached and cached[2] == content_hash:
+            views = cached[3]
+        else:
+            views = MasterResumeViews(json.loads(raw))
+            logger.info(f"Loaded master resume from {path}")
+        with _lock:
+            _files[path] = (stat.st_mtime_ns, stat.st_size, content_hash, views)
+            # Copies of the master resume map back to these views
+            _remember(fingerprint(views.data), views)
+        return views
+    except FileNotFoundError:
+        logger.error("master_resume.json not found")
+        raise
+    except json.JSONDecodeError as e:
+        logger.error(f"Error parsing master_resume.json: {e}")
+        raise
+
+def load_master_resume(path: str = MASTER_RESUME_PATH) -> Dict:
+    """The master resume as a dict, shared between callers: do not modify it."""
+    return master_resume_views(path).data
+
+def clear_cache():
+    with _lock:
+        _views.clear()
+        _files.clear()
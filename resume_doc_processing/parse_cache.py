@@ -0,0 +1,134 @@
+"""
+Resume Parse Cache
+
+Content-addressed cache of anonymized resume parses. Entries are keyed by
+the SHA-256 of the uploaded file bytes and the parser version, so
+re-uploading the same CV returns the stored result without touching
+pdfplumber/python-docx. The parser version combines
+resume_parser.PARSER_VERSION with hashes of the parser and POPIA anonymizer
+sources, so any change to either invalidates old entries without a manual
+flush.
+
+Raw (non-anonymized) parses hold names, emails and phone numbers and are
+never cached: the key carries no user id, so POPIA deletion requests could
+not find them.
+"""
+
+import os
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import BinaryIO, Dict, Optional
+
+from pymongo import MongoClient, ASCENDING
+from pymongo.errors import PyMongoError
+
+from resume_doc_processing import resume_parser
+
+try:
+    from compliance_monitoring_testing import popia_compliance
+except ImportError:
+    popia_compliance = None
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PARSE_CACHE_TTL_DAYS = int(os.getenv('RESUME_PARSE_CACHE_TTL_DAYS', '30'))
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _source_hash(module) -> str:
+    if module is None:
+        return 'none'
+    with open(module.__file__, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+def _parser_version() -> str:
+    return f"{resume_parser.PARSER_VERSION}-{_source_hash(resume_parser)}-popia-{_source_hash(popia_compliance)}"
+
+PARSER_VERSION = _parser_version()
+
+
+def content_hash(stream: BinaryIO) -> str:
+    """SHA-256 of a binary stream, read in chunks."""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+def file_hash(file_path: str) -> str:
+    with open(file_path, 'rb') as f:
+        return content_hash(f)
+
+
+class ParseCache:
+    """Parsed resumes in the resume_parse_cache collection.
+
+    Documents are identified by content hash, parser version and anonymize
+    flag; a TTL index on expires_at drops entries that are no longer hit,
+    including those left behind by older parser versions. Only anonymized
+    parses are stored; lookups and stores with anonymize=False are no-ops.
+    """
+
+    def __init__(self, collection=None, parser_version: str = PARSER_VERSION,
+                 ttl_days: int = PARSE_CACHE_TTL_DAYS):
+        if collection is None:
+            mongodb_uri = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
+            database_name = os.getenv('MONGODB_DATABASE', 'job_application_agent')
+            client = MongoClient(mongodb_uri, serverSelectionTimeoutMS=5000)
+            collection = client[database_name].resume_parse_cache
+        self.collection = collection
+        self.parser_version = parser_version
+        self.ttl_days = ttl_days
+        self._indexes_ready = False
+
+    def _ensure_indexes(self):
+        if self._indexes_ready:
+            return
+        self.collection.create_index([('expires_at', ASCENDING)], expireAfterSeconds=0)
+        self._indexes_ready = True
+
+    def key(self, sha256: str, anonymize: bool) -> str:
+        return f"{sha256}:{self.parser_version}:{'anon' if anonymize else 'raw'}"
+
+    def get(self, sha256: str, anonymize: bool) -> Optional[Dict]:
+        if not anonymize:
+            return None
+        try:
+            self._ensure_indexes()
+            doc = self.collection.find_one_and_update(
+                {'_id': self.key(sha256, anonymize), 'expires_at': {'$gt': datetime.utcnow()}},
+                {'$set': {'expires_at': datetime.utcnow() + timedelta(days=self.ttl_days)}}
+            )
+            return doc['parsed_data'] if doc else None
+        except PyMongoError as e:
+            logger.warning(f"Parse cache lookup failed: {e}")
+            return None
+
+    def set(self, sha256: str, anonymize: bool, parsed_resume: Dict):
+        """Store an anonymized parse result; raw and failed parses are not cached."""
+        if not anonymize or 'error' in parsed_resume:
+            return
+        try:
+            self._ensure_indexes()
+            self.collection.replace_one(
+                {'_id': self.key(sha256, anonymize)},
+                {
+                    'content_hash': sha256,
+                    'parser_version': self.parser_version,
+                    'anonymized': anonymize,
+                    'parsed_data': parsed_resume,
+                    'expires_at': datetime.utcnow() + timedelta(days=self.ttl_days)
+                },
+                upsert=True
+            )
+        except PyMongoError as e:
+            logger.warning(f"Parse cache store failed: {e}")
+
+    async def aget(self, sha256: str, anonymize: bool) -> Optional[Dict]:
+        return await asyncio.to_thread(self.get, sha256, anonymize)
+
+    async def aset(self, sha256: str, anonymize: bool, parsed_resume: Dict):
+        await asyncio.to_thread(self.set, sha256, anonymize, parsed_resume)
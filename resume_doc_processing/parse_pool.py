@@ -0,0 +1,110 @@
+"""
+Resume Parse Pool
+
+Bounded process pool for CPU-bound resume parsing in the async services.
+pdfplumber/python-docx extraction, the section regexes and POPIA
+anonymization hold the GIL, so running them in the FastAPI event loop (or
+its default thread pool) stalls every other request. Work is admitted up to
+the number of workers plus a fixed-length wait queue; beyond that callers
+get ParseQueueFull with a Retry-After estimate so clients back off instead
+of piling up.
+"""
+
+import os
+import math
+import time
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PARSE_WORKERS = int(os.getenv('RESUME_UPLOAD_WORKERS', str(min(4, os.cpu_count() or 1))))
+PARSE_QUEUE_LIMIT = int(os.getenv('RESUME_UPLOAD_QUEUE_LIMIT', '16'))
+# Seed for the Retry-After estimate until real parse times are observed
+PARSE_SECONDS_ESTIMATE = float(os.getenv('RESUME_PARSE_SECONDS_ESTIMATE', '2'))
+
+
+class ParseQueueFull(Exception):
+    """Raised when every worker is busy and the wait queue is full."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Resume parser is busy, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class ParsePool:
+    """Process pool with admission control and a moving parse-time average."""
+
+    def __init__(self, workers: int = PARSE_WORKERS, queue_limit: int = PARSE_QUEUE_LIMIT):
+        self.workers = max(1, workers)
+        self.queue_limit = max(0, queue_limit)
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.in_flight = 0
+        self.avg_seconds = PARSE_SECONDS_ESTIMATE
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_limit
+
+    def start(self):
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            logger.info(f"Started resume parse pool ({self.workers} workers, queue {self.queue_limit})")
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to free up, based on queue depth."""
+        waves = (self.in_flight - self.workers + 1) / self.workers
+        return max(1, math.ceil(self.avg_seconds * max(waves, 1)))
+
+    def check_capacity(self):
+        """Raise ParseQueueFull if a parse could not be admitted right now.
+
+        Does not reserve anything; used to turn requests away before their
+        body is read, ahead of the real reservation in slot().
+        """
+        if self.in_flight >= self.capacity:
+            raise ParseQueueFull(self.retry_after())
+
+    @contextmanager
+    def slot(self):
+        """Reserve capacity for one parse; raises ParseQueueFull when saturated."""
+        self.check_capacity()
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """Run func(*args) in a worker process.
+
+        Falls back to a thread when the pool was never started (e.g. the app
+        is used without its startup events, as in the unit tests).
+        """
+        started = time.monotonic()
+        try:
+            if self.executor is None:
+                return await asyncio.to_thread(func, *args)
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM on a huge PDF); replace the pool for later requests
+            logger.error("Resume parse worker crashed, restarting pool")
+            self.shutdown()
+            self.start()
+            raise
+        finally:
+            self.avg_seconds = 0.8 * self.avg_seconds + 0.2 * (time.monotonic() - started)
+
+
+parse_pool = ParsePool()
@@ -1,6 +1,8 @@
+import os
 import spacy
 import re
 import logging
+from typing import Dict, Iterable, Iterator
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -13,37 +15,53 @@ except OSError:
     logger.error("spaCy model 'en_core_web_sm' not found. Run 'python -m spacy download en_core_web_sm'")
     raise
 
+# Batch parsing configuration
+PARSE_BATCH_SIZE = int(os.getenv('EMAIL_PARSE_BATCH_SIZE', '256'))
+PARSE_N_PROCESS = int(os.getenv('EMAIL_PARSE_N_PROCESS', '1'))
+
+# Skill extraction only needs POS tags, so skip the expensive components
+DISABLED_PIPES = ['ner', 'lemmatizer', 'parser']
+
+def email_text(email_dict):
+    """Text of an email that is run through the spaCy pipeline."""
+    return (email_dict.get('body') or '') + ' ' + (email_dict.get('subject') or '')
+
+def build_parsed_job(email_dict, text, doc):
+    """Build a parsed job record from an email and its spaCy doc."""
+    job_title = extract_job_title(text)
+    skills = extract_skills(doc)
+    employer_email = extract_employer_email(email_dict.get('sender', ''), text)
+
+    return {
+        'job_title': job_title,
+        'skills': skills,
+        'employer_email': employer_email,
+        'email_id': email_dict.get('id', ''),
+        'subject': email_dict.get('subject', ''),
+        'snippet': email_dict.get('snippet', '')
+    }
+
+def parse_error_result(email_dict, error):
+    logger.error(f"Error parsing email {email_dict.get('id', '')}: {error}")
+    return {
+        'job_title': 'Error parsing',
+        'skills': [],
+        'employer_email': 'unknown@example.com',
+        'email_id': email_dict.get('id', ''),
+        'subject': email_dict.get('subject', ''),
+        'snippet': email_dict.get('snippet', '')
+    }
+
 def parse_job_email(email_dict):
     """Parse job email content using spaCy to extract job details."""
     try:
-        text = email_dict.get('body', '') + ' ' + email_dict.get('subject', '')
-        doc = nlp(text)
-
-        job_title = extract_job_title(text)
-        skills = extract_skills(doc)
-        employer_email = extract_employer_email(email_dict.get('sender', ''), text)
-
-        parsed_job = {
-            'job_title': job_title,
-            'skills': skills,
-            'employer_email': employer_email,
-            'email_id': email_dict.get('id', ''),
-            'subject': email_dict.get('subject', ''),
-            'snippet': email_dict.get('snippet', '')
-        }
-
-        logger.info(f"Parsed job: {job_title} from {employer_email}")
+        text = email_text(email_dict)
+        doc = nlp(text, disable=DISABLED_PIPES)
+        parsed_job = build_parsed_job(email_dict, text, doc)
+        logger.info(f"Parsed job: {parsed_job['job_title']} from {parsed_job['employer_email']}")
         return parsed_job
     except Exception as e:
-        logger.error(f"Error parsing email {email_dict.get('id', '')}: {e}")
-        return {
-            'job_title': 'Error parsing',
-            'skills': [],
-            'employer_email': 'unknown@example.com',
-            'email_id': email_dict.get('id', ''),
-            'subject': email_dict.get('subject', ''),
-            'snippet': email_dict.get('snippet', '')
-        }
+        return parse_error_result(email_dict, e)
 
 def extract_job_title(text):
     """Extract job title from email text using regex patterns."""
@@ -92,6 +110,37 @@ def extract_employer_email(sender, text):
 
     return "unknown@example.com"
 
-def parse_job_emails(email_list):
+def iter_parse_job_emails(emails: Iterable[Dict], batch_size: int = PARSE_BATCH_SIZE,
+                          n_process: int = PARSE_N_PROCESS) -> Iterator[Dict]:
+    """Parse a stream of job emails in batches, yielding parsed jobs in order.
+
+    Emails are consumed lazily and run through nlp.pipe, so large inbox
+    backfills never hold more than a few batches in memory. Set n_process > 1
+    to spread tagging over several worker processes.
+    """
+    def texts_with_emails():
+        # An email whose text can't be built goes through as an empty doc with its error
+        for email_dict in emails:
+            try:
+                yield email_text(email_dict), (email_dict, None)
+            except Exception as e:
+                yield '', (email_dict, e)
+
+    count = 0
+    docs = nlp.pipe(texts_with_emails(), as_tuples=True, batch_size=batch_size,
+                    n_process=n_process, disable=DISABLED_PIPES)
+    for doc, (email_dict, error) in docs:
+        try:
+            if error is not None:
+                raise error
+            parsed_job = build_parsed_job(email_dict, doc.text, doc)
+            logger.debug(f"Parsed job: {parsed_job['job_title']} from {parsed_job['employer_email']}")
+        except Exception as e:
+            parsed_job = parse_error_result(email_dict, e)
+        count += 1
+        yield parsed_job
+    logger.info(f"Parsed {count} job emails")
+
+def parse_job_emails(email_list, batch_size: int = PARSE_BATCH_SIZE, n_process: int = PARSE_N_PROCESS):
     """Parse a list of job emails."""
-    return [parse_job_email(email) for email in email_list]
\ No newline at end of file
+    return list(iter_parse_job_emails(email_list, batch_size=batch_size, n_process=n_process))
@@ -3,7 +3,8 @@ import os
 import re
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import pdfplumber
 from docx import Document
 
@@ -18,14 +19,76 @@ except ImportError:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def parse_pdf_resume(file_path: str) -> Dict:
+# Bump when the structure of parsed output changes; cached parses are keyed on it
+PARSER_VERSION = '2.1'
+
+# Extraction budget: pages beyond PDF_MAX_PAGES and text beyond
+# RESUME_MAX_TEXT_BYTES are ignored so oversized uploads can't pin a worker
+PDF_MAX_PAGES = int(os.getenv('PDF_MAX_PAGES', '50'))
+RESUME_MAX_TEXT_BYTES = int(os.getenv('RESUME_MAX_TEXT_BYTES', str(2 * 1024 * 1024)))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', '8'))
+RESUME_PARSE_WORKERS = int(os.getenv('RESUME_PARSE_WORKERS', str(min(4, os.cpu_count() or 1))))
+
+def _extract_page_range(file_path: str, start: int, stop: int) -> List[str]:
+    """Text of pages [start, stop) of a PDF; runs in worker processes."""
+    texts = []
+    with pdfplumber.open(file_path) as pdf:
+        for page in pdf.pages[start:stop]:
+            texts.append(page.extract_text() or "")
+            page.close()
+    return texts
+
+def iter_pdf_pages(file_path: str, max_pages: int = PDF_MAX_PAGES,
+                   max_bytes: int = RESUME_MAX_TEXT_BYTES) -> Iterator[str]:
+    """Yield the text of each PDF page lazily, within the page/byte budget.
+
+    Pages without a text layer yield an empty string.
+    """
+    used_bytes = 0
+    with pdfplumber.open(file_path) as pdf:
+        for number, page in enumerate(pdf.pages):
+            if number >= max_pages:
+                logger.warning(f"{file_path}: stopped at page budget of {max_pages} pages")
+                break
+            text = page.extract_text() or ""
+            # Release the page's parsed objects before moving on
+            page.close()
+            used_bytes += len(text.encode('utf-8'))
+            if used_bytes > max_bytes:
+                logger.warning(f"{file_path}: stopped at text budget of {max_bytes} bytes")
+                break
+            yield text
+
+def extract_pdf_text(file_path: str, max_pages: int = PDF_MAX_PAGES, max_bytes: int = RESUME_MAX_TEXT_BYTES,
+                     workers: int = 1) -> str:
+    """Extract PDF text, spreading long documents over worker processes."""
+    if workers > 1:
+        with pdfplumber.open(file_path) as pdf:
+            page_count = min(len(pdf.pages), max_pages)
+        if page_count >= PDF_PARALLEL_MIN_PAGES:
+            step = -(-page_count // workers)
+            ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+            with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+                chunks = executor.map(_extract_page_range, [file_path] * len(ranges),
+                                      *zip(*ranges))
+                pages = [text for chunk in chunks for text in chunk]
+
+            texts, used_bytes = [], 0
+            for text in pages:
+                used_bytes += len(text.encode('utf-8'))
+                if used_bytes > max_bytes:
+                    logger.warning(f"{file_path}: stopped at text budget of {max_bytes} bytes")
+                    break
+                texts.append(text)
+            return "".join(f"{text}\n" for text in texts)
+
+    return "".join(f"{text}\n" for text in iter_pdf_pages(file_path, max_pages, max_bytes))
+
+def parse_pdf_resume(file_path: str, max_pages: int = PDF_MAX_PAGES, max_bytes: int = RESUME_MAX_TEXT_BYTES,
+                     workers: int = 1) -> Dict:
     """Parse PDF resume using pdfplumber."""
     try:
-        with pdfplumber.open(file_path) as pdf:
-            text = ""
-            for page in pdf.pages:
-                text += page.extract_text() + "\n"
-
+        text = extract_pdf_text(file_path, max_pages, max_bytes, workers)
         return parse_resume_text(text)
     except Exception as e:
         logger.error(f"Error parsing PDF {file_path}: {e}")
@@ -35,35 +98,88 @@ def parse_docx_resume(file_path: str) -> Dict:
     """Parse DOCX resume using python-docx."""
     try:
         doc = Document(file_path)
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-
+        text = "".join(f"{paragraph.text}\n" for paragraph in doc.paragraphs)
         return parse_resume_text(text)
     except Exception as e:
         logger.error(f"Error parsing DOCX {file_path}: {e}")
         raise
 
+# Section headings recognised by the segmenter, by canonical section
+SECTION_HEADINGS = {
+    "summary": ["summary", "professional summary", "career summary", "objective", "career objective",
+                "profile", "professional profile", "about me"],
+    "skills": ["skills", "technical skills", "core skills", "key skills", "core competencies", "competencies"],
+    "experience": ["experience", "work experience", "professional experience", "employment history",
+                   "work history", "employment"],
+    "education": ["education", "academic background", "education and training"],
+    "certifications": ["certifications", "certification", "certificates", "licenses and certifications",
+                       "licences and certifications"],
+}
+_HEADING_SECTIONS = {heading: section for section, headings in SECTION_HEADINGS.items() for heading in headings}
+
+# A heading is a line holding only a known heading, optionally followed by
+# ":" and inline content ("Skills: Python, SQL"). Longest alternatives first
+# so "Work Experience" is not read as "Experience".
+SECTION_HEADING_RE = re.compile(
+    r'^[ \t]*(?P<heading>' + '|'.join(re.escape(h) for h in sorted(_HEADING_SECTIONS, key=len, reverse=True)) +
+    r')[ \t]*(?::[ \t]*(?P<inline>[^\n]*?))?[ \t\r]*$',
+    re.IGNORECASE | re.MULTILINE
+)
+PARAGRAPH_BREAK_RE = re.compile(r'\n\s*\n')
+LIST_ITEM_SPLIT_RE = re.compile(r'[,;\n•|]')
+BULLET_PREFIX_RE = re.compile(r'^[\s\-*•·–]+')
+EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+PHONE_RE = re.compile(r'\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}')
+LOCATION_RE = re.compile(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*),\s*([A-Z]{2})')
+
+def segment_sections(text: str) -> Dict[str, str]:
+    """Split resume text into headed sections in a single pass.
+
+    Returns the canonical section name -> section body, plus "header" for
+    the text before the first heading. When a heading repeats, the first
+    occurrence wins.
+    """
+    sections = {}
+    heading_matches = list(SECTION_HEADING_RE.finditer(text))
+    sections["header"] = text[:heading_matches[0].start()] if heading_matches else text
+    for i, match in enumerate(heading_matches):
+        section = _HEADING_SECTIONS[match.group("heading").lower()]
+        if section in sections:
+            continue
+        body_end = heading_matches[i + 1].start() if i + 1 < len(heading_matches) else len(text)
+        inline = match.group("inline") or ""
+        sections[section] = f"{inline}\n{text[match.end():body_end]}" if inline else text[match.end():body_end]
+    return sections
+
+def _list_items(body: str) -> List[str]:
+    """Items of a comma/bullet/line separated list."""
+    items = (BULLET_PREFIX_RE.sub("", item).strip() for item in LIST_ITEM_SPLIT_RE.split(body))
+    return [item for item in items if item]
+
+def _entries(body: str) -> List[List[str]]:
+    """Blank-line separated entries of a section, as lists of stripped lines."""
+    entries = []
+    for paragraph in PARAGRAPH_BREAK_RE.split(body):
+        lines = [line.strip() for line in paragraph.strip().split('\n') if line.strip()]
+        if lines:
+            entries.append(lines)
+    return entries
+
 def parse_resume_text(text: str) -> Dict:
-    """Parse resume text to extract structured data."""
-    try:
-        # Extract header information
-        header = extract_header(text)
+    """Parse resume text to extract structured data.
 
-        # Extract sections
-        summary = extract_summary(text)
-        skills = extract_skills(text)
-        experience = extract_experience(text)
-        education = extract_education(text)
-        certifications = extract_certifications(text)
+    The text is segmented once; each extractor only reads its own section.
+    """
+    try:
+        sections = segment_sections(text)
 
         parsed_resume = {
-            "personal_info": header,
-            "summary": summary,
-            "skills": skills,
-            "experience": experience,
-            "education": education,
-            "certifications": certifications
+            "personal_info": extract_header(text),
+            "summary": parse_summary_section(sections, text),
+            "skills": _list_items(sections.get("skills", "")),
+            "experience": parse_experience_section(sections.get("experience", "")),
+            "education": parse_education_section(sections.get("education", "")),
+            "certifications": _list_items(sections.get("certifications", ""))
         }
 
         logger.info("Resume parsed successfully")
@@ -88,140 +204,87 @@ def extract_header(text: str) -> Dict:
         header["name"] = lines[0].strip()
 
     # Extract email
-    email_match = re.search(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', text)
+    email_match = EMAIL_RE.search(text)
     if email_match:
         header["email"] = email_match.group(0)
 
     # Extract phone
-    phone_match = re.search(r'\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}', text)
+    phone_match = PHONE_RE.search(text)
     if phone_match:
         header["phone"] = phone_match.group(0)
 
     # Extract location (simple pattern)
-    location_match = re.search(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*),\s*([A-Z]{2})', text)
+    location_match = LOCATION_RE.search(text)
     if location_match:
         header["location"] = location_match.group(0)
 
     return header
 
-def extract_summary(text: str) -> str:
-    """Extract professional summary."""
-    # Look for summary section
-    summary_patterns = [
-        r'Summary[:\s]*(.*?)(?:\n\n|\n[A-Z]|$)',
-        r'Professional Summary[:\s]*(.*?)(?:\n\n|\n[A-Z]|$)',
-        r'Objective[:\s]*(.*?)(?:\n\n|\n[A-Z]|$)',
-        r'Profile[:\s]*(.*?)(?:\n\n|\n[A-Z]|$)'
-    ]
-
-    for pattern in summary_patterns:
-        match = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
-        if match:
-            return match.group(1).strip()
-
-    # Fallback: first paragraph after header
-    paragraphs = re.split(r'\n\s*\n', text)
+def parse_summary_section(sections: Dict[str, str], text: str) -> str:
+    """Summary section as one line; falls back to the first paragraph after the header."""
+    if "summary" in sections:
+        return ' '.join(line.strip() for line in sections["summary"].split('\n') if line.strip())
+    paragraphs = PARAGRAPH_BREAK_RE.split(text.strip())
     if len(paragraphs) > 1:
         return paragraphs[1].strip()
-
     return ""
 
-def extract_skills(text: str) -> List[str]:
-    """Extract skills from resume."""
-    skills = []
+def parse_experience_section(body: str) -> List[Dict]:
+    """Experience entries from the experience section body."""
+    experience = []
+    for lines in _entries(body):
+        experience.append({
+            "title": lines[0],
+            "company": "",
+            "location": "",
+            "start_date": "",
+            "end_date": "",
+            "description": ' '.join(lines[1:])
+        })
+    return experience
 
-    # Look for skills section
-    skills_match = re.search(r'Skills[:\s]*(.*?)(?:\n\n|\n[A-Z]|$)', text, re.IGNORECASE | re.DOTALL)
-    if skills_match:
-        skills_text = skills_match.group(1)
-        # Split by commas, bullets, or newlines
-        skills = re.split(r'[,\n•\-]', skills_text)
-        skills = [skill.strip() for skill in skills if skill.strip()]
+def parse_education_section(body: str) -> List[Dict]:
+    """Education entries from the education section body."""
+    education = []
+    for lines in _entries(body):
+        education.append({
+            "degree": lines[0],
+            "institution": "",
+            "location": "",
+            "graduation_date": "",
+            "gpa": ""
+        })
+    return education
 
-    return skills
+def extract_summary(text: str) -> str:
+    """Extract professional summary."""
+    return parse_summary_section(segment_sections(text), text)
+
+def extract_skills(text: str) -> List[str]:
+    """Extract skills from resume."""
+    return _list_items(segment_sections(text).get("skills", ""))
 
 def extract_experience(text: str) -> List[Dict]:
     """Extract work experience."""
-    experience = []
-
-    # Look for experience section
-    exp_match = re.search(r'Experience[:\s]*(.*?)(?:\n\n|\n[A-Z]|$)', text, re.IGNORECASE | re.DOTALL)
-    if exp_match:
-        exp_text = exp_match.group(1)
-
-        # Split into individual experiences (rough approximation)
-        exp_entries = re.split(r'\n\s*\n', exp_text)
-
-        for entry in exp_entries:
-            if entry.strip():
-                # Extract title, company, dates
-                lines = entry.strip().split('\n')
-                if lines:
-                    title_company = lines[0]
-                    description = ' '.join(lines[1:]) if len(lines) > 1 else ""
-
-                    exp_item = {
-                        "title": title_company,
-                        "company": "",
-                        "location": "",
-                        "start_date": "",
-                        "end_date": "",
-                        "description": description
-                    }
-                    experience.append(exp_item)
-
-    return experience
+    return parse_experience_section(segment_sections(text).get("experience", ""))
 
 def extract_education(text: str) -> List[Dict]:
     """Extract education information."""
-    education = []
-
-    # Look for education section
-    edu_match = re.search(r'Education[:\s]*(.*?)(?:\n\n|\n[A-Z]|$)', text, re.IGNORECASE | re.DOTALL)
-    if edu_match:
-        edu_text = edu_match.group(1)
-
-        # Split into individual education entries
-        edu_entries = re.split(r'\n\s*\n', edu_text)
-
-        for entry in edu_entries:
-            if entry.strip():
-                lines = entry.strip().split('\n')
-                if lines:
-                    degree_institution = lines[0]
-                    details = ' '.join(lines[1:]) if len(lines) > 1 else ""
-
-                    edu_item = {
-                        "degree": degree_institution,
-                        "institution": "",
-                        "location": "",
-                        "graduation_date": "",
-                        "gpa": ""
-                    }
-                    education.append(edu_item)
-
-    return education
+    return parse_education_section(segment_sections(text).get("education", ""))
 
 def extract_certifications(text: str) -> List[str]:
     """Extract certifications."""
-    certifications = []
-
-    # Look for certifications section
-    cert_match = re.search(r'Certifications?[:\s]*(.*?)(?:\n\n|\n[A-Z]|$)', text, re.IGNORECASE | re.DOTALL)
-    if cert_match:
-        cert_text = cert_match.group(1)
-        # Split by commas, bullets, or newlines
-        certifications = re.split(r'[,\n•\-]', cert_text)
-        certifications = [cert.strip() for cert in certifications if cert.strip()]
+    return _list_items(segment_sections(text).get("certifications", ""))
 
-    return certifications
+def parse_resume_file(file_path: str, user_id: str = None, anonymize: bool = True, workers: int = 1) -> Dict:
+    """Main function to parse resume file (PDF or DOCX) with POPIA compliance.
 
-def parse_resume_file(file_path: str, user_id: str = None, anonymize: bool = True) -> Dict:
-    """Main function to parse resume file (PDF or DOCX) with POPIA compliance."""
+    Long PDFs are split across `workers` processes when workers > 1.
+    """
     try:
         # Parse the resume
         if file_path.lower().endswith('.pdf'):
-            parsed_resume = parse_pdf_resume(file_path)
+            parsed_resume = parse_pdf_resume(file_path, workers=workers)
         elif file_path.lower().endswith('.docx'):
             parsed_resume = parse_docx_resume(file_path)
         else:
@@ -263,6 +326,18 @@ def parse_resume_file(file_path: str, user_id: str = None, anonymize: bool = Tru
             "certifications": []
         }
 
+def parse_resume_files(file_paths: Iterable[str], user_id: str = None, anonymize: bool = True,
+                       max_workers: int = RESUME_PARSE_WORKERS) -> Iterator[Dict]:
+    """Parse many resume files across a process pool, yielding results in order."""
+    file_paths = list(file_paths)
+    if max_workers <= 1 or len(file_paths) <= 1:
+        for file_path in file_paths:
+            yield parse_resume_file(file_path, user_id, anonymize)
+        return
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        yield from executor.map(parse_resume_file, file_paths,
+                                [user_id] * len(file_paths), [anonymize] * len(file_paths))
+
 def merge_resume_data(existing_resume: Dict, new_resume: Dict) -> Dict:
     """Merge parsed resume data with existing master resume."""
     try:
@@ -7,20 +7,21 @@ from docx import Document
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet
-from typing import Dict, List, Optional
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+from scipy import sparse
 import numpy as np
+from resume_doc_processing import embedding_index
+from resume_doc_processing import llm_client
+from resume_doc_processing.master_resume import MasterResumeViews, load_master_resume, views_for
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-HUGGINGFACE_API_KEY = os.getenv('HUGGINGFACE_API_KEY')
-if not HUGGINGFACE_API_KEY:
-    logger.error("HUGGINGFACE_API_KEY not found in environment variables")
-    raise ValueError("HUGGINGFACE_API_KEY is required")
+# The configured LLM backend must have credentials
+llm_client.require_credentials()
 
 # Load spaCy model
 try:
@@ -29,78 +30,127 @@ except OSError:
     logger.error("spaCy model 'en_core_web_sm' not found. Run 'python -m spacy download en_core_web_sm'")
     raise
 
-# Load master resume
-def load_master_resume() -> Dict:
-    """Load the master resume from JSON file."""
+# Description tokens only need POS tags for keyword extraction
+FIT_PIPE_DISABLE = ['ner', 'lemmatizer', 'parser']
+FIT_BATCH_SIZE = int(os.getenv('FIT_SCORE_BATCH_SIZE', '256'))
+
+# Description similarity: 'tfidf' (default) or 'embedding' (local embedding index, opt-in)
+FIT_SIMILARITY_BACKEND = os.getenv('FIT_SIMILARITY_BACKEND', 'tfidf')
+
+# Resume generation pipeline: concurrent LLM calls and DOCX/PDF render workers
+RESUME_GEN_CONCURRENCY = int(os.getenv('RESUME_GEN_CONCURRENCY', '4'))
+RESUME_RENDER_WORKERS = int(os.getenv('RESUME_RENDER_WORKERS', '2'))
+
+def job_requirement_terms(job_details: Dict, doc=None) -> set:
+    """Lowercased requirements, skills and description keywords of a job."""
+    job_requirements = set()
+    if 'requirements' in job_details:
+        job_requirements = set(req.lower() for req in job_details['requirements'])
+    if 'skills' in job_details:
+        job_requirements.update(set(skill.lower() for skill in job_details['skills']))
+    if doc is not None:
+        for token in doc:
+            if token.pos_ in ['NOUN', 'PROPN', 'ADJ'] and len(token.text) > 2 and not token.is_stop:
+                job_requirements.add(token.text)
+    return job_requirements
+
+def keyword_scores(resume_skills: set, requirement_sets: List[set]) -> np.ndarray:
+    """Share of each job's requirements covered by the resume, as percentages.
+
+    Requirements are encoded as a sparse binary job x term matrix, so the
+    overlap with the resume is a single sparse matrix-vector product.
+    """
+    vocabulary = {}
+    rows, cols = [], []
+    for row, terms in enumerate(requirement_sets):
+        for term in terms:
+            rows.append(row)
+            cols.append(vocabulary.setdefault(term, len(vocabulary)))
+    job_matrix = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+        shape=(len(requirement_sets), len(vocabulary))
+    )
+    resume_vector = np.zeros(len(vocabulary), dtype=np.float32)
+    for skill in resume_skills:
+        if skill in vocabulary:
+            resume_vector[vocabulary[skill]] = 1.0
+
+    matches = job_matrix @ resume_vector
+    totals = job_matrix.getnnz(axis=1)
+    return np.divide(matches * 100, totals, out=np.zeros(len(requirement_sets)), where=totals > 0)
+
+def similarity_scores(views: MasterResumeViews, job_texts: List[str]) -> np.ndarray:
+    """TF-IDF cosine similarity of the resume skills against every job, as percentages.
+
+    Jobs are transformed with the vectorizer cached on the resume views and
+    compared with its skill vector in one sparse product. Job terms the
+    resume never uses still count towards each job's norm, weighted with
+    the unseen-term IDF, so long off-topic descriptions score low.
+    """
+    scores = np.zeros(len(job_texts))
+    tfidf = views.tfidf
+    present = [i for i, text in enumerate(job_texts) if text]
+    if tfidf is None or not present:
+        return scores
+    vocabulary = tfidf['vectorizer'].vocabulary_
+    job_matrix = tfidf['vectorizer'].transform([job_texts[i] for i in present])
+    squared_norms = np.asarray(job_matrix.multiply(job_matrix).sum(axis=1)).ravel()
+    for row, i in enumerate(present):
+        unseen = Counter(term for term in tfidf['analyzer'](job_texts[i]) if term not in vocabulary)
+        squared_norms[row] += sum((count * tfidf['unseen_idf']) ** 2 for count in unseen.values())
+    norms = np.sqrt(squared_norms)
+    dots = (job_matrix @ tfidf['vector'].T).toarray().ravel()
+    scores[present] = np.divide(dots * 100, norms, out=np.zeros(len(present)), where=norms > 0)
+    return scores
+
+def description_similarity(views: MasterResumeViews, jobs: List[Dict], descriptions: List[str]) -> np.ndarray:
+    """Resume-vs-description similarity from the embedding index, or TF-IDF as fallback."""
+    if FIT_SIMILARITY_BACKEND == 'embedding' and embedding_index.TRANSFORMERS_AVAILABLE:
+        try:
+            return embedding_index.semantic_similarity_scores(views.data, jobs)
+        except Exception as e:
+            logger.warning(f"Embedding index unavailable, using TF-IDF similarity: {e}")
+    return similarity_scores(views, descriptions)
+
+def calculate_fit_scores(master_resume: Dict, jobs: List[Dict]) -> List[float]:
+    """Calculate fit scores between the resume and a batch of jobs.
+
+    Skill set and TF-IDF vector come from the memoized resume views, so
+    they are computed once per resume version rather than per call.
+    """
+    if not jobs:
+        return []
     try:
-        # Get the directory of this file and look for master_resume.json
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        resume_path = os.path.join(current_dir, 'master_resume.json')
-        with open(resume_path, 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        logger.error("master_resume.json not found")
-        raise
-    except json.JSONDecodeError as e:
-        logger.error(f"Error parsing master_resume.json: {e}")
-        raise
+        views = views_for(master_resume)
+        descriptions = [job.get('description', '') or '' for job in jobs]
 
-def calculate_fit_score(master_resume: Dict, job_details: Dict) -> float:
-    """Calculate fit score between resume and job requirements."""
-    try:
-        # Extract skills from master resume
-        resume_skills = set()
-        if 'skills' in master_resume:
-            resume_skills = set(skill.lower() for skill in master_resume['skills'])
-
-        # Extract requirements from job
-        job_requirements = set()
-        if 'requirements' in job_details:
-            job_requirements = set(req.lower() for req in job_details['requirements'])
-        if 'skills' in job_details:
-            job_requirements.update(set(skill.lower() for skill in job_details['skills']))
-
-        # Extract keywords from job description
-        job_description = job_details.get('description', '')
-        if job_description:
-            doc = nlp(job_description.lower())
-            desc_keywords = set()
-            for token in doc:
-                if token.pos_ in ['NOUN', 'PROPN', 'ADJ'] and len(token.text) > 2 and not token.is_stop:
-                    desc_keywords.add(token.text)
-            job_requirements.update(desc_keywords)
-
-        if not job_requirements:
-            return 0.0
-
-        # Calculate keyword match score
-        matching_skills = resume_skills.intersection(job_requirements)
-        keyword_score = len(matching_skills) / len(job_requirements) * 100
-
-        # Calculate TF-IDF similarity for description
-        resume_text = ' '.join(master_resume.get('skills', []))
-        job_text = job_description
-
-        if resume_text and job_text:
-            vectorizer = TfidfVectorizer(stop_words='english')
-            try:
-                tfidf_matrix = vectorizer.fit_transform([resume_text, job_text])
-                similarity = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
-                similarity_score = similarity * 100
-            except:
-                similarity_score = 0.0
-        else:
-            similarity_score = 0.0
+        # Tag all descriptions in one pipe instead of one nlp() call per job
+        docs = iter(nlp.pipe((text.lower() for text in descriptions if text),
+                             batch_size=FIT_BATCH_SIZE, disable=FIT_PIPE_DISABLE))
+        requirement_sets = [
+            job_requirement_terms(job, next(docs) if text else None)
+            for job, text in zip(jobs, descriptions)
+        ]
+
+        keyword = keyword_scores(views.skills, requirement_sets)
+        similarity = description_similarity(views, jobs, descriptions)
 
-        # Weighted average
-        final_score = (keyword_score * 0.7) + (similarity_score * 0.3)
+        # Weighted average; jobs without any requirements score 0
+        has_requirements = np.array([bool(terms) for terms in requirement_sets])
+        final_scores = np.where(has_requirements, keyword * 0.7 + similarity * 0.3, 0.0)
 
-        logger.info(f"Fit score for {job_details.get('title', 'Unknown')}: {final_score:.1f}%")
-        return final_score
+        logger.info(f"Scored fit for {len(jobs)} jobs")
+        return [float(score) for score in final_scores]
 
     except Exception as e:
-        logger.error(f"Error calculating fit score: {e}")
-        return 0.0
+        logger.error(f"Error calculating fit scores: {e}")
+        return [0.0] * len(jobs)
+
+def calculate_fit_score(master_resume: Dict, job_details: Dict) -> float:
+    """Calculate fit score between resume and job requirements."""
+    final_score = calculate_fit_scores(master_resume, [job_details])[0]
+    logger.info(f"Fit score for {job_details.get('title', 'Unknown')}: {final_score:.1f}%")
+    return final_score
 
 def generate_resume_content(master_resume: Dict, job_details: Dict) -> str:
     """Generate ATS-optimized resume content using Hugging Face Llama 3.1 8B-Instruct."""
@@ -133,33 +183,8 @@ def generate_resume_content(master_resume: Dict, job_details: Dict) -> str:
         Return only the resume content in plain text format.
         """
 
-        # Hugging Face Inference API call
-        response = requests.post(
-            'https://api-inference.huggingface.co/models/meta-llama/Llama-3.1-8B-Instruct',
-            headers={
-                'Authorization': f'Bearer {HUGGINGFACE_API_KEY}',
-                'Content-Type': 'application/json'
-            },
-            json={
-                'inputs': prompt,
-                'parameters': {
-                    'max_new_tokens': 2000,
-                    'temperature': 0.7,
-                    'do_sample': True
-                }
-            },
-            timeout=60  # Increased timeout for inference
-        )
-
-        if response.status_code == 200:
-            result = response.json()
-            if isinstance(result, list) and result:
-                return result[0].get('generated_text', '').strip()
-            else:
-                raise Exception("Unexpected API response format")
-        else:
-            logger.error(f"Hugging Face API error: {response.status_code} - {response.text}")
-            raise Exception(f"Failed to generate resume: {response.status_code}")
+        # Shared LLM client; identical prompts are served from its cache
+        return llm_client.complete(prompt, max_new_tokens=2000, temperature=0.7, do_sample=True, timeout=60)
 
     except requests.RequestException as e:
         logger.error(f"Request error: {e}")
@@ -270,6 +295,44 @@ def create_pdf_resume(content: str, filename: str) -> str:
         logger.error(f"Error creating PDF document: {e}")
         raise
 
+def skipped_resume_result(job_details: Dict, fit_score: float) -> Dict:
+    return {
+        'skipped': True,
+        'fit_score': fit_score,
+        'reason': f'Fit score {fit_score:.1f}% below 90% threshold',
+        'content': '',
+        'word_file': '',
+        'pdf_file': '',
+        'job_title': job_details.get('title', ''),
+        'company': job_details.get('company', '')
+    }
+
+def failed_resume_result(job_details: Dict, error: Exception) -> Dict:
+    return {
+        'error': str(error),
+        'content': '',
+        'word_file': '',
+        'pdf_file': '',
+        'job_title': job_details.get('title', ''),
+        'company': job_details.get('company', '')
+    }
+
+def render_resume(content: str, base_filename: str) -> tuple:
+    """Write the Word and PDF versions of a generated resume."""
+    return create_word_resume(content, base_filename), create_pdf_resume(content, base_filename)
+
+def resume_result(job_details: Dict, fit_score: float, content: str, files: tuple) -> Dict:
+    word_file, pdf_file = files
+    return {
+        'content': content,
+        'word_file': word_file,
+        'pdf_file': pdf_file,
+        'job_title': job_details.get('title', ''),
+        'company': job_details.get('company', ''),
+        'skills': job_details.get('skills', []),
+        'fit_score': fit_score
+    }
+
 def generate_resume(job_details: Dict) -> Dict:
     """Main function to generate ATS-optimized resume."""
     try:
@@ -279,16 +342,7 @@ def generate_resume(job_details: Dict) -> Dict:
         fit_score = calculate_fit_score(master_resume, job_details)
         if fit_score < 90:
             logger.info(f"Skipping resume generation for {job_details.get('title', 'Unknown')} - fit score: {fit_score:.1f}%")
-            return {
-                'skipped': True,
-                'fit_score': fit_score,
-                'reason': f'Fit score {fit_score:.1f}% below 90% threshold',
-                'content': '',
-                'word_file': '',
-                'pdf_file': '',
-                'job_title': job_details.get('title', ''),
-                'company': job_details.get('company', '')
-            }
+            return skipped_resume_result(job_details, fit_score)
 
         content = generate_resume_content(master_resume, job_details)
 
@@ -296,34 +350,71 @@ def generate_resume(job_details: Dict) -> Dict:
         job_id = job_details.get('id', 'unknown')
         base_filename = f"resume_{job_id}"
 
-        word_file = create_word_resume(content, base_filename)
-        pdf_file = create_pdf_resume(content, base_filename)
-
-        return {
-            'content': content,
-            'word_file': word_file,
-            'pdf_file': pdf_file,
-            'job_title': job_details.get('title', ''),
-            'company': job_details.get('company', ''),
-            'fit_score': fit_score
-        }
+        return resume_result(job_details, fit_score, content, render_resume(content, base_filename))
     except Exception as e:
         logger.error(f"Error generating resume: {e}")
-        return {
-            'error': str(e),
-            'content': '',
-            'word_file': '',
-            'pdf_file': '',
-            'job_title': job_details.get('title', ''),
-            'company': job_details.get('company', '')
-        }
-
-def generate_resumes_for_jobs(parsed_jobs: List[Dict]) -> List[Dict]:
-    """Generate resumes for multiple jobs."""
-    resumes = []
-    for job in parsed_jobs:
-        resume = generate_resume(job)
-        resumes.append(resume)
+        return failed_resume_result(job_details, e)
+
+def iter_generated_resumes(jobs: List[Dict], concurrency: int = RESUME_GEN_CONCURRENCY,
+                           render_workers: int = RESUME_RENDER_WORKERS) -> Iterator[Tuple[int, Dict]]:
+    """Generate resumes for many jobs concurrently, yielding (job index, resume) as each finishes.
+
+    Fit scores are computed in one batch. Up to `concurrency` LLM calls run
+    at once while finished drafts are rendered to DOCX/PDF on a separate
+    pool, so rendering overlaps with the remaining LLM latency. Results have
+    the same shape as generate_resume().
+    """
+    if not jobs:
+        return
+    try:
+        master_resume = load_master_resume()
+        fit_scores = calculate_fit_scores(master_resume, jobs)
+    except Exception as e:
+        logger.error(f"Error preparing resume generation: {e}")
+        for index, job in enumerate(jobs):
+            yield index, failed_resume_result(job, e)
+        return
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='resume-llm') as llm_pool, \
+            ThreadPoolExecutor(max_workers=max(1, render_workers), thread_name_prefix='resume-render') as render_pool:
+        # future -> (stage, job index, draft content)
+        pending: Dict[Future, tuple] = {}
+        try:
+            for index, (job, fit_score) in enumerate(zip(jobs, fit_scores)):
+                if fit_score < 90:
+                    logger.info(f"Skipping resume generation for {job.get('title', 'Unknown')} - fit score: {fit_score:.1f}%")
+                    yield index, skipped_resume_result(job, fit_score)
+                    continue
+                pending[llm_pool.submit(generate_resume_content, master_resume, job)] = ('draft', index, None)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, index, content = pending.pop(future)
+                    job = jobs[index]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.error(f"Error generating resume: {e}")
+                        yield index, failed_resume_result(job, e)
+                        continue
+
+                    if stage == 'draft':
+                        # Jobs without an id must not render into the same file concurrently
+                        base_filename = f"resume_{job.get('id') or f'job{index}'}"
+                        pending[render_pool.submit(render_resume, result, base_filename)] = ('render', index, result)
+                    else:
+                        yield index, resume_result(job, fit_scores[index], content, result)
+        finally:
+            # Consumer stopped early: drop work that hasn't started
+            for future in pending:
+                future.cancel()
+
+def generate_resumes_for_jobs(parsed_jobs: List[Dict], concurrency: int = RESUME_GEN_CONCURRENCY) -> List[Dict]:
+    """Generate resumes for multiple jobs, returned in job order."""
+    resumes: List[Optional[Dict]] = [None] * len(parsed_jobs)
+    for index, resume in iter_generated_resumes(parsed_jobs, concurrency):
+        resumes[index] = resume
     return resumes
 
 def filter_high_fit_jobs(jobs: List[Dict]) -> tuple:
@@ -332,8 +423,7 @@ def filter_high_fit_jobs(jobs: List[Dict]) -> tuple:
     high_fit = []
     low_fit = []
 
-    for job in jobs:
-        fit_score = calculate_fit_score(master_resume, job)
+    for job, fit_score in zip(jobs, calculate_fit_scores(master_resume, jobs)):
         job['fit_score'] = fit_score
         if fit_score >= 90:
             high_fit.append(job)
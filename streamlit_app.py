@@ -6,6 +6,7 @@ Provides a comprehensive dashboard for the job application workflow
 import streamlit as st
 import requests
 import json
+import hashlib
 from datetime import datetime
 import os
 import time
@@ -45,6 +46,10 @@ if 'workflow_status' not in st.session_state:
 if 'last_update' not in st.session_state:
     st.session_state.last_update = datetime.now()
 
+# Upload results keyed by (user, file SHA-256, anonymize) so re-uploads skip the round trip
+if 'parsed_uploads' not in st.session_state:
+    st.session_state.parsed_uploads = {}
+
 def main():
     st.title("🚀 Job Application Agent Dashboard")
     st.markdown("AI-powered comprehensive job search and application platform")
@@ -227,25 +232,35 @@ def show_resume_management():
         anonymize = st.checkbox("Anonymize personal data (POPIA compliant)", value=True)
 
         if uploaded_file is not None:
-            if st.button("🚀 Upload & Parse Resume"):
-                with st.spinner("Uploading and parsing resume..."):
-                    # Upload file to resume service
-                    files = {"file": (uploaded_file.name, uploaded_file.getvalue(), uploaded_file.type)}
-                    data = {"user_id": st.session_state.user_id, "anonymize": anonymize}
+            file_bytes = uploaded_file.getvalue()
+            upload_key = (st.session_state.user_id, hashlib.sha256(file_bytes).hexdigest(), anonymize)
 
-                    try:
-                        response = requests.post(f"{API_ENDPOINTS['resume']}/upload-resume",
-                                               files=files, data=data, timeout=60)
-
-                        if response.status_code == 200:
-                            result = response.json()
-                            st.success("✅ Resume uploaded successfully!")
-                            st.json(result)
-                            update_last_refresh()
-                        else:
-                            st.error(f"Upload failed: {response.text}")
-                    except Exception as e:
-                        st.error(f"Connection error: {str(e)}")
+            if st.button("🚀 Upload & Parse Resume"):
+                if upload_key in st.session_state.parsed_uploads:
+                    st.success("✅ Resume already parsed")
+                    st.json(st.session_state.parsed_uploads[upload_key])
+                else:
+                    with st.spinner("Uploading and parsing resume..."):
+                        # Upload file to resume service
+                        files = {"file": (uploaded_file.name, file_bytes, uploaded_file.type)}
+                        data = {"user_id": st.session_state.user_id, "anonymize": anonymize}
+
+                        try:
+                            response = requests.post(f"{API_ENDPOINTS['resume']}/upload-resume",
+                                                   files=files, data=data, timeout=60)
+
+                            if response.status_code == 200:
+                                result = response.json()
+                                st.session_state.parsed_uploads[upload_key] = result
+                                st.success("✅ Resume uploaded successfully!")
+                                st.json(result)
+                                update_last_refresh()
+                            elif response.status_code == 429:
+                                st.warning(f"Resume parser is busy, try again in {response.headers.get('Retry-After', 'a few')} seconds")
+                            else:
+                                st.error(f"Upload failed: {response.text}")
+                        except Exception as e:
+                            st.error(f"Connection error: {str(e)}")
 
     with tab2:
         st.subheader("Your Resumes")